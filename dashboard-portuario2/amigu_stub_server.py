@@ -0,0 +1,164 @@
+"""
+Servidor local que substitui as APIs do Instituto AmiGU em testes e desenvolvimento
+
+Uso:
+    python amigu_stub_server.py --port 8765 --latencia 0.05 --taxa-erro 0.1
+    AMIGU_BASE_URL=http://127.0.0.1:8765 streamlit run app.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+def _ordem_id(registro_id: str) -> Tuple[int, int, str]:
+    """Ids numéricos em ordem numérica ("9" < "10"), os demais em ordem textual"""
+    return (0, int(registro_id), "") if registro_id.isdigit() else (1, 0, registro_id)
+
+
+def _resposta_post(path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Respostas no formato usado pelo dashboard para cada endpoint"""
+    if path.endswith("/autorizacoes"):
+        return {
+            "success": True,
+            "autorizacao_id": payload.get("autorizacao_id"),
+            "status": "processando",
+            "message": "Solicitação recebida pela Capitania dos Portos"
+        }
+    if path.endswith("/operacoes"):
+        return {
+            "success": True,
+            "operacao_id": payload.get("operacao_id"),
+            "status": "sincronizado",
+            "berco_atribuido": payload.get("berco", "Berço 1")
+        }
+    if path.endswith("/escalas"):
+        return {
+            "success": True,
+            "escala_id": payload.get("escala_id"),
+            "status": "registrada",
+            "preposto_responsavel": "João Silva"
+        }
+    return {"success": True, "recebido": payload}
+
+
+class AmiguStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.stats["conexoes"] += 1
+    
+    def _responder(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def _simular_rede(self) -> bool:
+        with self.server.stats_lock:
+            self.server.stats["requisicoes"] += 1
+        if self.server.latencia:
+            time.sleep(self.server.latencia)
+        if random.random() < self.server.taxa_erro:
+            self._responder(503, {"success": False, "error": "Serviço indisponível (simulado)"})
+            return False
+        return True
+    
+    def do_GET(self):
+        if not self._simular_rede():
+            return
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        desde = params.get("updated_since", [""])[0]
+        depois_de = params.get("after_id", [None])[0]
+        limite = int(params.get("limit", ["200"])[0])
+        
+        with self.server.stats_lock:
+            registros = sorted(self.server.registros.get(url.path, {}).items(),
+                               key=lambda item: (item[1]["atualizado_em"], _ordem_id(item[0])))
+        if depois_de is None:
+            registros = [r for _, r in registros if r["atualizado_em"] > desde][:limite]
+        else:
+            # Mesma marca de atualização: continua pelos ids posteriores ao último recebido
+            ultimo = (desde, _ordem_id(depois_de))
+            registros = [r for registro_id, r in registros
+                         if (r["atualizado_em"], _ordem_id(registro_id)) > ultimo][:limite]
+        cursor = registros[-1]["atualizado_em"] if registros else desde or None
+        self._responder(200, {"dados": registros, "cursor": cursor})
+    
+    def do_HEAD(self):
+        if not self._simular_rede():
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+    
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b"{}"
+        if not self._simular_rede():
+            return
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            self._responder(400, {"success": False, "error": "JSON inválido"})
+            return
+        path = urlsplit(self.path).path
+        resposta = _resposta_post(path, payload)
+        
+        # Guarda o registro para que os GETs incrementais o devolvam
+        registro_id = next((str(v) for k, v in payload.items() if k.endswith("_id") and v), None)
+        if registro_id:
+            with self.server.stats_lock:
+                registro = {**payload, "atualizado_em": datetime.now(timezone.utc).isoformat()}
+                self.server.registros.setdefault(path, {})[registro_id] = registro
+        self._responder(200, resposta)
+
+
+def criar_servidor(host: str = "127.0.0.1", port: int = 0, latencia: float = 0.0,
+                   taxa_erro: float = 0.0) -> ThreadingHTTPServer:
+    """Cria o servidor (port=0 escolhe uma porta livre); use serve_forever() ou iniciar_em_thread()"""
+    server = ThreadingHTTPServer((host, port), AmiguStubHandler)
+    server.daemon_threads = True
+    server.latencia = latencia
+    server.taxa_erro = taxa_erro
+    server.stats = {"conexoes": 0, "requisicoes": 0}
+    server.registros = {}
+    server.stats_lock = threading.Lock()
+    return server
+
+
+def iniciar_em_thread(server: Optional[ThreadingHTTPServer] = None) -> ThreadingHTTPServer:
+    """Executa o servidor em uma thread daemon e devolve a instância"""
+    server = server or criar_servidor()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor local das APIs do Instituto AmiGU")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Latência simulada em segundos")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Fração de respostas 503")
+    args = parser.parse_args()
+    
+    server = criar_servidor(args.host, args.port, args.latencia, args.taxa_erro)
+    print(f"APIs AmiGU simuladas em http://{args.host}:{server.server_address[1]}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
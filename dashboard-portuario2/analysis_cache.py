@@ -0,0 +1,141 @@
+"""
+Cache persistente (SQLite) de resultados de análise de documentos
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from config import CACHE_CONFIG, PORTO_SANTOS_RULES, RULES_VERSION
+
+
+def rule_version(document_type: str) -> str:
+    """Versão das regras do tipo de documento (versão global + hash das regras)"""
+    rules = PORTO_SANTOS_RULES.get(document_type, {})
+    digest = hashlib.sha256(json.dumps(rules, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"{RULES_VERSION}:{digest[:12]}"
+
+
+def make_cache_key(pdf_bytes: bytes, document_type: str) -> str:
+    """Chave endereçada por conteúdo: hash do PDF + tipo de documento + versão das regras"""
+    return _finish_key(hashlib.sha256(pdf_bytes), document_type)
+
+
+def make_cache_key_from_path(path: str, document_type: str, chunk_size: int = 1024 * 1024) -> str:
+    """Mesma chave de make_cache_key, lendo o PDF do disco em blocos"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return _finish_key(hasher, document_type)
+
+
+def _finish_key(hasher, document_type: str) -> str:
+    hasher.update(b"\0" + document_type.encode("utf-8"))
+    hasher.update(b"\0" + rule_version(document_type).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+class AnalysisCache:
+    """Cache LRU com TTL dos resultados de process_document, persistido em SQLite"""
+    
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        self.path = path or CACHE_CONFIG["path"]
+        self.max_entries = max_entries if max_entries is not None else CACHE_CONFIG["max_entries"]
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else CACHE_CONFIG["ttl_seconds"]
+        
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                key TEXT PRIMARY KEY,
+                document_type TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_access ON analysis_cache (last_access)"
+        )
+        self._conn.commit()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retorna o resultado armazenado, ou None se ausente ou expirado"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            
+            if row is None:
+                self.misses += 1
+                return None
+            
+            result, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                self.evictions += 1
+                return None
+            
+            self._conn.execute("UPDATE analysis_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        
+        return json.loads(result)
+    
+    def set(self, key: str, document_type: str, result: Dict[str, Any]) -> None:
+        """Armazena um resultado e remove as entradas menos usadas acima do limite"""
+        now = time.time()
+        payload = json.dumps(result, ensure_ascii=False, default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, document_type, result, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, document_type, payload, now, now)
+            )
+            
+            (total,) = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()
+            excess = total - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM analysis_cache WHERE key IN "
+                    "(SELECT key FROM analysis_cache ORDER BY last_access ASC LIMIT ?)",
+                    (excess,)
+                )
+                self.evictions += excess
+            self._conn.commit()
+    
+    def clear(self) -> None:
+        """Remove todas as entradas do cache"""
+        with self._lock:
+            self._conn.execute("DELETE FROM analysis_cache")
+            self._conn.commit()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de acertos/faltas e ocupação do cache"""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "max_entries": self.max_entries
+        }
@@ -3,11 +3,30 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
+import logging
 import time
 import random
-import requests
 import json
 from document_analyzer import RealDocumentAnalyzer, create_document_upload_interface
+from berth_conflicts import BerthConflictIndex, descrever_conflitos
+from berth_scheduler import BerthScheduler, STATUS_BERCO_LIVRE, tempo_operacao
+from config import (API_SIMULADA, ASSISTANT_CONFIG, BERTH_CONFIG, METRICS_CONFIG, N8N_CONFIG, REALTIME_CONFIG,
+                    SYSTEM_CONFIG)
+from connections import get_connection_manager
+from event_bus import EVENTO_NAVIO_ATUALIZADO, EVENTO_NAVIO_POSICAO, bus
+from fanout import executar_concorrente, percentil
+from health_prober import (NOMES_SERVICOS, STATUS_DEGRADADO, STATUS_OFFLINE, STATUS_ONLINE, STATUS_SIMULADO,
+                           get_health_prober)
+from http_client import get_amigu_client
+from local_event_source import LocalEventSource, posicao_estimada
+from local_store import LocalStore
+from metrics import metrics, start_exporters
+from resilience import (CIRCUITO_ABERTO, CIRCUITO_FECHADO, CIRCUITO_MEIO_ABERTO, get_resilient_call,
+                        payload_key)
+from sync_worker import IncrementalSyncer
+from vessel_repository import VesselRepository
+
+logger = logging.getLogger(__name__)
 
 # Configuração da página
 st.set_page_config(
@@ -17,47 +36,35 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Configuração do n8n webhook para integração com assistente AI
-N8N_CONFIG = {
-    "webhook_url": "https://n8n.hackathon.souamigu.org.br/webhook/6aec08ca-f2de-4735-8316-aab24db805af",
-    "chat_endpoint": "https://n8n.hackathon.souamigu.org.br/chat/288d383c-5e9c-4354-9dfa-9258f72def9f"
-}
+# Início do rerun, para medir o tempo de renderização da página
+inicio_rerun = time.perf_counter()
 
-# Configuração das APIs do Instituto AmiGU
-API_CONFIG = {
-    "capitania": {
-        "base_url": "https://api.hackathon.souamigu.org.br/capitania-portos",
-        "endpoints": {
-            "autorizacoes": "/autorizacoes",
-            "inspections": "/inspections",
-            "ocorrencias": "/ocorrencias"
-        }
-    },
-    "terminal": {
-        "base_url": "https://api.hackathon.souamigu.org.br/terminal-portuario", 
-        "endpoints": {
-            "operacoes": "/operacoes",
-            "atracacao": "/atracacao",
-            "movimentacao": "/movimentacao"
-        }
-    },
-    "agencia": {
-        "base_url": "https://api.hackathon.souamigu.org.br/agencia-maritima",
-        "endpoints": {
-            "escalas": "/escalas",
-            "prepostos": "/prepostos",
-            "solicitacoes": "/solicitacoes"
+# Exportação das métricas para o Prometheus (uma vez por processo)
+start_exporters()
+
+# Função para integração com assistente AI do n8n
+class AssistenteHTTPError(Exception):
+    """Resposta não-200 do webhook do n8n"""
+
+
+def resposta_contingencia_assistente(erro):
+    """Resposta quando o n8n não respondeu (ou o circuito está aberto)"""
+    if isinstance(erro, AssistenteHTTPError):
+        return {
+            "success": False,
+            "error": str(erro)
         }
+    # Simulação de resposta do assistente AI para demonstração
+    return {
+        "validacao_documentos": "Documentos validados com sucesso. DUE e Manifesto estão completos.",
+        "conflitos_horarios": "Nenhum conflito detectado nos horários programados.",
+        "mensagem_capitania": "Autorização aprovada. Navio pode prosseguir com atracação conforme programado.",
+        "mensagem_terminal": "Berço 3 disponível. Operação de carga pode iniciar às 14:00h.",
+        "mensagem_agente": "Documentação completa. Preposto autorizado para acompanhar operação.",
+        "acao_recomendada": "Proceder com atracação. Monitorar condições climáticas."
     }
-}
 
-# Headers para autenticação API
-API_HEADERS = {
-    "Authorization": "ApiKey YOUR_API_KEY_HERE",
-    "Content-Type": "application/json"
-}
 
-# Função para integração com assistente AI do n8n
 def consultar_assistente_ai(dados_operacao):
     """Integra com o assistente AI do n8n para validação e coordenação"""
     payload = {
@@ -66,34 +73,25 @@ def consultar_assistente_ai(dados_operacao):
         "atualizacoes": dados_operacao.get('atualizacoes', [])
     }
     
-    try:
-        response = requests.post(
-            N8N_CONFIG["webhook_url"],
-            headers={"Content-Type": "application/json"},
-            json=payload,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
+    def chamar_n8n():
+        try:
+            with metrics.span("chamada_externa_segundos", servico="assistente_ai"):
+                response = get_connection_manager().n8n.request("POST", N8N_CONFIG["webhook_url"], json=payload)
+            if response.status_code != 200:
+                raise AssistenteHTTPError(f"Erro HTTP {response.status_code}")
             return response.json()
-        else:
-            return {
-                "success": False,
-                "error": f"Erro HTTP {response.status_code}"
-            }
-    except Exception as e:
-        # Simulação de resposta do assistente AI para demonstração
-        return {
-            "validacao_documentos": "Documentos validados com sucesso. DUE e Manifesto estão completos.",
-            "conflitos_horarios": "Nenhum conflito detectado nos horários programados.",
-            "mensagem_capitania": "Autorização aprovada. Navio pode prosseguir com atracação conforme programado.",
-            "mensagem_terminal": "Berço 3 disponível. Operação de carga pode iniciar às 14:00h.",
-            "mensagem_agente": "Documentação completa. Preposto autorizado para acompanhar operação.",
-            "acao_recomendada": "Proceder com atracação. Monitorar condições climáticas."
-        }
+        except Exception:
+            metrics.inc("chamada_externa_falhas_total", servico="assistente_ai")
+            raise
+    
+    assistente = get_resilient_call("assistente_ai", ASSISTANT_CONFIG)
+    return assistente.call(payload_key(payload), chamar_n8n, resposta_contingencia_assistente)
 
 def processar_dados_inteligente(navio_data):
     """Processa dados do navio usando IA para otimização"""
+    conflitos = indexar_conflitos(navios_repo, navios_repo.versao).verificar_navio(navio_data)
+    conflitos_texto = descrever_conflitos(conflitos)
+    
     dados_para_ai = {
         "documentos": {
             "due": navio_data.get('documentos') == 'Completos',
@@ -104,7 +102,9 @@ def processar_dados_inteligente(navio_data):
         "horarios": {
             "eta": navio_data.get('eta').isoformat() if navio_data.get('eta') else None,
             "berco_solicitado": navio_data.get('berco'),
-            "tipo_operacao": navio_data.get('tipo_operacao', 'Atracação')
+            "tipo_operacao": navio_data.get('tipo_operacao', 'Atracação'),
+            # Conflitos calculados localmente: o assistente não precisa deduzi-los
+            "conflitos": conflitos_texto
         },
         "atualizacoes": [
             f"Navio {navio_data.get('nome')} solicitou entrada",
@@ -113,7 +113,9 @@ def processar_dados_inteligente(navio_data):
         ]
     }
     
-    return consultar_assistente_ai(dados_para_ai)
+    resposta = dict(consultar_assistente_ai(dados_para_ai))
+    resposta['conflitos_horarios'] = conflitos_texto
+    return resposta
 
 # CSS customizado
 st.markdown("""
@@ -166,9 +168,17 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Inicialização do estado da sessão
-if 'navios' not in st.session_state:
-    st.session_state.navios = [
+# Repositório persistente de navios, compartilhado entre sessões e reruns
+@st.cache_resource
+def obter_repositorio_navios():
+    """Repositório SQLite de navios (um por processo)"""
+    return VesselRepository()
+
+navios_repo = obter_repositorio_navios()
+
+# Dados de demonstração na primeira execução
+if navios_repo.vazio():
+    NAVIOS_DEMONSTRACAO = [
         {
             'navio_id': 'NV001',
             'nome': 'MSC Daniela',
@@ -218,7 +228,10 @@ if 'navios' not in st.session_state:
             'escala_id': 'ESC003'
         }
     ]
+    for navio in NAVIOS_DEMONSTRACAO:
+        navios_repo.salvar(navio)
 
+# Inicialização do estado da sessão
 if 'notificacoes' not in st.session_state:
     st.session_state.notificacoes = []
 
@@ -227,15 +240,15 @@ if 'ai_responses' not in st.session_state:
 
 # Funções de integração com as APIs
 def verificar_status_apis():
-    """Simula verificação do status das APIs do Instituto AmiGU"""
-    return {
-        "Capitania dos Portos": "online",
-        "Terminal Portuário": "online", 
-        "Agência Marítima": "online"
-    }
+    """Último retrato da verificação em segundo plano (não espera pela rede)"""
+    status = get_health_prober().snapshot()
+    if API_SIMULADA:
+        for nome in NOMES_SERVICOS.values():
+            status[nome] = {"status": STATUS_SIMULADO, "p95_ms": None, "taxa_erro": None}
+    return status
 
 def enviar_solicitacao_capitania(dados_navio):
-    """Simula envio de solicitação para a API da Capitania"""
+    """Envia solicitação para a API da Capitania (simulada sem API configurada)"""
     payload = {
         "autorizacao_id": dados_navio.get('autorizacao_id'),
         "data_aprovacao": dados_navio.get('data_aprovacao'),
@@ -244,15 +257,7 @@ def enviar_solicitacao_capitania(dados_navio):
         "navio_id": dados_navio.get('navio_id')
     }
     
-    # Simulação de chamada API
-    try:
-        # response = requests.post(
-        #     f"{API_CONFIG['capitania']['base_url']}{API_CONFIG['capitania']['endpoints']['autorizacoes']}",
-        #     headers=API_HEADERS,
-        #     json=payload
-        # )
-        # return response.json()
-        
+    if API_SIMULADA:
         # Simulação de resposta
         return {
             "success": True,
@@ -260,27 +265,48 @@ def enviar_solicitacao_capitania(dados_navio):
             "status": "processando",
             "message": "Solicitação recebida pela Capitania dos Portos"
         }
+    
+    try:
+        with metrics.span("chamada_externa_segundos", servico="capitania"):
+            resposta = get_amigu_client().post("capitania", "autorizacoes", payload)
+        resposta.setdefault("success", True)
+        resposta.setdefault("autorizacao_id", payload["autorizacao_id"])
+        resposta.setdefault("message", "Solicitação recebida pela Capitania dos Portos")
+        return resposta
     except Exception as e:
+        metrics.inc("chamada_externa_falhas_total", servico="capitania")
         return {"success": False, "error": str(e)}
 
 def sincronizar_terminal(dados_operacao):
-    """Simula sincronização com a API do Terminal"""
+    """Sincroniza operação com a API do Terminal (simulada sem API configurada)"""
     payload = {
         "operacao_id": dados_operacao.get('operacao_id'),
         "inicio_operacao": dados_operacao.get('inicio_operacao'),
         "navio_id": dados_operacao.get('navio_id')
     }
     
-    # Simulação de resposta
-    return {
-        "success": True,
-        "operacao_id": payload["operacao_id"],
-        "status": "sincronizado",
-        "berco_atribuido": dados_operacao.get('berco', 'Berço 1')
-    }
+    if API_SIMULADA:
+        # Simulação de resposta
+        return {
+            "success": True,
+            "operacao_id": payload["operacao_id"],
+            "status": "sincronizado",
+            "berco_atribuido": dados_operacao.get('berco', 'Berço 1')
+        }
+    
+    try:
+        with metrics.span("chamada_externa_segundos", servico="terminal"):
+            resposta = get_amigu_client().post("terminal", "operacoes", payload)
+        resposta.setdefault("success", True)
+        resposta.setdefault("operacao_id", payload["operacao_id"])
+        resposta.setdefault("berco_atribuido", dados_operacao.get('berco', 'Berço 1'))
+        return resposta
+    except Exception as e:
+        metrics.inc("chamada_externa_falhas_total", servico="terminal")
+        return {"success": False, "error": str(e)}
 
 def registrar_escala_agencia(dados_escala):
-    """Simula registro de escala na API da Agência"""
+    """Registra escala na API da Agência (simulada sem API configurada)"""
     payload = {
         "escala_id": dados_escala.get('escala_id'),
         "status": dados_escala.get('status'),
@@ -288,13 +314,100 @@ def registrar_escala_agencia(dados_escala):
         "agencia": dados_escala.get('agente')
     }
     
-    # Simulação de resposta
-    return {
-        "success": True,
-        "escala_id": payload["escala_id"],
-        "status": "registrada",
-        "preposto_responsavel": "João Silva"
-    }
+    if API_SIMULADA:
+        # Simulação de resposta
+        return {
+            "success": True,
+            "escala_id": payload["escala_id"],
+            "status": "registrada",
+            "preposto_responsavel": "João Silva"
+        }
+    
+    try:
+        with metrics.span("chamada_externa_segundos", servico="agencia"):
+            resposta = get_amigu_client().post("agencia", "escalas", payload)
+        resposta.setdefault("success", True)
+        resposta.setdefault("escala_id", payload["escala_id"])
+        return resposta
+    except Exception as e:
+        metrics.inc("chamada_externa_falhas_total", servico="agencia")
+        return {"success": False, "error": str(e)}
+
+# Campos de cada recurso sincronizado que atualizam o registro do navio
+CAMPOS_SINCRONIZADOS = {
+    "autorizacoes": {"autorizacao_id": "autorizacao_id", "status": "status",
+                     "data_aprovacao": "data_aprovacao", "tipo_operacao": "tipo_operacao"},
+    "operacoes": {"operacao_id": "operacao_id", "inicio_operacao": "inicio_operacao"},
+    "atracacao": {"berco": "berco"},
+    "escalas": {"escala_id": "escala_id", "nome": "nome", "tipo_carga": "tipo_carga",
+                "eta": "eta", "agencia": "agente"}
+}
+
+STATUS_API = {
+    "aprovado": "Aprovado",
+    "pendente": "Pendente",
+    "recusado": "Recusado",
+    "em análise": "Em Análise",
+    "em_analise": "Em Análise"
+}
+
+@st.cache_resource
+def iniciar_sincronizacao():
+    """Store local e sincronizador em segundo plano, compartilhados entre sessões e reruns"""
+    store = LocalStore()
+    syncer = IncrementalSyncer(store)
+    if not API_SIMULADA:
+        syncer.start()
+    return store, syncer
+
+def mesclar_registro_sincronizado(recurso, dados):
+    """Aplica um registro sincronizado ao navio correspondente (ou cria o navio a partir da escala)"""
+    if not dados.get('navio_id'):
+        return
+    navio = navios_repo.obter(dados['navio_id'])
+    
+    if navio is None:
+        if recurso != "escalas" or not dados.get('nome'):
+            return
+        navio = {
+            'navio_id': dados['navio_id'], 'nome': dados['nome'], 'tipo_carga': 'Carga Geral',
+            'eta': datetime.now(), 'status': 'Pendente', 'berco': 'Aguardando',
+            'documentos': 'Aguardando Upload', 'agente': '', 'autorizacao_id': None,
+            'data_aprovacao': None, 'tipo_operacao': 'Atracação', 'operacao_id': None,
+            'inicio_operacao': None, 'escala_id': None
+        }
+    
+    for campo_api, campo_navio in CAMPOS_SINCRONIZADOS[recurso].items():
+        if dados.get(campo_api) is None:
+            continue
+        valor = dados[campo_api]
+        if campo_navio == 'status':
+            valor = STATUS_API.get(str(valor).lower())
+            if valor is None:
+                continue
+        elif campo_navio == 'eta' and isinstance(valor, str):
+            valor = datetime.fromisoformat(valor)
+            if valor.tzinfo is not None:
+                # Horário local do porto, como as demais ETAs do repositório
+                valor = valor.astimezone().replace(tzinfo=None)
+        navio[campo_navio] = valor
+    
+    navios_repo.salvar(navio)
+
+def aplicar_atualizacoes_sincronizadas(store):
+    """Aplica ao repositório apenas o que mudou no store desde a última aplicação"""
+    versao_aplicada = int(navios_repo.obter_metadado('sync_versao', '0'))
+    registros = store.registros_desde(versao_aplicada)
+    for recurso, dados, versao in registros:
+        try:
+            mesclar_registro_sincronizado(recurso, dados)
+        except (ValueError, TypeError, KeyError) as e:
+            # Registro malformado é descartado: não pode travar a aplicação dos seguintes
+            logger.warning("Registro sincronizado ignorado (%s, versão %s): %s", recurso, versao, e)
+            metrics.inc("sincronizacao_registros_invalidos_total", recurso=recurso)
+        versao_aplicada = versao
+    if registros:
+        navios_repo.definir_metadado('sync_versao', str(versao_aplicada))
 
 # Função para adicionar notificações
 def adicionar_notificacao(mensagem, tipo="info"):
@@ -314,7 +427,12 @@ st.sidebar.markdown("---")
 
 # Status do assistente AI na sidebar
 st.sidebar.subheader("🤖 Assistente AI")
-ai_status = "🟢 Online" if True else "🔴 Offline"
+circuito_assistente = get_resilient_call("assistente_ai", ASSISTANT_CONFIG).breaker
+ai_status = {
+    CIRCUITO_FECHADO: "🟢 Online",
+    CIRCUITO_MEIO_ABERTO: "🟡 Testando reconexão",
+    CIRCUITO_ABERTO: f"🔴 Offline (contingência, novo teste em {circuito_assistente.retry_in():.0f}s)"
+}[circuito_assistente.state]
 st.sidebar.markdown(f"**Status:** {ai_status}")
 st.sidebar.markdown("**Modelo:** GPT-4.1-mini")
 st.sidebar.markdown("---")
@@ -323,17 +441,39 @@ st.sidebar.markdown("---")
 st.sidebar.subheader("📡 Status das APIs")
 status_apis = verificar_status_apis()
 
-for api, status in status_apis.items():
-    status_class = "api-online" if status == "online" else "api-offline"
-    status_icon = "🟢" if status == "online" else "🔴"
+icones_status = {STATUS_ONLINE: "🟢", STATUS_DEGRADADO: "🟡", STATUS_OFFLINE: "🔴"}
+for api, saude in status_apis.items():
+    status = saude["status"]
+    status_class = "api-online" if status in (STATUS_ONLINE, STATUS_SIMULADO) else "api-offline"
+    status_icon = icones_status.get(status, "⚪")
+    detalhe = ""
+    if saude["p95_ms"] is not None:
+        detalhe = f" · p95 {saude['p95_ms']:.0f} ms · erros {saude['taxa_erro']:.0%}"
+    elif saude["taxa_erro"]:
+        detalhe = f" · erros {saude['taxa_erro']:.0%}"
     st.sidebar.markdown(f"""
     <div class="{status_class}">
-        {status_icon} {api}: {status.upper()}
+        {status_icon} {api}: {status.upper()}{detalhe}
     </div>
     """, unsafe_allow_html=True)
 
 st.sidebar.markdown("---")
 
+# Dados sincronizados em segundo plano (leitura local, sem esperar pela rede)
+sync_store, sync_worker = iniciar_sincronizacao()
+aplicar_atualizacoes_sincronizadas(sync_store)
+
+ultima_sync = sync_store.ultima_sincronizacao()
+if API_SIMULADA:
+    st.sidebar.caption("🔄 Sincronização: modo simulado")
+elif ultima_sync:
+    st.sidebar.caption(f"🔄 Última sincronização: há {int(time.time() - ultima_sync)}s")
+# Cópia: a thread de sincronização altera o dicionário enquanto a página renderiza
+for recurso, erro in dict(sync_worker.erros).items():
+    st.sidebar.caption(f"⚠️ {recurso}: {erro[:80]}")
+
+st.sidebar.markdown("---")
+
 menu_opcoes = [
     "📋 Visão Geral",
     "🛳️ Solicitação de Entrada", 
@@ -341,53 +481,236 @@ menu_opcoes = [
     "🔄 Sincronização Terminal",
     "📊 Acompanhamento Tempo Real",
     "🚪 Saída do Navio",
-    "🤖 Assistente AI"
+    "🤖 Assistente AI",
+    "⚡ Desempenho"
 ]
 
 opcao_selecionada = st.sidebar.selectbox("Selecione uma etapa:", menu_opcoes)
 
-# Função para gerar dados dos berços
-def gerar_dados_bercos():
-    bercos = ['Berço 1', 'Berço 2', 'Berço 3', 'Berço 4', 'Berço 5']
-    status = ['Ocupado', 'Livre', 'Manutenção', 'Reservado']
+# Figuras memoizadas entre reruns: a chave é a versão dos dados, não o conteúdo
+@st.cache_data(max_entries=8)
+def carregar_df_navios(_repo, versao):
+    """DataFrame dos navios para a versão informada do repositório"""
+    df_navios = pd.DataFrame(_repo.listar())
+    if not df_navios.empty:
+        df_navios['eta_fim'] = df_navios['eta'] + df_navios['tipo_carga'].map(tempo_operacao)
+    return df_navios
+
+@st.cache_resource(max_entries=8)
+def construir_figura_timeline(_repo, versao):
+    """Cronograma de atracação para a versão informada do repositório"""
+    df_navios = carregar_df_navios(_repo, versao)
+    if df_navios.empty:
+        return go.Figure().update_layout(height=400, title="Cronograma de Atracação")
+    
+    fig = px.timeline(
+        df_navios,
+        x_start='eta',
+        x_end='eta_fim',
+        y='nome',
+        color='status',
+        title="Cronograma de Atracação",
+        color_discrete_map={
+            'Aprovado': '#28a745',
+            'Pendente': '#ffc107',
+            'Em Análise': '#17a2b8'
+        }
+    )
+    fig.update_layout(height=400)
+    return fig
+
+@st.cache_resource(max_entries=8)
+def construir_figura_ocupacao(bercos, ocupacao):
+    """Gráfico de ocupação dos berços"""
+    return px.bar(
+        {'Berço': list(bercos), 'Ocupação (%)': list(ocupacao)},
+        x='Berço',
+        y='Ocupação (%)',
+        title="Taxa de Ocupação dos Berços",
+        color='Ocupação (%)',
+        color_continuous_scale='RdYlGn_r'
+    )
+
+@st.cache_resource(max_entries=8)
+def construir_figura_mapa(navios_coords):
+    """Mapa dos navios a partir de tuplas (nome, lat, lon, status)"""
+    fig = go.Figure()
     
-    dados = []
-    for berco in bercos:
-        dados.append({
-            'Berço': berco,
-            'Status': random.choice(status),
-            'Navio Atual': random.choice(['MSC Daniela', 'Ever Given', '-', 'Maersk Lima', '-']),
-            'Próximo Horário': (datetime.now() + timedelta(hours=random.randint(1, 8))).strftime("%H:%M")
-        })
+    for nome, lat, lon, status in navios_coords:
+        fig.add_trace(go.Scattermapbox(
+            lat=[lat],
+            lon=[lon],
+            mode='markers',
+            marker=dict(size=15),
+            text=f"{nome}<br>{status}",
+            name=nome
+        ))
     
-    return pd.DataFrame(dados)
+    fig.update_layout(
+        mapbox=dict(
+            style="open-street-map",
+            center=dict(lat=-23.95, lon=-46.25),
+            zoom=10
+        ),
+        height=400,
+        margin=dict(l=0, r=0, t=0, b=0)
+    )
+    return fig
+
+@st.cache_resource
+def iniciar_fonte_eventos():
+    """Fonte local de eventos (modo simulado), compartilhada entre sessões e reruns"""
+    if not REALTIME_CONFIG["fonte_local"]:
+        return None
+    fonte = LocalEventSource(navios_repo)
+    fonte.start()
+    return fonte
+
+def aplicar_eventos(estado, aplicar, recarregar):
+    """Aplica ao estado da sessão só os eventos novos do barramento (ou recarrega tudo se ficou para trás)"""
+    eventos, versao = bus.eventos_desde(estado["cursor"])
+    if eventos is None:
+        recarregar()
+        alterados = None
+    else:
+        alterados = {evento["chave"] for evento in eventos if aplicar(evento)}
+    estado["cursor"] = versao
+    return alterados
+
+@st.fragment(run_every=REALTIME_CONFIG["intervalo_fragmento_s"])
+def mapa_navios_tempo_real():
+    """Mapa redesenhado apenas quando algum ponto muda de posição ou situação"""
+    with metrics.span("tempo_real_fragmento_segundos", fragmento="mapa"):
+        estado = st.session_state.setdefault("tempo_real_mapa", {"cursor": -1, "pontos": {}})
+        pontos = estado["pontos"]
+        fonte_eventos = iniciar_fonte_eventos()
+        
+        def recarregar():
+            pontos.clear()
+            for navio in navios_repo.listar(status=BERTH_CONFIG["status_planejados"]):
+                pontos[navio['navio_id']] = posicao_estimada(navio)
+        
+        def aplicar(evento):
+            if evento["tipo"] == EVENTO_NAVIO_POSICAO:
+                if evento["dados"] is None:
+                    pontos.pop(evento["chave"], None)
+                else:
+                    pontos[evento["chave"]] = evento["dados"]
+                return True
+            if evento["tipo"] == EVENTO_NAVIO_ATUALIZADO and fonte_eventos is None:
+                # Sem fonte local, a posição é estimada a partir dos dados do navio
+                navio = navios_repo.obter(evento["chave"])
+                if navio is None or navio['status'] not in BERTH_CONFIG["status_planejados"]:
+                    pontos.pop(evento["chave"], None)
+                else:
+                    pontos[evento["chave"]] = posicao_estimada(navio)
+                return True
+            return False
+        
+        aplicar_eventos(estado, aplicar, recarregar)
+        # Figura memoizada pelas coordenadas: sem mudanças, reaproveita a mesma figura
+        fig = construir_figura_mapa(tuple(sorted(pontos.values())))
+        st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment(run_every=REALTIME_CONFIG["intervalo_fragmento_s"])
+def cartoes_proximas_operacoes():
+    """Cartões dos navios; só os navios com eventos novos são relidos do repositório"""
+    with metrics.span("tempo_real_fragmento_segundos", fragmento="cartoes"):
+        estado = st.session_state.setdefault("tempo_real_cartoes", {"cursor": -1, "navios": {}, "html": {}})
+        navios = estado["navios"]
+        
+        def recarregar():
+            navios.clear()
+            estado["html"].clear()
+            navios.update((n['navio_id'], n) for n in navios_repo.listar())
+        
+        def aplicar(evento):
+            if evento["tipo"] != EVENTO_NAVIO_ATUALIZADO:
+                return False
+            navio = navios_repo.obter(evento["chave"])
+            if navio is None:
+                navios.pop(evento["chave"], None)
+            else:
+                navios[evento["chave"]] = navio
+            return True
+        
+        alterados = aplicar_eventos(estado, aplicar, recarregar)
+        agora = datetime.now()
+        
+        for navio in sorted(navios.values(), key=lambda n: n['eta'] or agora):
+            horas = int((navio['eta'] - agora).total_seconds() // 3600) if navio['eta'] else None
+            chave = (navio['nome'], navio['status'], horas)
+            cache = estado["html"].get(navio['navio_id'])
+            if cache is None or cache[0] != chave:
+                status_class = "status-approved" if navio['status'] == "Aprovado" else "status-pending"
+                cache = (chave, f"""
+                <div class="metric-card">
+                    <strong>{navio['nome']}</strong><br>
+                    <span class="{status_class}">{navio['status']}</span><br>
+                    <small>ETA: {horas}h restantes</small>
+                </div>
+                """)
+                estado["html"][navio['navio_id']] = cache
+            st.markdown(cache[1], unsafe_allow_html=True)
+        
+        if alterados:
+            st.caption(f"🔄 {len(alterados)} navio(s) atualizado(s) às {agora.strftime('%H:%M:%S')}")
+
+@st.cache_resource
+def obter_planejador_bercos():
+    """Plano de atracação compartilhado entre sessões e reruns"""
+    return BerthScheduler()
+
+@st.cache_resource(max_entries=1)
+def planejar_bercos(_repo, versao):
+    """Plano atualizado para a versão do repositório (replaneja só a partir dos navios alterados)"""
+    planejador = obter_planejador_bercos()
+    planejador.sincronizar(_repo.listar())
+    return planejador
+
+@st.cache_resource
+def obter_indice_conflitos():
+    """Índice de conflitos de berço compartilhado entre sessões e reruns"""
+    return BerthConflictIndex()
+
+@st.cache_resource(max_entries=1)
+def indexar_conflitos(_repo, versao):
+    """Índice atualizado para a versão do repositório (reindexa só os navios alterados)"""
+    indice = obter_indice_conflitos()
+    indice.sincronizar(_repo.listar())
+    return indice
+
+# Função para gerar dados dos berços
+def gerar_dados_bercos(planejador):
+    return pd.DataFrame(planejador.status_bercos())
 
 # PÁGINA PRINCIPAL - VISÃO GERAL
 if opcao_selecionada == "📋 Visão Geral":
     st.title("🚢 Dashboard Portuário - Visão Geral")
     
     # Cards informativos
+    contagem_status = navios_repo.contar_por_status()
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         st.metric(
             label="Navios Aguardando",
-            value=len([n for n in st.session_state.navios if n['status'] in ['Pendente', 'Em Análise']]),
+            value=contagem_status.get('Pendente', 0) + contagem_status.get('Em Análise', 0),
             delta=1
         )
     
     with col2:
         st.metric(
             label="Navios Aprovados",
-            value=len([n for n in st.session_state.navios if n['status'] == 'Aprovado']),
+            value=contagem_status.get('Aprovado', 0),
             delta=2
         )
     
     with col3:
+        status_bercos = planejar_bercos(navios_repo, navios_repo.versao).status_bercos()
         st.metric(
             label="Berços Disponíveis",
-            value=3,
-            delta=-1
+            value=sum(1 for b in status_bercos if b['Status'] == STATUS_BERCO_LIVRE)
         )
     
     with col4:
@@ -405,25 +728,16 @@ if opcao_selecionada == "📋 Visão Geral":
     with col1:
         st.subheader("📅 Timeline de Chegadas")
         
-        # Criar gráfico de timeline
-        df_navios = pd.DataFrame(st.session_state.navios)
-        df_navios['eta_str'] = df_navios['eta'].dt.strftime("%H:%M")
-        
-        fig = px.timeline(
-            df_navios,
-            x_start='eta',
-            x_end=[eta + timedelta(hours=4) for eta in df_navios['eta']],
-            y='nome',
-            color='status',
-            title="Cronograma de Atracação",
-            color_discrete_map={
-                'Aprovado': '#28a745',
-                'Pendente': '#ffc107',
-                'Em Análise': '#17a2b8'
-            }
-        )
-        fig.update_layout(height=400)
+        # Gráfico de timeline (reconstruído apenas quando os navios mudam)
+        fig = construir_figura_timeline(navios_repo, navios_repo.versao)
         st.plotly_chart(fig, use_container_width=True)
+        
+        pares_conflito = indexar_conflitos(navios_repo, navios_repo.versao).todos_os_conflitos()
+        if pares_conflito:
+            nomes = {n['navio_id']: n['nome'] for n in navios_repo.listar()}
+            st.warning("⚠️ Conflitos de berço: " + "; ".join(
+                f"{nomes.get(a, a)} × {nomes.get(b, b)}" for a, b in pares_conflito
+            ))
     
     with col2:
         st.subheader("🔔 Notificações Recentes")
@@ -490,17 +804,26 @@ elif opcao_selecionada == "🛳️ Solicitação de Entrada":
                     'berco': berco_preferido,
                     'documentos': 'Aguardando Upload',
                     'agente': agente_maritimo,
-                    'autorizacao_id': f'AUTH{len(st.session_state.navios)+1:03d}',
+                    'autorizacao_id': navios_repo.proximo_id('AUTH'),
                     'data_aprovacao': None,
                     'tipo_operacao': 'Atracação',
-                    'operacao_id': f'OP{len(st.session_state.navios)+1:03d}',
+                    'operacao_id': navios_repo.proximo_id('OP'),
                     'inicio_operacao': None,
                     'escala_id': escala_id
                 }
                 
-                st.session_state.navios.append(novo_navio)
-                st.success("✅ Solicitação registrada! Use o sistema de upload acima para enviar os documentos.")
-                adicionar_notificacao(f"Nova solicitação manual: {nome_navio} - ID: {navio_id}")
+                conflitos = indexar_conflitos(navios_repo, navios_repo.versao).verificar_navio(novo_navio)
+                if navios_repo.inserir(novo_navio):
+                    st.success("✅ Solicitação registrada! Use o sistema de upload acima para enviar os documentos.")
+                    adicionar_notificacao(f"Nova solicitação manual: {nome_navio} - ID: {navio_id}")
+                    if conflitos:
+                        st.warning(f"⚠️ {descrever_conflitos(conflitos)}")
+                        sugestao = planejar_bercos(navios_repo, navios_repo.versao).atribuicao(navio_id)
+                        if sugestao and sugestao['berco']:
+                            st.info(f"🎯 Sugestão do plano de atracação: {sugestao['berco']} às "
+                                    f"{sugestao['inicio'].strftime('%d/%m %H:%M')}")
+                else:
+                    st.error(f"❌ Já existe um navio com o ID {navio_id}")
 
 # COORDENAÇÃO COM CAPITANIA
 elif opcao_selecionada == "⚓ Coordenação com Capitania":
@@ -509,7 +832,7 @@ elif opcao_selecionada == "⚓ Coordenação com Capitania":
     
     st.subheader("Solicitações Pendentes de Análise")
     
-    for i, navio in enumerate(st.session_state.navios):
+    for navio in navios_repo.listar():
         with st.expander(f"🚢 {navio['nome']} - Status: {navio['status']} - ID: {navio['navio_id']}"):
             col1, col2, col3 = st.columns(3)
             
@@ -529,11 +852,11 @@ elif opcao_selecionada == "⚓ Coordenação com Capitania":
                 novo_status = st.selectbox(
                     "Decisão da Capitania:",
                     ["Aprovado", "Pendente", "Recusado", "Em Análise"],
-                    key=f"status_{i}",
+                    key=f"status_{navio['navio_id']}",
                     index=["Aprovado", "Pendente", "Recusado", "Em Análise"].index(navio['status'])
                 )
                 
-                if st.button(f"📡 Enviar para API Capitania", key=f"btn_{i}"):
+                if st.button(f"📡 Enviar para API Capitania", key=f"btn_{navio['navio_id']}"):
                     dados_capitania = {
                         'autorizacao_id': navio['autorizacao_id'],
                         'data_aprovacao': datetime.now().strftime('%Y-%m-%d') if novo_status == 'Aprovado' else None,
@@ -545,9 +868,11 @@ elif opcao_selecionada == "⚓ Coordenação com Capitania":
                     resultado = enviar_solicitacao_capitania(dados_capitania)
                     
                     if resultado['success']:
-                        st.session_state.navios[i]['status'] = novo_status
                         if novo_status == 'Aprovado':
-                            st.session_state.navios[i]['data_aprovacao'] = datetime.now().strftime('%Y-%m-%d')
+                            navios_repo.atualizar(navio['navio_id'], status=novo_status,
+                                                  data_aprovacao=datetime.now().strftime('%Y-%m-%d'))
+                        else:
+                            navios_repo.atualizar(navio['navio_id'], status=novo_status)
                         
                         st.success(f"✅ {resultado['message']}")
                         adicionar_notificacao(f"Capitania: {navio['nome']} - {novo_status}")
@@ -564,7 +889,8 @@ elif opcao_selecionada == "🔄 Sincronização Terminal":
     
     with col1:
         st.subheader("📊 Status dos Berços")
-        df_bercos = gerar_dados_bercos()
+        planejador = planejar_bercos(navios_repo, navios_repo.versao)
+        df_bercos = gerar_dados_bercos(planejador)
         
         # Colorir status dos berços
         def colorir_status(val):
@@ -586,105 +912,82 @@ elif opcao_selecionada == "🔄 Sincronização Terminal":
         st.subheader("⚡ Sincronização com APIs")
         
         if st.button("📡 Sincronizar com Terminal API"):
-            with st.spinner("Sincronizando com Instituto AmiGU..."):
-                time.sleep(2)
-                
-                navios_aprovados = [n for n in st.session_state.navios if n['status'] == 'Aprovado']
-                
-                for navio in navios_aprovados:
-                    dados_operacao = {
-                        'operacao_id': navio['operacao_id'],
-                        'inicio_operacao': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                        'navio_id': navio['navio_id'],
-                        'berco': navio['berco']
-                    }
-                    
-                    resultado = sincronizar_terminal(dados_operacao)
-                    
-                    if resultado['success']:
-                        st.success(f"✅ {navio['nome']}: Operação {resultado['operacao_id']} sincronizada")
-                        st.info(f"🚢 Berço atribuído: {resultado['berco_atribuido']}")
+            navios_aprovados = navios_repo.listar(status='Aprovado')
+            inicio_operacao = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            
+            def sincronizar_navio(navio):
+                atribuicao = planejador.atribuicao(navio['navio_id'])
+                return sincronizar_terminal({
+                    'operacao_id': navio['operacao_id'],
+                    'inicio_operacao': inicio_operacao,
+                    'navio_id': navio['navio_id'],
+                    'berco': atribuicao['berco'] if atribuicao and atribuicao['berco'] else navio['berco']
+                })
+            
+            progresso = st.progress(0.0, text="Sincronizando com Instituto AmiGU...")
+            latencias = []
+            inicio = time.perf_counter()
+            
+            # Um envio por navio, em paralelo; cada resultado aparece assim que chega
+            for navio, resultado, latencia in executar_concorrente(
+                sincronizar_navio, navios_aprovados, SYSTEM_CONFIG['max_concurrent_api_calls']
+            ):
+                latencias.append(latencia)
+                progresso.progress(len(latencias) / len(navios_aprovados),
+                                   text=f"{len(latencias)}/{len(navios_aprovados)} navios sincronizados")
                 
-                adicionar_notificacao("Terminal sincronizado com Instituto AmiGU")
+                if resultado['success']:
+                    st.success(f"✅ {navio['nome']}: Operação {resultado['operacao_id']} sincronizada")
+                    st.info(f"🚢 Berço atribuído: {resultado['berco_atribuido']}")
+                else:
+                    st.error(f"❌ {navio['nome']}: {resultado.get('error', 'Erro desconhecido')}")
+            
+            tempo_total = time.perf_counter() - inicio
+            progresso.empty()
+            st.caption(f"⏱️ {len(latencias)} navios em {tempo_total:.2f}s | "
+                       f"p95 por navio: {percentil(latencias, 95) * 1000:.0f} ms")
+            
+            adicionar_notificacao("Terminal sincronizado com Instituto AmiGU")
         
         st.subheader("🎯 Otimização de Berços")
         
-        ocupacao_data = {
-            'Berço': ['Berço 1', 'Berço 2', 'Berço 3', 'Berço 4', 'Berço 5'],
-            'Ocupação (%)': [85, 60, 90, 45, 70]
-        }
-        
-        fig = px.bar(
-            ocupacao_data,
-            x='Berço',
-            y='Ocupação (%)',
-            title="Taxa de Ocupação dos Berços",
-            color='Ocupação (%)',
-            color_continuous_scale='RdYlGn_r'
-        )
+        ocupacao = planejador.ocupacao()
+        fig = construir_figura_ocupacao(tuple(ocupacao), tuple(ocupacao.values()))
         st.plotly_chart(fig, use_container_width=True)
+        
+        plano = [a for a in planejador.atribuicoes() if a['fim'] is None or a['fim'] > datetime.now()]
+        if plano:
+            st.dataframe(
+                pd.DataFrame([{
+                    'Navio': a['nome'],
+                    'Berço': a['berco'] or 'Sem berço compatível',
+                    'Atracação': a['inicio'].strftime('%d/%m %H:%M') if a['inicio'] else '-',
+                    'Liberação': a['fim'].strftime('%d/%m %H:%M') if a['fim'] else '-',
+                    'Espera (h)': round(a['espera_h'], 1) if a['espera_h'] is not None else None
+                } for a in plano]),
+                use_container_width=True, hide_index=True
+            )
+        st.caption(f"Ocupação nas próximas {BERTH_CONFIG['horizonte_ocupacao_horas']}h pelo plano de "
+                   f"atracação (ETA, tipo de carga e tempo de operação de cada navio)")
 
 # ACOMPANHAMENTO EM TEMPO REAL
 elif opcao_selecionada == "📊 Acompanhamento Tempo Real":
     st.title("📊 Acompanhamento em Tempo Real")
     
-    placeholder = st.empty()
+    iniciar_fonte_eventos()
     
-    with placeholder.container():
-        col1, col2 = st.columns([2, 1])
-        
-        with col1:
-            st.subheader("🚢 Navios em Operação")
-            
-            fig = go.Figure()
-            
-            navios_coords = [
-                {'nome': 'MSC Daniela', 'lat': -23.9, 'lon': -46.3, 'status': 'Atracado'},
-                {'nome': 'Ever Given', 'lat': -23.95, 'lon': -46.25, 'status': 'Aproximando'},
-                {'nome': 'Maersk Lima', 'lat': -24.0, 'lon': -46.2, 'status': 'Aguardando'}
-            ]
-            
-            for navio in navios_coords:
-                fig.add_trace(go.Scattermapbox(
-                    lat=[navio['lat']],
-                    lon=[navio['lon']],
-                    mode='markers',
-                    marker=dict(size=15),
-                    text=f"{navio['nome']}<br>{navio['status']}",
-                    name=navio['nome']
-                ))
-            
-            fig.update_layout(
-                mapbox=dict(
-                    style="open-street-map",
-                    center=dict(lat=-23.95, lon=-46.25),
-                    zoom=10
-                ),
-                height=400,
-                margin=dict(l=0, r=0, t=0, b=0)
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with col2:
-            st.subheader("⏰ Próximas Operações")
-            
-            for navio in st.session_state.navios:
-                tempo_restante = navio['eta'] - datetime.now()
-                horas = int(tempo_restante.total_seconds() // 3600)
-                
-                status_class = "status-approved" if navio['status'] == "Aprovado" else "status-pending"
-                
-                st.markdown(f"""
-                <div class="metric-card">
-                    <strong>{navio['nome']}</strong><br>
-                    <span class="{status_class}">{navio['status']}</span><br>
-                    <small>ETA: {horas}h restantes</small>
-                </div>
-                """, unsafe_allow_html=True)
+    col1, col2 = st.columns([2, 1])
     
-    if st.button("🔄 Atualizar Dados"):
-        st.rerun()
+    with col1:
+        st.subheader("🚢 Navios em Operação")
+        mapa_navios_tempo_real()
+    
+    with col2:
+        st.subheader("⏰ Próximas Operações")
+        cartoes_proximas_operacoes()
+    
+    st.caption(f"🔴 Ao vivo: navios e mapa atualizados a cada {REALTIME_CONFIG['intervalo_fragmento_s']}s "
+               f"a partir dos eventos de navios, sem recarregar a página")
 
 # SAÍDA DO NAVIO
 elif opcao_selecionada == "🚪 Saída do Navio":
@@ -692,7 +995,7 @@ elif opcao_selecionada == "🚪 Saída do Navio":
     
     st.subheader("Navios Prontos para Saída")
     
-    navios_saida = [n for n in st.session_state.navios if n['status'] == 'Aprovado']
+    navios_saida = navios_repo.listar(status='Aprovado')
     
     for navio in navios_saida:
         with st.expander(f"🚢 {navio['nome']} - Operação Concluída"):
@@ -729,15 +1032,15 @@ elif opcao_selecionada == "🤖 Assistente AI":
         # Seleção de navio para análise
         navio_selecionado = st.selectbox(
             "Selecione um navio para análise:",
-            options=[f"{n['nome']} ({n['navio_id']})" for n in st.session_state.navios],
+            options=[f"{n['nome']} ({n['navio_id']})" for n in navios_repo.listar()],
             key="navio_ai"
         )
         
         if st.button("🔍 Analisar com IA"):
             if navio_selecionado:
                 # Encontrar dados do navio selecionado
-                navio_nome = navio_selecionado.split(" (")[0]
-                navio_data = next((n for n in st.session_state.navios if n['nome'] == navio_nome), None)
+                navio_nome, navio_id = navio_selecionado[:-1].rsplit(" (", 1)
+                navio_data = navios_repo.obter(navio_id)
                 
                 if navio_data:
                     with st.spinner("🤖 Consultando assistente AI..."):
@@ -784,6 +1087,87 @@ elif opcao_selecionada == "🤖 Assistente AI":
                 time.sleep(2)
                 st.success("✅ Assistente AI conectado!")
 
+# PÁGINA DE DESEMPENHO
+elif opcao_selecionada == "⚡ Desempenho":
+    st.title("⚡ Desempenho")
+    
+    snapshot = metrics.snapshot()
+    series = pd.DataFrame(snapshot["histogramas"])
+    contadores = pd.DataFrame(snapshot["contadores"])
+    
+    def p95_ms(metrica):
+        linhas = [h for h in snapshot["histogramas"] if h["metrica"] == metrica and h["p95_s"] is not None]
+        if not linhas:
+            return "-"
+        return f"{max(h['p95_s'] for h in linhas) * 1000:.0f} ms"
+    
+    def total_contador(metrica):
+        return int(sum(c["valor"] for c in snapshot["contadores"] if c["metrica"] == metrica))
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Documentos Analisados", total_contador("analise_documentos_total"))
+    with col2:
+        st.metric("p95 Análise (pior tipo)", p95_ms("analise_documento_segundos"))
+    with col3:
+        st.metric("p95 Chamadas Externas", p95_ms("chamada_externa_segundos"))
+    with col4:
+        st.metric("Falhas Externas", total_contador("chamada_externa_falhas_total"))
+    
+    if series.empty:
+        st.info("Nenhuma medição ainda nesta instância. Analise um documento ou use as integrações.")
+    else:
+        series["rotulos"] = series["rotulos"].apply(lambda r: ", ".join(f"{k}={v}" for k, v in r.items()))
+        for coluna in ["media_s", "p50_s", "p95_s", "p99_s"]:
+            series[coluna.replace("_s", "_ms")] = (series[coluna] * 1000).round(1)
+        
+        etapas = series[series["metrica"] == "analise_etapa_segundos"]
+        if not etapas.empty:
+            st.subheader("📄 Etapas da Análise de Documentos")
+            fig_etapas = go.Figure([
+                go.Bar(name="p50", x=etapas["rotulos"], y=etapas["p50_ms"]),
+                go.Bar(name="p95", x=etapas["rotulos"], y=etapas["p95_ms"])
+            ])
+            fig_etapas.update_layout(barmode="group", height=350, yaxis_title="ms")
+            st.plotly_chart(fig_etapas, use_container_width=True)
+        
+        st.subheader("⏱️ Latências")
+        st.dataframe(
+            series[["metrica", "rotulos", "contagem", "media_ms", "p50_ms", "p95_ms", "p99_ms"]],
+            use_container_width=True, hide_index=True
+        )
+    
+    conexoes = get_connection_manager().stats()
+    if conexoes:
+        st.subheader("🔌 Conexões de Saída")
+        st.dataframe(
+            pd.DataFrame([{"host": host, **valores} for host, valores in conexoes.items()]),
+            use_container_width=True, hide_index=True
+        )
+        st.caption("Reuso = requisições atendidas por conexões keep-alive já abertas (OpenAI, n8n e APIs AmiGU)")
+    
+    if not contadores.empty:
+        st.subheader("🔢 Contadores")
+        contadores["rotulos"] = contadores["rotulos"].apply(lambda r: ", ".join(f"{k}={v}" for k, v in r.items()))
+        st.dataframe(contadores, use_container_width=True, hide_index=True)
+    
+    st.subheader("📤 Exportação Prometheus")
+    exportacao = metrics.to_prometheus()
+    st.download_button("⬇️ Baixar métricas (formato Prometheus)", exportacao,
+                       file_name="metrics.prom", mime="text/plain")
+    st.caption(f"Arquivo regravado a cada {METRICS_CONFIG['export_interval']}s em "
+               f"{METRICS_CONFIG['export_path']}"
+               + (f" · endpoint http://<host>:{METRICS_CONFIG['http_port']}/metrics"
+                  if METRICS_CONFIG["http_port"] else ""))
+    with st.expander("Ver exportação"):
+        st.code(exportacao, language="text")
+
 # Footer
+tempos_pagina = st.session_state.setdefault('tempos_rerun', {}).setdefault(opcao_selecionada, [])
+tempos_pagina.append((time.perf_counter() - inicio_rerun) * 1000)
+del tempos_pagina[:-20]
+
 st.markdown("---")
+st.caption(f"⏱️ Renderização: {tempos_pagina[-1]:.0f} ms "
+           f"(mediana das últimas {len(tempos_pagina)}: {sorted(tempos_pagina)[len(tempos_pagina) // 2]:.0f} ms)")
 st.markdown("🚢 **Sistema Portuário Inteligente** | Desenvolvido com IA para otimização de operações portuárias | **Powered by n8n + GPT-4.1-mini**")
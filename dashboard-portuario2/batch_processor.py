@@ -0,0 +1,196 @@
+"""
+Processamento em lote de documentos portuários com pool de workers limitado
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+from config import BATCH_CONFIG, OPENAI_CONFIG, PIPELINE_CONFIG, PORTO_SANTOS_RULES
+
+
+class RateLimiter:
+    """Limita o número de chamadas por minuto espaçando-as uniformemente entre threads"""
+    
+    def __init__(self, requests_per_minute: Optional[float]):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+    
+    def acquire(self) -> None:
+        """Bloqueia até que a próxima chamada seja permitida"""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class LocalPDFFile(io.BytesIO):
+    """PDF lido do disco com a mesma interface do UploadedFile do Streamlit"""
+    
+    type = "application/pdf"
+    
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            data = f.read()
+        super().__init__(data)
+        self.name = os.path.basename(path)
+        self.size = len(data)
+
+
+def infer_document_type(file_name: str, default: Optional[str] = None) -> Optional[str]:
+    """Deduz o tipo de documento pelo prefixo do nome do arquivo (ex: Manifesto_MSC.pdf)"""
+    stem = os.path.splitext(os.path.basename(file_name))[0].lower()
+    for document_type in PORTO_SANTOS_RULES:
+        if stem.startswith(document_type.lower()):
+            return document_type
+    return default
+
+
+class BatchReport:
+    """Acumula os resultados de um lote e calcula a vazão"""
+    
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.rows: List[Dict[str, Any]] = []
+    
+    def add(self, row: Dict[str, Any]) -> None:
+        self.rows.append(row)
+    
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started_at
+        total = len(self.rows)
+        return {
+            "documentos": total,
+            "sucessos": sum(1 for r in self.rows if r["status"] == "sucesso"),
+            "erros": sum(1 for r in self.rows if r["status"] != "sucesso"),
+            "cache": sum(1 for r in self.rows if r.get("cache")),
+            "sem_ia": sum(1 for r in self.rows if r.get("origem") == "validador_local"),
+            "tempo_total_s": round(elapsed, 2),
+            "docs_por_minuto": round(total / elapsed * 60, 2) if elapsed > 0 else 0.0
+        }
+
+
+def _process_one(process_document, file, document_type: str) -> Dict[str, Any]:
+    started = time.monotonic()
+    try:
+        result = process_document(file, document_type)
+    except Exception as e:
+        result = {"status": "erro", "mensagem": str(e)}
+    elapsed = time.monotonic() - started
+    
+    ai_result = result.get("analise_ia", {})
+    return {
+        "arquivo": file.name,
+        "tipo": document_type,
+        "status": result["status"],
+        "valido": ai_result.get("valido"),
+        "score": ai_result.get("score_conformidade"),
+        "paginas": result.get("total_paginas"),
+        "cache": result.get("cache_hit", False),
+        "origem": ai_result.get("origem", "ia"),
+        "tempo_s": round(elapsed, 2),
+        "mensagem": result.get("mensagem", "")
+    }
+
+
+def process_batch(analyzer, items: Iterable[Tuple[Any, str]], max_workers: Optional[int] = None,
+                  requests_per_minute: Optional[float] = None,
+                  cpu_workers: int = 0) -> Iterator[Dict[str, Any]]:
+    """Processa (arquivo, tipo) em paralelo, gerando cada resultado assim que termina.
+    
+    Com cpu_workers > 0, extração, renderização e codificação rodam em um pool de
+    processos (pipeline.DocumentPipeline) e as threads ficam com a espera pela IA.
+    """
+    max_workers = max_workers or BATCH_CONFIG["max_workers"]
+    if requests_per_minute is None:
+        requests_per_minute = BATCH_CONFIG["requests_per_minute"]
+    
+    # O limite de chamadas vale apenas para a etapa de IA
+    previous_limiter = analyzer.rate_limiter
+    analyzer.rate_limiter = RateLimiter(requests_per_minute)
+    pipeline = None
+    process_document = analyzer.process_document
+    if cpu_workers:
+        from pipeline import DocumentPipeline
+        pipeline = DocumentPipeline(analyzer, cpu_workers)
+        process_document = pipeline.process_document
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(_process_one, process_document, file, document_type)
+                       for file, document_type in items]
+            for future in as_completed(futures):
+                yield future.result()
+    finally:
+        analyzer.rate_limiter = previous_limiter
+        if pipeline is not None:
+            pipeline.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analisa em lote os PDFs de uma pasta")
+    parser.add_argument("pasta", help="Pasta com os documentos PDF da escala")
+    parser.add_argument("--tipo", choices=list(PORTO_SANTOS_RULES.keys()),
+                        help="Tipo padrão quando não for possível deduzir pelo nome do arquivo")
+    parser.add_argument("--workers", type=int, default=BATCH_CONFIG["max_workers"])
+    parser.add_argument("--rpm", type=float, default=BATCH_CONFIG["requests_per_minute"],
+                        help="Máximo de chamadas de IA por minuto (0 = sem limite)")
+    parser.add_argument("--processos", type=int, default=PIPELINE_CONFIG["cpu_workers"],
+                        help="Processos para extração/renderização/codificação (0 = nas próprias threads)")
+    parser.add_argument("--csv", help="Arquivo CSV para salvar o relatório")
+    parser.add_argument("--sem-cache", action="store_true", help="Ignora o cache de análises")
+    args = parser.parse_args(argv)
+    
+    if not OPENAI_CONFIG["api_key"]:
+        print("Defina OPENAI_API_KEY para executar a análise por IA", file=sys.stderr)
+        return 2
+    
+    from analysis_cache import AnalysisCache
+    from document_analyzer import RealDocumentAnalyzer
+    
+    items = []
+    for entry in sorted(os.listdir(args.pasta)):
+        if not entry.lower().endswith(".pdf"):
+            continue
+        document_type = infer_document_type(entry, args.tipo)
+        if document_type is None:
+            print(f"Ignorado (tipo desconhecido): {entry}", file=sys.stderr)
+            continue
+        items.append((LocalPDFFile(os.path.join(args.pasta, entry)), document_type))
+    
+    cache = None if args.sem_cache else AnalysisCache()
+    analyzer = RealDocumentAnalyzer(OPENAI_CONFIG["api_key"], cache=cache)
+    report = BatchReport()
+    
+    for row in process_batch(analyzer, items, args.workers, args.rpm, args.processos):
+        report.add(row)
+        print(f"[{len(report.rows)}/{len(items)}] {row['arquivo']} ({row['tipo']}): "
+              f"{row['status']} score={row['score']} {row['tempo_s']}s"
+              f"{' (cache)' if row['cache'] else ''}")
+    
+    summary = report.summary()
+    print(f"\n{summary['documentos']} documentos em {summary['tempo_total_s']}s "
+          f"- {summary['docs_por_minuto']} docs/min "
+          f"({summary['sucessos']} sucessos, {summary['erros']} erros, {summary['cache']} do cache, "
+          f"{summary['sem_ia']} decididos localmente)")
+    
+    if args.csv and report.rows:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(report.rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(report.rows)
+    
+    return 0 if summary["erros"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
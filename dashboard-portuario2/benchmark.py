@@ -0,0 +1,332 @@
+"""
+Benchmark das etapas de RealDocumentAnalyzer.process_document com PDFs sintéticos
+
+Gera DUE, Manifesto e Plano_Carga com 1/10/100/500 páginas, com camada de texto e
+escaneados, substitui o cliente OpenAI por um stub com latência configurável e mede, para
+cada etapa, tempo de parede, tempo de CPU (incluindo subprocessos como o pdftoppm) e pico
+de memória residente. Os resultados podem ser salvos como baseline e comparados depois.
+
+Uso:
+    python benchmark.py --salvar-baseline
+    python benchmark.py --comparar                # falha (código 1) se alguma etapa regredir
+    python benchmark.py --tipos DUE --paginas 1 10 --latencia 0.2
+    python benchmark.py --paginas 500 --memoria-limitada --rss-maximo 300   # teto de memória
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional
+
+from config import DATA_DIR, PORTO_SANTOS_RULES, PRE_VALIDATION_CONFIG, RULES_VERSION
+from synthetic_pdfs import DOCUMENT_HEADERS, write_document
+
+BENCHMARK_DIR = os.path.join(DATA_DIR, "benchmark")
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+
+# Métodos do analisador medidos, na ordem em que process_document os executa.
+# Tempos são exclusivos (o de uma etapa não inclui o das etapas chamadas por ela),
+# exceto "total", que cobre process_document inteiro.
+STAGES = [
+    ("process_document", "total"),
+    ("validate_file_format", "validacao"),
+    ("extract_document_text", "selecao_prompt"),
+    ("extract_pages_for_prompt", "extracao_texto"),
+    ("count_pdf_pages", "contagem_paginas"),
+    ("decide_locally", "pre_validacao"),
+    ("convert_pdf_to_images", "rasterizacao"),
+    ("encode_page_image", "codificacao"),
+    ("analyze_document_with_ai", "llm"),
+    ("finish_document", "resultado")
+]
+
+STUB_RESPONSE = json.dumps({
+    "valido": True,
+    "campos_encontrados": [],
+    "campos_faltantes": [],
+    "observacoes": ["Resposta do stub de benchmark"],
+    "score_conformidade": 90,
+    "recomendacoes": []
+})
+
+
+class StubOpenAI:
+    """Substitui openai.OpenAI: espera `latency` segundos e devolve uma análise fixa"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, stream: bool = False, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        if stream:
+            return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=STUB_RESPONSE))])])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=STUB_RESPONSE))])
+
+
+def _rss_mb() -> float:
+    """Memória residente atual do processo (MB)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        # Sem /proc (macOS): usa o pico do processo, em bytes nessa plataforma
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 20
+
+
+def _cpu_s() -> float:
+    """CPU do processo e dos subprocessos já encerrados (pdftoppm)"""
+    t = os.times()
+    return time.process_time() + t.children_user + t.children_system
+
+
+class StageProfiler:
+    """Envolve métodos do analisador medindo tempo exclusivo e pico de RSS por etapa"""
+
+    def __init__(self, sample_interval: float = 0.002):
+        self.sample_interval = sample_interval
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self._stack: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self):
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._sampler.join()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.sample_interval):
+            rss = _rss_mb()
+            with self._lock:
+                for frame in self._stack:
+                    frame["peak"] = max(frame["peak"], rss)
+
+    def instrument(self, analyzer) -> None:
+        for method_name, stage in STAGES:
+            setattr(analyzer, method_name, self._wrap(getattr(analyzer, method_name), stage))
+
+    def _wrap(self, method, stage: str):
+        def wrapper(*args, **kwargs):
+            frame = {"wall": time.perf_counter(), "cpu": _cpu_s(), "peak": _rss_mb(),
+                     "child_wall": 0.0, "child_cpu": 0.0}
+            with self._lock:
+                self._stack.append(frame)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                wall = time.perf_counter() - frame["wall"]
+                cpu = _cpu_s() - frame["cpu"]
+                with self._lock:
+                    self._stack.pop()
+                    frame["peak"] = max(frame["peak"], _rss_mb())
+                    if self._stack:
+                        parent = self._stack[-1]
+                        parent["child_wall"] += wall
+                        parent["child_cpu"] += cpu
+                        parent["peak"] = max(parent["peak"], frame["peak"])
+                    entry = self.stats.setdefault(stage, {"wall_s": 0.0, "cpu_s": 0.0,
+                                                          "peak_rss_mb": 0.0, "calls": 0})
+                    exclusive = stage != "total"
+                    entry["wall_s"] += wall - frame["child_wall"] * exclusive
+                    entry["cpu_s"] += cpu - frame["child_cpu"] * exclusive
+                    entry["peak_rss_mb"] = max(entry["peak_rss_mb"], frame["peak"])
+                    entry["calls"] += 1
+        return wrapper
+
+
+def case_name(document_type: str, pages: int, scanned: bool) -> str:
+    return f"{document_type}-{pages}p-{'escaneado' if scanned else 'texto'}"
+
+
+def synthetic_pdf(document_type: str, pages: int, scanned: bool, directory: str) -> str:
+    """Caminho do PDF sintético, gerado apenas na primeira execução"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, case_name(document_type, pages, scanned) + ".pdf")
+    if not os.path.exists(path):
+        with open(path + ".tmp", "wb") as f:
+            write_document(f, document_type, pages, scanned)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def run_case(path: str, document_type: str, latency: float, repetitions: int,
+             bounded_memory: bool = False) -> Dict[str, Dict[str, float]]:
+    """Executa process_document `repetitions` vezes e devolve a mediana de cada métrica por etapa"""
+    from batch_processor import LocalPDFFile
+    from document_analyzer import RealDocumentAnalyzer
+
+    runs = []
+    for _ in range(repetitions):
+        analyzer = RealDocumentAnalyzer("benchmark", bounded_memory=bounded_memory)
+        analyzer._client = StubOpenAI(latency)
+        # Os documentos de 500 páginas passam do limite de upload; o benchmark mede todas as
+        # etapas mesmo assim
+        analyzer.porto_santos_rules = copy.deepcopy(PORTO_SANTOS_RULES)
+        analyzer.porto_santos_rules[document_type]["max_size_mb"] = float("inf")
+
+        with StageProfiler() as profiler:
+            profiler.instrument(analyzer)
+            analyzer.process_document(LocalPDFFile(path), document_type)
+        runs.append(profiler.stats)
+
+    result = {}
+    for stage in {stage for run in runs for stage in run}:
+        samples = [run[stage] for run in runs if stage in run]
+        result[stage] = {
+            "wall_s": round(statistics.median(s["wall_s"] for s in samples), 4),
+            "cpu_s": round(statistics.median(s["cpu_s"] for s in samples), 4),
+            "peak_rss_mb": round(max(s["peak_rss_mb"] for s in samples), 1),
+            "calls": samples[0]["calls"]
+        }
+    return result
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+            min_delta_s: float) -> List[str]:
+    """Etapas cujo tempo de parede piorou além da tolerância relativa e do mínimo absoluto"""
+    regressions = []
+    for case, stages in current["cases"].items():
+        base_stages = baseline.get("cases", {}).get(case)
+        if not base_stages:
+            continue
+        for stage, metrics in stages.items():
+            base = base_stages.get(stage)
+            if base is None:
+                continue
+            delta = metrics["wall_s"] - base["wall_s"]
+            if delta > min_delta_s and metrics["wall_s"] > base["wall_s"] * (1 + tolerance):
+                regressions.append(f"{case} {stage}: {base['wall_s'] * 1000:.1f}ms -> "
+                                   f"{metrics['wall_s'] * 1000:.1f}ms (+{delta / max(base['wall_s'], 1e-9):.0%})")
+    return regressions
+
+
+def print_case(case: str, stages: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Any]]) -> None:
+    base_stages = (baseline or {}).get("cases", {}).get(case, {})
+    print(f"\n{case}")
+    print(f"  {'etapa':<18}{'parede ms':>11}{'CPU ms':>10}{'pico RSS MB':>13}{'chamadas':>10}{'vs baseline':>13}")
+    for _, stage in STAGES:
+        metrics = stages.get(stage)
+        if metrics is None:
+            continue
+        versus = ""
+        base = base_stages.get(stage)
+        if base and base["wall_s"] > 0:
+            versus = f"{(metrics['wall_s'] - base['wall_s']) / base['wall_s']:+.0%}"
+        print(f"  {stage:<18}{metrics['wall_s'] * 1000:>11.1f}{metrics['cpu_s'] * 1000:>10.1f}"
+              f"{metrics['peak_rss_mb']:>13.1f}{metrics['calls']:>10}{versus:>13}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark das etapas de análise de documentos")
+    parser.add_argument("--tipos", nargs="+", default=list(DOCUMENT_HEADERS.keys()),
+                        choices=list(DOCUMENT_HEADERS.keys()))
+    parser.add_argument("--paginas", nargs="+", type=int, default=[1, 10, 100, 500])
+    parser.add_argument("--modos", nargs="+", default=["texto", "escaneado"], choices=["texto", "escaneado"])
+    parser.add_argument("--latencia", type=float, default=1.0, help="Latência simulada da IA em segundos")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--sem-prevalidacao", action="store_true",
+                        help="Desliga a pré-validação local para sempre exercitar a etapa de IA")
+    parser.add_argument("--memoria-limitada", action="store_true",
+                        help="Executa o analisador no modo de memória limitada")
+    parser.add_argument("--rss-maximo", type=float,
+                        help="Falha (código 1) se o pico de RSS de algum caso passar deste valor em MB")
+    parser.add_argument("--pasta", default=os.path.join(BENCHMARK_DIR, "pdfs"), help="Cache dos PDFs gerados")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--salvar-baseline", action="store_true")
+    parser.add_argument("--comparar", action="store_true")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Piora relativa aceita (0.2 = 20%%)")
+    parser.add_argument("--delta-minimo", type=float, default=0.005,
+                        help="Diferença absoluta mínima, em segundos, para contar como regressão")
+    parser.add_argument("--json", help="Arquivo para salvar os resultados desta execução")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    if args.sem_prevalidacao:
+        PRE_VALIDATION_CONFIG["enabled"] = False
+
+    baseline = None
+    if args.comparar:
+        if not os.path.exists(args.baseline):
+            print(f"Baseline não encontrada: {args.baseline}", file=sys.stderr)
+            return 2
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = {
+        "meta": {
+            "criado_em": datetime.now().isoformat(timespec="seconds"),
+            "versao_regras": RULES_VERSION,
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "latencia_ia_s": args.latencia,
+            "repeticoes": args.repeticoes,
+            "prevalidacao": PRE_VALIDATION_CONFIG["enabled"],
+            "memoria_limitada": args.memoria_limitada
+        },
+        "cases": {}
+    }
+
+    for document_type in args.tipos:
+        for pages in args.paginas:
+            for mode in args.modos:
+                scanned = mode == "escaneado"
+                case = case_name(document_type, pages, scanned)
+                path = synthetic_pdf(document_type, pages, scanned, args.pasta)
+                results["cases"][case] = run_case(path, document_type, args.latencia, args.repeticoes,
+                                                  args.memoria_limitada)
+                print_case(case, results["cases"][case], baseline)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.salvar_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline salva em {args.baseline}")
+
+    failed = False
+    if args.rss_maximo:
+        over_limit = {case: stages["total"]["peak_rss_mb"] for case, stages in results["cases"].items()
+                      if stages["total"]["peak_rss_mb"] > args.rss_maximo}
+        if over_limit:
+            print(f"\nPico de RSS acima de {args.rss_maximo:.0f} MB:")
+            for case, peak in over_limit.items():
+                print(f"  {case}: {peak:.1f} MB")
+            failed = True
+        else:
+            print(f"\nPico de RSS dentro do limite de {args.rss_maximo:.0f} MB em todos os casos")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerancia, args.delta_minimo)
+        if regressions:
+            print("\nRegressões em relação à baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            failed = True
+        else:
+            print("\nSem regressões em relação à baseline")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
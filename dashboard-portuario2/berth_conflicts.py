@@ -0,0 +1,214 @@
+"""
+Detecção local de conflitos de horário nos berços
+
+Cada berço tem uma árvore de intervalos (treap aumentada com o maior fim da subárvore) com as
+janelas de ocupação solicitadas [ETA, ETA + tempo de operação). Inserção e remoção custam
+O(log n) esperado e a consulta de sobreposição O(log n + k), sem depender do assistente AI.
+"""
+import random
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+from berth_scheduler import tempo_operacao
+from config import BERTH_CONFIG
+
+# Campos do navio que definem a janela de ocupação
+CAMPOS_JANELA = ("nome", "eta", "tipo_carga", "status", "berco")
+
+
+class _No:
+    __slots__ = ("chave", "fim", "item", "prioridade", "max_fim", "esq", "dir")
+
+    def __init__(self, chave: Tuple[datetime, str], fim: datetime, item: Any, prioridade: float):
+        self.chave = chave
+        self.fim = fim
+        self.item = item
+        self.prioridade = prioridade
+        self.max_fim = fim
+        self.esq: Optional["_No"] = None
+        self.dir: Optional["_No"] = None
+
+
+def _atualizar(no: _No) -> None:
+    no.max_fim = no.fim
+    if no.esq is not None and no.esq.max_fim > no.max_fim:
+        no.max_fim = no.esq.max_fim
+    if no.dir is not None and no.dir.max_fim > no.max_fim:
+        no.max_fim = no.dir.max_fim
+
+
+def _dividir(no: Optional[_No], chave) -> Tuple[Optional[_No], Optional[_No]]:
+    """(chaves < chave, chaves >= chave)"""
+    if no is None:
+        return None, None
+    if no.chave < chave:
+        no.dir, direita = _dividir(no.dir, chave)
+        _atualizar(no)
+        return no, direita
+    esquerda, no.esq = _dividir(no.esq, chave)
+    _atualizar(no)
+    return esquerda, no
+
+
+def _unir(a: Optional[_No], b: Optional[_No]) -> Optional[_No]:
+    """Une duas treaps com todas as chaves de `a` menores que as de `b`"""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.prioridade > b.prioridade:
+        a.dir = _unir(a.dir, b)
+        _atualizar(a)
+        return a
+    b.esq = _unir(a, b.esq)
+    _atualizar(b)
+    return b
+
+
+def _remover(no: Optional[_No], chave) -> Optional[_No]:
+    if no is None:
+        return None
+    if chave < no.chave:
+        no.esq = _remover(no.esq, chave)
+    elif no.chave < chave:
+        no.dir = _remover(no.dir, chave)
+    else:
+        return _unir(no.esq, no.dir)
+    _atualizar(no)
+    return no
+
+
+class IntervalTreap:
+    """Intervalos semiabertos [inicio, fim) identificados por (inicio, id)"""
+
+    def __init__(self, seed: int = 0):
+        self._raiz: Optional[_No] = None
+        self._random = random.Random(seed)
+        self._tamanho = 0
+
+    def __len__(self) -> int:
+        return self._tamanho
+
+    def inserir(self, inicio: datetime, fim: datetime, item_id: str, item: Any = None) -> None:
+        no = _No((inicio, item_id), fim, item, self._random.random())
+        esquerda, direita = _dividir(self._raiz, no.chave)
+        self._raiz = _unir(_unir(esquerda, no), direita)
+        self._tamanho += 1
+
+    def remover(self, inicio: datetime, item_id: str) -> None:
+        self._raiz = _remover(self._raiz, (inicio, item_id))
+        self._tamanho -= 1
+
+    def sobrepostos(self, inicio: datetime, fim: datetime) -> List[Tuple[datetime, datetime, Any]]:
+        """Intervalos que se sobrepõem a [inicio, fim), em ordem de início"""
+        encontrados: List[Tuple[datetime, datetime, Any]] = []
+        pilha: List[Tuple[_No, bool]] = [(self._raiz, False)] if self._raiz else []
+        # Percurso em ordem sem recursão, podando subárvores cujo maior fim não alcança `inicio`
+        while pilha:
+            no, visitado = pilha.pop()
+            if visitado:
+                if no.fim > inicio:
+                    encontrados.append((no.chave[0], no.fim, no.item))
+                continue
+            if no.max_fim <= inicio:
+                continue
+            if no.chave[0] < fim:
+                if no.dir is not None:
+                    pilha.append((no.dir, False))
+                pilha.append((no, True))
+            if no.esq is not None:
+                pilha.append((no.esq, False))
+        return encontrados
+
+
+class BerthConflictIndex:
+    """Janelas de ocupação solicitadas por berço, mantidas em sincronia com o repositório de navios"""
+
+    def __init__(self, tempo_servico_horas: Optional[Dict[str, float]] = None):
+        self.tempo_servico = tempo_servico_horas or BERTH_CONFIG["tempo_servico_horas"]
+        self.status_considerados = set(BERTH_CONFIG["status_planejados"])
+        self._arvores = {berco: IntervalTreap() for berco in BERTH_CONFIG["bercos"]}
+        self._navios: Dict[str, Dict[str, Any]] = {}
+        self._janelas: Dict[str, Tuple[str, datetime, datetime]] = {}
+        self._lock = threading.Lock()
+
+    def janela(self, navio: Dict[str, Any]) -> Optional[Tuple[str, datetime, datetime]]:
+        """(berço, início, fim) solicitados pelo navio, ou None se ele não ocupa berço"""
+        if (navio.get("status") not in self.status_considerados or navio.get("eta") is None
+                or navio.get("berco") not in self._arvores):
+            return None
+        fim = navio["eta"] + tempo_operacao(navio.get("tipo_carga"), self.tempo_servico)
+        return navio["berco"], navio["eta"], fim
+
+    def _remover(self, navio_id: str) -> None:
+        janela = self._janelas.pop(navio_id, None)
+        if janela is not None:
+            berco, inicio, _ = janela
+            self._arvores[berco].remover(inicio, navio_id)
+
+    def sincronizar(self, navios: Iterable[Dict[str, Any]]) -> int:
+        """Reindexa apenas navios novos, removidos ou com ETA/berço/carga/status alterados"""
+        recebidos = {navio["navio_id"]: navio for navio in navios}
+        alterados = 0
+        with self._lock:
+            for navio_id in [n for n in self._navios if n not in recebidos]:
+                self._remover(navio_id)
+                del self._navios[navio_id]
+                alterados += 1
+
+            for navio_id, navio in recebidos.items():
+                anterior = self._navios.get(navio_id)
+                if anterior is not None and all(anterior.get(c) == navio.get(c) for c in CAMPOS_JANELA):
+                    continue
+                self._remover(navio_id)
+                self._navios[navio_id] = {c: navio.get(c) for c in CAMPOS_JANELA}
+                janela = self.janela(navio)
+                if janela is not None:
+                    berco, inicio, fim = janela
+                    self._arvores[berco].inserir(inicio, fim, navio_id, (navio_id, navio.get("nome")))
+                    self._janelas[navio_id] = janela
+                alterados += 1
+        return alterados
+
+    def verificar(self, berco: str, inicio: datetime, fim: datetime,
+                  ignorar: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Janelas já solicitadas no berço que se sobrepõem a [inicio, fim)"""
+        arvore = self._arvores.get(berco)
+        if arvore is None:
+            return []
+        with self._lock:
+            sobrepostos = arvore.sobrepostos(inicio, fim)
+        return [
+            {"navio_id": navio_id, "nome": nome, "berco": berco, "inicio": outro_inicio, "fim": outro_fim}
+            for outro_inicio, outro_fim, (navio_id, nome) in sobrepostos
+            if navio_id != ignorar
+        ]
+
+    def verificar_navio(self, navio: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Conflitos da janela solicitada pelo navio (indexado ou não) com os demais navios"""
+        janela = self.janela(navio)
+        if janela is None:
+            return []
+        return self.verificar(*janela, ignorar=navio.get("navio_id"))
+
+    def todos_os_conflitos(self) -> List[Tuple[str, str]]:
+        """Pares (navio_id, navio_id) com janelas sobrepostas no mesmo berço"""
+        pares = set()
+        with self._lock:
+            janelas = list(self._janelas.items())
+        for navio_id, (berco, inicio, fim) in janelas:
+            for conflito in self.verificar(berco, inicio, fim, ignorar=navio_id):
+                pares.add(tuple(sorted((navio_id, conflito["navio_id"]))))
+        return sorted(pares)
+
+
+def descrever_conflitos(conflitos: List[Dict[str, Any]]) -> str:
+    """Texto para o campo conflitos_horarios da análise"""
+    if not conflitos:
+        return "Nenhum conflito detectado nos horários programados."
+    return "; ".join(
+        f"Conflito no {c['berco']} com {c['nome']} "
+        f"({c['inicio'].strftime('%d/%m %H:%M')}–{c['fim'].strftime('%d/%m %H:%M')})"
+        for c in conflitos
+    ) + "."
@@ -0,0 +1,237 @@
+"""
+Planejamento de atracação: atribui navios a berços por ETA, tipo de carga e tempo de operação
+
+Regra (primeiro a chegar, primeiro atendido): em ordem de ETA, cada navio vai para o berço
+compatível com sua carga que o recebe mais cedo, respeitando a folga entre navios e as
+janelas de manutenção; em empate, fica no berço solicitado.
+
+Como a atribuição de um navio só depende dos navios anteriores na ordem de ETA, uma mudança
+de ETA, status ou carga replaneja a partir da posição do navio alterado e para assim que a
+ocupação dos berços volta a coincidir com o plano anterior.
+"""
+import bisect
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+from config import BERTH_CONFIG
+
+# Campos do navio que afetam o plano (mudanças nos demais não replanejam)
+CAMPOS_PLANEJAMENTO = ("nome", "eta", "tipo_carga", "status", "berco")
+
+STATUS_BERCO_LIVRE = "Livre"
+STATUS_BERCO_OCUPADO = "Ocupado"
+STATUS_BERCO_RESERVADO = "Reservado"
+STATUS_BERCO_MANUTENCAO = "Manutenção"
+
+_INICIO = datetime.min
+
+
+def tempo_operacao(tipo_carga: Optional[str], tempo_servico_horas: Optional[Dict[str, float]] = None) -> timedelta:
+    """Tempo estimado de operação no berço (tipos desconhecidos usam o de Carga Geral)"""
+    tempos = tempo_servico_horas or BERTH_CONFIG["tempo_servico_horas"]
+    return timedelta(hours=tempos.get(tipo_carga, tempos["Carga Geral"]))
+
+
+def _janelas_manutencao(config: Dict[str, Any]) -> List[Tuple[datetime, datetime]]:
+    janelas = []
+    for inicio, fim in config.get("manutencao", []):
+        inicio = datetime.fromisoformat(inicio) if isinstance(inicio, str) else inicio
+        fim = datetime.fromisoformat(fim) if isinstance(fim, str) else fim
+        janelas.append((inicio, fim))
+    return sorted(janelas)
+
+
+class BerthScheduler:
+    """Plano de atracação incremental, seguro para compartilhar entre sessões"""
+
+    def __init__(self, bercos: Optional[Dict[str, Dict[str, Any]]] = None,
+                 tempo_servico_horas: Optional[Dict[str, float]] = None,
+                 folga_horas: Optional[float] = None):
+        bercos = bercos or BERTH_CONFIG["bercos"]
+        self.bercos = list(bercos)
+        self.cargas_por_berco = {nome: set(config["cargas"]) for nome, config in bercos.items()}
+        self.manutencao = {nome: _janelas_manutencao(config) for nome, config in bercos.items()}
+        self.tempo_servico = tempo_servico_horas or BERTH_CONFIG["tempo_servico_horas"]
+        self.folga = timedelta(hours=BERTH_CONFIG["folga_horas"] if folga_horas is None else folga_horas)
+        self.status_planejados = set(BERTH_CONFIG["status_planejados"])
+
+        self._lock = threading.Lock()
+        self._navios: Dict[str, Dict[str, Any]] = {}
+        # Navios planejados em ordem de (eta, navio_id)
+        self._ordem: List[Tuple[datetime, str]] = []
+        # Ocupação dos berços (livre a partir de) imediatamente antes de cada navio
+        self._estado_antes: Dict[str, Tuple[datetime, ...]] = {}
+        self._atribuicoes: Dict[str, Dict[str, Any]] = {}
+        self.navios_replanejados = 0
+
+    def _planejavel(self, navio: Dict[str, Any]) -> bool:
+        return navio.get("status") in self.status_planejados and navio.get("eta") is not None
+
+    def duracao(self, tipo_carga: Optional[str]) -> timedelta:
+        return tempo_operacao(tipo_carga, self.tempo_servico)
+
+    def _inicio_no_berco(self, berco: str, livre_em: datetime, eta: datetime, duracao: timedelta) -> datetime:
+        inicio = max(eta, livre_em)
+        for janela_inicio, janela_fim in self.manutencao[berco]:
+            if inicio < janela_fim and inicio + duracao > janela_inicio:
+                inicio = janela_fim
+        return inicio
+
+    def _atribuir(self, navio: Dict[str, Any], estado: Tuple[datetime, ...]) -> Dict[str, Any]:
+        """Melhor berço para o navio dada a ocupação atual (não altera o estado)"""
+        duracao = self.duracao(navio.get("tipo_carga"))
+        melhor = None
+        for indice, berco in enumerate(self.bercos):
+            if navio.get("tipo_carga") not in self.cargas_por_berco[berco]:
+                continue
+            inicio = self._inicio_no_berco(berco, estado[indice], navio["eta"], duracao)
+            chave = (inicio, berco != navio.get("berco"), indice)
+            if melhor is None or chave < melhor[0]:
+                melhor = (chave, indice, berco, inicio)
+
+        if melhor is None:
+            return {"navio_id": navio["navio_id"], "nome": navio.get("nome"), "berco": None,
+                    "indice": None, "inicio": None, "fim": None, "espera_h": None}
+        _, indice, berco, inicio = melhor
+        return {
+            "navio_id": navio["navio_id"],
+            "nome": navio.get("nome"),
+            "berco": berco,
+            "indice": indice,
+            "inicio": inicio,
+            "fim": inicio + duracao,
+            "espera_h": (inicio - navio["eta"]).total_seconds() / 3600
+        }
+
+    def _avancar(self, estado: Tuple[datetime, ...], atribuicao: Dict[str, Any]) -> Tuple[datetime, ...]:
+        if atribuicao["indice"] is None:
+            return estado
+        estado = list(estado)
+        estado[atribuicao["indice"]] = atribuicao["fim"] + self.folga
+        return tuple(estado)
+
+    def _replanejar(self, posicao: int, ultima_alterada: int) -> None:
+        """Recalcula a partir de `posicao`; depois de `ultima_alterada`, para quando o estado converge"""
+        if posicao == 0:
+            estado = tuple(_INICIO for _ in self.bercos)
+        else:
+            anterior = self._ordem[posicao - 1][1]
+            estado = self._avancar(self._estado_antes[anterior], self._atribuicoes[anterior])
+
+        for indice in range(posicao, len(self._ordem)):
+            navio_id = self._ordem[indice][1]
+            if indice > ultima_alterada and self._estado_antes.get(navio_id) == estado:
+                return
+            self._estado_antes[navio_id] = estado
+            atribuicao = self._atribuir(self._navios[navio_id], estado)
+            self._atribuicoes[navio_id] = atribuicao
+            self.navios_replanejados += 1
+            estado = self._avancar(estado, atribuicao)
+
+    def sincronizar(self, navios: Iterable[Dict[str, Any]]) -> int:
+        """Aplica a lista atual de navios; só replaneja a partir do primeiro navio alterado.
+
+        Retorna quantos navios tiveram a atribuição recalculada.
+        """
+        recebidos = {navio["navio_id"]: navio for navio in navios}
+        with self._lock:
+            antes = self.navios_replanejados
+            alterados = [navio_id for navio_id in self._navios if navio_id not in recebidos]
+            alterados += [
+                navio_id for navio_id, navio in recebidos.items()
+                if navio_id not in self._navios
+                or any(self._navios[navio_id].get(c) != navio.get(c) for c in CAMPOS_PLANEJAMENTO)
+            ]
+            if not alterados:
+                return 0
+
+            chaves = []
+            for navio_id in alterados:
+                atual = self._navios.pop(navio_id, None)
+                if atual is not None and self._planejavel(atual):
+                    chave = (atual["eta"], navio_id)
+                    del self._ordem[bisect.bisect_left(self._ordem, chave)]
+                    self._estado_antes.pop(navio_id, None)
+                    self._atribuicoes.pop(navio_id, None)
+                    chaves.append(chave)
+
+                novo = recebidos.get(navio_id)
+                if novo is None:
+                    continue
+                novo = {campo: novo.get(campo) for campo in ("navio_id",) + CAMPOS_PLANEJAMENTO}
+                self._navios[navio_id] = novo
+                if self._planejavel(novo):
+                    chave = (novo["eta"], navio_id)
+                    bisect.insort(self._ordem, chave)
+                    chaves.append(chave)
+
+            if chaves:
+                # Navios antes da menor chave alterada mantêm a atribuição; depois da maior,
+                # o replanejamento para assim que a ocupação dos berços coincidir com a anterior
+                inicio = bisect.bisect_left(self._ordem, min(chaves))
+                ultima = bisect.bisect_right(self._ordem, max(chaves)) - 1
+                self._replanejar(inicio, ultima)
+            return self.navios_replanejados - antes
+
+    def atribuicao(self, navio_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._atribuicoes.get(navio_id)
+
+    def atribuicoes(self) -> List[Dict[str, Any]]:
+        """Plano completo em ordem de ETA"""
+        with self._lock:
+            return [self._atribuicoes[navio_id] for _, navio_id in self._ordem]
+
+    def _em_manutencao(self, berco: str, momento: datetime) -> bool:
+        return any(inicio <= momento < fim for inicio, fim in self.manutencao[berco])
+
+    def status_bercos(self, agora: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Linhas da tabela "Status dos Berços" calculadas a partir do plano"""
+        agora = agora or datetime.now()
+        reserva = timedelta(hours=BERTH_CONFIG["reserva_horas"])
+        linhas = []
+        for berco in self.bercos:
+            plano = sorted((a for a in self.atribuicoes() if a["berco"] == berco), key=lambda a: a["inicio"])
+            atual = next((a for a in plano if a["inicio"] <= agora < a["fim"]), None)
+            proximo = next((a for a in plano if a["inicio"] > agora), None)
+
+            if atual:
+                status = STATUS_BERCO_OCUPADO
+            elif self._em_manutencao(berco, agora):
+                status = STATUS_BERCO_MANUTENCAO
+            elif proximo and proximo["inicio"] - agora <= reserva:
+                status = STATUS_BERCO_RESERVADO
+            else:
+                status = STATUS_BERCO_LIVRE
+
+            linhas.append({
+                "Berço": berco,
+                "Status": status,
+                "Navio Atual": atual["nome"] if atual else "-",
+                "Próximo Horário": proximo["inicio"].strftime("%d/%m %H:%M") if proximo else "-"
+            })
+        return linhas
+
+    def ocupacao(self, agora: Optional[datetime] = None, horizonte_horas: Optional[float] = None) -> Dict[str, float]:
+        """Percentual de cada berço ocupado (navios ou manutenção) entre agora e o horizonte"""
+        agora = agora or datetime.now()
+        fim_horizonte = agora + timedelta(hours=horizonte_horas or BERTH_CONFIG["horizonte_ocupacao_horas"])
+        total = (fim_horizonte - agora).total_seconds()
+
+        intervalos: Dict[str, List[Tuple[datetime, datetime]]] = {berco: list(self.manutencao[berco])
+                                                                  for berco in self.bercos}
+        for atribuicao in self.atribuicoes():
+            if atribuicao["berco"] is not None:
+                intervalos[atribuicao["berco"]].append((atribuicao["inicio"], atribuicao["fim"]))
+
+        ocupacao = {}
+        for berco, janelas in intervalos.items():
+            ocupado, cursor = 0.0, agora
+            for inicio, fim in sorted(janelas):
+                inicio, fim = max(inicio, cursor), min(fim, fim_horizonte)
+                if fim > inicio:
+                    ocupado += (fim - inicio).total_seconds()
+                    cursor = fim
+            ocupacao[berco] = round(100 * ocupado / total, 1)
+        return ocupacao
@@ -0,0 +1,108 @@
+"""
+Suporte ao modo de memória limitada da análise de documentos
+
+- MemoryBudget: orçamento de memória compartilhado pelas análises simultâneas do processo
+- SpooledPDFFile: cópia do upload em disco, feita em blocos, lida sob demanda
+"""
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from config import MEMORY_CONFIG
+
+# Página A4 em polegadas, usada para estimar o tamanho dos bitmaps renderizados
+A4_INCHES = (8.27, 11.69)
+
+
+def estimate_document_mb(file_size: int, dpi: int, grayscale: bool) -> float:
+    """Memória de trabalho estimada de uma análise: overhead + bloco de cópia + bitmaps de uma página.
+    
+    O bitmap conta três vezes: saída do pdftoppm, imagem decodificada e cópia redimensionada.
+    """
+    width, height = A4_INCHES[0] * dpi, A4_INCHES[1] * dpi
+    bitmap_mb = width * height * (1 if grayscale else 3) / 2 ** 20
+    chunk_mb = min(file_size, MEMORY_CONFIG["spool_chunk_bytes"]) / 2 ** 20
+    return MEMORY_CONFIG["document_overhead_mb"] + chunk_mb + 3 * bitmap_mb
+
+
+class MemoryBudget:
+    """Reserva de memória por análise; quem não cabe no orçamento espera as outras terminarem"""
+    
+    def __init__(self, max_mb: Optional[float] = None):
+        self.max_mb = max_mb or MEMORY_CONFIG["max_memory_mb"]
+        self.reserved_mb = 0.0
+        self.active = 0
+        self._condition = threading.Condition()
+    
+    @contextmanager
+    def reserve(self, mb: float, timeout: Optional[float] = None) -> Iterator[None]:
+        """Bloqueia até haver `mb` livres; uma análise sozinha sempre é admitida, mesmo acima do teto"""
+        timeout = MEMORY_CONFIG["admission_timeout_s"] if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self.active and self.reserved_mb + mb > self.max_mb:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Sem memória disponível para a análise ({mb:.0f} MB)")
+                self._condition.wait(remaining)
+            self.reserved_mb += mb
+            self.active += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.reserved_mb -= mb
+                self.active -= 1
+                self._condition.notify_all()
+
+
+memory_budget = MemoryBudget()
+
+
+class SpooledPDFFile(io.FileIO):
+    """Upload copiado em blocos para um arquivo temporário, com a interface usada pelo analisador.
+    
+    Evita as cópias integrais feitas por getvalue(): texto, metadados e renderização leem do disco.
+    O arquivo temporário é removido ao fechar.
+    """
+    
+    type = "application/pdf"
+    
+    def __init__(self, source, directory: Optional[str] = None):
+        fd, path = tempfile.mkstemp(suffix=".pdf", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                if hasattr(source, "seek"):
+                    source.seek(0)
+                shutil.copyfileobj(source, out, MEMORY_CONFIG["spool_chunk_bytes"])
+            super().__init__(path, "rb")
+        except BaseException:
+            os.unlink(path)
+            raise
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.source_name = getattr(source, "name", os.path.basename(path))
+        self._owner = True
+    
+    @classmethod
+    def attach(cls, path: str) -> "SpooledPDFFile":
+        """Abre um arquivo já copiado (ex: nos processos do pipeline), sem copiar nem removê-lo ao fechar"""
+        spooled = cls.__new__(cls)
+        io.FileIO.__init__(spooled, path, "rb")
+        spooled.path = path
+        spooled.size = os.path.getsize(path)
+        spooled.source_name = os.path.basename(path)
+        spooled._owner = False
+        return spooled
+    
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            if self._owner and os.path.exists(self.path):
+                os.unlink(self.path)
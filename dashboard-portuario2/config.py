@@ -32,18 +32,122 @@ API_CONFIG = {
     }
 }
 
+# Permite apontar as três APIs para um servidor local (ex: amigu_stub_server.py)
+AMIGU_BASE_URL = os.getenv('AMIGU_BASE_URL')
+if AMIGU_BASE_URL:
+    for _servico in API_CONFIG.values():
+        _servico["base_url"] = AMIGU_BASE_URL.rstrip("/") + "/" + _servico["base_url"].rsplit("/", 1)[-1]
+
+# Sem chave de API nem servidor local, as chamadas às APIs são simuladas
+API_SIMULADA = not os.getenv('AMIGU_API_KEY') and not AMIGU_BASE_URL
+
+# Cliente HTTP das APIs do Instituto AmiGU
+HTTP_CLIENT_CONFIG = {
+    "pool_maxsize": 10,
+    "max_concurrency_per_host": 8,
+    "connect_timeout": 3.05,
+    "read_timeout": 10,
+    "max_retries": 3,
+    "backoff_base": 0.25,
+    "backoff_max": 4.0,
+    "retry_statuses": [429, 500, 502, 503, 504]
+}
+
 # Configuração do n8n
 N8N_CONFIG = {
     "webhook_url": "https://n8n.hackathon.souamigu.org.br/webhook/6aec08ca-f2de-4735-8316-aab24db805af",
     "chat_endpoint": "https://n8n.hackathon.souamigu.org.br/chat/288d383c-5e9c-4354-9dfa-9258f72def9f"
 }
 
+# Conexões de saída compartilhadas pelo processo (connections.py): o n8n usa o mesmo
+# cliente com pool das APIs AmiGU, sem retentativas (o webhook não é idempotente), e o
+# cliente OpenAI mantém um pool próprio com keep-alive limitado
+CONNECTION_CONFIG = {
+    "n8n": {
+        "max_retries": 0,
+        "read_timeout": 30,
+        "pool_maxsize": 4,
+        "max_concurrency_per_host": 4
+    },
+    "openai": {
+        "max_connections": 20,
+        "max_keepalive_connections": 10,
+        "keepalive_expiry": 60.0,
+        "connect_timeout": 5.0,
+        "read_timeout": 600.0
+    }
+}
+
+# Assistente AI (webhook do n8n): perguntas idênticas simultâneas viram uma só chamada,
+# respostas ficam em cache por cache_ttl_seconds e, após failure_threshold falhas seguidas,
+# o painel usa direto a resposta de contingência, testando o n8n a cada reset_timeout_seconds
+ASSISTANT_CONFIG = {
+    "cache_ttl_seconds": 300,
+    "cache_max_entries": 256,
+    "failure_threshold": 3,
+    "reset_timeout_seconds": 30
+}
+
 # Headers para autenticação
 API_HEADERS = {
     "Authorization": f"ApiKey {os.getenv('AMIGU_API_KEY', 'YOUR_API_KEY_HERE')}",
     "Content-Type": "application/json"
 }
 
+# Berços do porto e cargas que cada um atende (berth_scheduler.py). "manutencao" aceita
+# janelas [(inicio, fim)] em ISO 8601 em que o berço não recebe navios
+BERTH_CONFIG = {
+    "bercos": {
+        "Berço 1": {"cargas": ["Granéis", "Carga Geral"]},
+        "Berço 2": {"cargas": ["Contêineres", "Carga Geral"]},
+        "Berço 3": {"cargas": ["Contêineres"]},
+        "Berço 4": {"cargas": ["Líquidos"]},
+        "Berço 5": {"cargas": ["Granéis", "Líquidos", "Carga Geral"]}
+    },
+    # Tempo estimado de operação por tipo de carga (tipos desconhecidos usam Carga Geral)
+    "tempo_servico_horas": {
+        "Contêineres": 18,
+        "Carga Geral": 24,
+        "Granéis": 36,
+        "Líquidos": 20
+    },
+    "folga_horas": 1,
+    # Status que ocupam berço no plano (recusados ficam de fora)
+    "status_planejados": ["Aprovado", "Pendente", "Em Análise"],
+    # Berço livre com atracação prevista dentro desse prazo aparece como "Reservado"
+    "reserva_horas": 2,
+    "horizonte_ocupacao_horas": 24
+}
+
+# Acompanhamento em tempo real: fragmentos da página redesenhados a cada intervalo_fragmento_s
+# a partir dos eventos do barramento (event_bus.py). Sem APIs configuradas, a fonte local
+# (local_event_source.py) publica as posições dos navios e revisões ocasionais de ETA
+REALTIME_CONFIG = {
+    "intervalo_fragmento_s": 3,
+    "max_eventos": 1000,
+    "fonte_local": os.getenv("PORTO_FONTE_EVENTOS_LOCAL", "1" if API_SIMULADA else "0") == "1",
+    "intervalo_fonte_s": 5,
+    "cais": (-23.97, -46.31),
+    "fundeadouro": (-24.05, -46.25),
+    "aproximando_h": 6,
+    "horizonte_aproximacao_h": 24
+}
+
+# Verificação de saúde em segundo plano (health_prober.py): status pelas últimas `window`
+# verificações; degradado com muitos erros ou p95 alto, offline após falhas seguidas.
+# Clientes HTTP repetem menos e desistem mais cedo de hosts degradados/offline
+HEALTH_CONFIG = {
+    "interval": 15,
+    "timeout": (2.0, 5.0),
+    "window": 20,
+    "degraded_error_rate": 0.2,
+    "degraded_p95_ms": 2000,
+    "offline_after_failures": 3,
+    "n8n_probe_path": "/healthz",
+    "degraded_max_retries": 1,
+    "offline_connect_timeout": 1.0
+}
+
 # Configurações do OpenAI
 OPENAI_CONFIG = {
     "api_key": os.getenv('OPENAI_API_KEY'),
@@ -58,45 +162,217 @@ PORTO_SANTOS_RULES = {
         "required_fields": ["numero_due", "navio", "agente", "carga"],
         "format": "PDF",
         "max_size_mb": 10,
-        "description": "Declaração Única de Exportação"
+        "description": "Declaração Única de Exportação",
+        "dpi": 150,
+        "grayscale": True
     },
     "Manifesto": {
         "required_fields": ["lista_carga", "origem", "destino", "peso"],
         "format": "PDF",
         "max_size_mb": 15,
-        "description": "Manifesto de Carga"
+        "description": "Manifesto de Carga",
+        "dpi": 150,
+        "grayscale": True
     },
     "Certificado_Sanitario": {
         "required_fields": ["autoridade_sanitaria", "data_inspecao", "resultado"],
         "format": "PDF",
         "max_size_mb": 5,
-        "description": "Certificado Sanitário ANVISA"
+        "description": "Certificado Sanitário ANVISA",
+        "dpi": 150,
+        "grayscale": True
     },
     "Certificado_Seguranca": {
         "required_fields": ["validade", "autoridade_emissora", "tipo_certificado"],
         "format": "PDF",
         "max_size_mb": 5,
-        "description": "Certificado de Segurança"
+        "description": "Certificado de Segurança",
+        "dpi": 150,
+        "grayscale": True
     },
     "Plano_Carga": {
         "required_fields": ["distribuicao_carga", "peso_total", "centro_gravidade"],
         "format": "PDF",
         "max_size_mb": 20,
-        "description": "Plano de Carregamento"
+        "description": "Plano de Carregamento",
+        "dpi": 200,
+        "grayscale": False
     },
     "Autorizacao_IBAMA": {
         "required_fields": ["numero_licenca", "validade", "tipo_carga"],
         "format": "PDF",
         "max_size_mb": 5,
-        "description": "Autorização Ambiental IBAMA"
+        "description": "Autorização Ambiental IBAMA",
+        "dpi": 150,
+        "grayscale": True
     }
 }
 
+# Codificação das páginas enviadas ao modelo de visão.
+# O GPT-4o (detail=high) reduz a imagem para caber em 2048x2048 e depois o lado menor para 768px,
+# então resoluções maiores só aumentam o payload.
+IMAGE_ENCODING_CONFIG = {
+    "format": "JPEG",  # JPEG, WEBP ou PNG
+    "quality": 80,
+    "max_long_side": 2048,
+    "max_short_side": 768,
+    "detail": "high"
+}
+
+# Rótulos que indicam onde cada campo obrigatório aparece no texto (sem acentos, minúsculas)
+FIELD_LABELS = {
+    "numero_due": ["numero da due", "n da due", "no due", "due n", "declaracao unica de exportacao", "due"],
+    "navio": ["navio", "embarcacao", "vessel", "nome do navio"],
+    "agente": ["agente", "agencia maritima", "agente maritimo", "agent"],
+    "carga": ["carga", "mercadoria", "cargo", "descricao da mercadoria"],
+    "lista_carga": ["lista de carga", "conhecimento de embarque", "bl", "container", "conteiner", "itens"],
+    "origem": ["origem", "porto de origem", "port of loading", "porto de embarque"],
+    "destino": ["destino", "porto de destino", "port of discharge", "porto de descarga"],
+    "peso": ["peso", "peso bruto", "gross weight", "kg", "toneladas"],
+    "autoridade_sanitaria": ["anvisa", "autoridade sanitaria", "vigilancia sanitaria"],
+    "data_inspecao": ["data da inspecao", "inspecionado em", "inspecao realizada"],
+    "resultado": ["resultado", "parecer", "conclusao"],
+    "validade": ["validade", "valido ate", "vencimento", "expira em"],
+    "autoridade_emissora": ["autoridade emissora", "emitido por", "orgao emissor", "capitania dos portos"],
+    "tipo_certificado": ["tipo de certificado", "certificado de", "modalidade"],
+    "distribuicao_carga": ["distribuicao da carga", "distribuicao", "porao", "bay", "estiva"],
+    "peso_total": ["peso total", "total weight", "deslocamento", "carga total"],
+    "centro_gravidade": ["centro de gravidade", "kg", "gm", "estabilidade"],
+    "numero_licenca": ["numero da licenca", "licenca n", "licenca", "autorizacao n"],
+    "tipo_carga": ["tipo de carga", "produto", "classe de risco"]
+}
+
+# Tipo do valor esperado após o rótulo de cada campo (padrão: "texto")
+FIELD_VALUE_TYPES = {
+    "numero_due": "due",
+    "data_inspecao": "data",
+    "validade": "data",
+    "peso": "peso",
+    "peso_total": "peso",
+    "numero_licenca": "codigo"
+}
+
+# Pré-validação local: só documentos ambíguos seguem para a IA
+PRE_VALIDATION_CONFIG = {
+    "enabled": True,
+    "min_text_chars": 300,
+    "pass_confidence": 0.9,
+    "fail_missing_ratio": 0.5,
+    # Rótulos mais curtos só contam como indício no formato "Rótulo: valor"
+    "min_label_chars": 4
+}
+
+# Orçamento do prompt de análise (tokens estimados localmente, sem chamar a API)
+PROMPT_CONFIG = {
+    "text_token_budget": 800,
+    "chars_per_token": 4,
+    "chunk_chars": 600,
+    "max_scan_pages": 30,
+    "max_images": 3,
+    # Camada de texto suficiente dispensa a renderização da página para a análise visual:
+    # ao menos min_page_chars caracteres (ou algum rótulo de campo obrigatório) e
+    # proporção mínima de caracteres legíveis (texto sem fonte mapeada vira "(cid:NN)")
+    "min_page_chars": 200,
+    "min_readable_ratio": 0.85
+}
+
 # Configurações do sistema
 SYSTEM_CONFIG = {
     "max_file_size_mb": 25,
     "supported_formats": ["pdf"],
     "max_notifications": 10,
     "refresh_interval": 30,
-    "ai_timeout": 30
+    "ai_timeout": 30,
+    "max_concurrent_api_calls": 8
+}
+
+# Diretório de dados locais (caches e bancos SQLite)
+DATA_DIR = os.getenv('PORTO_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+
+# Versão das regras: incremente ao mudar critérios de análise para invalidar o cache
+RULES_VERSION = "2024.6"
+
+# Cache persistente de resultados de análise de documentos
+CACHE_CONFIG = {
+    "path": os.path.join(DATA_DIR, "analysis_cache.sqlite3"),
+    "max_entries": 500,
+    "ttl_seconds": 7 * 24 * 3600
+}
+
+# Processamento em lote de documentos
+BATCH_CONFIG = {
+    "max_workers": 4,
+    "requests_per_minute": 30
+}
+
+# Sincronização incremental em segundo plano (autorizações, operações e escalas)
+SYNC_CONFIG = {
+    "path": os.path.join(DATA_DIR, "porto.sqlite3"),
+    "cursor_param": "updated_since",
+    # Desempate do cursor: id do último registro recebido com a mesma marca de atualização
+    "cursor_id_param": "after_id",
+    "page_size": 200,
+    "recursos": {
+        "autorizacoes": {"servico": "capitania", "id_field": "autorizacao_id"},
+        "operacoes": {"servico": "terminal", "id_field": "operacao_id"},
+        "atracacao": {"servico": "terminal", "id_field": "navio_id"},
+        "escalas": {"servico": "agencia", "id_field": "escala_id"}
+    }
+}
+
+# Repositório persistente de navios (mesmo banco local da sincronização)
+VESSEL_STORE_CONFIG = {
+    "path": SYNC_CONFIG["path"]
+}
+
+# Fila persistente de análises de documentos (processada por job_worker.py)
+JOB_QUEUE_CONFIG = {
+    "path": os.path.join(DATA_DIR, "jobs.sqlite3"),
+    "files_dir": os.path.join(DATA_DIR, "jobs"),
+    "max_attempts": 3,
+    "lease_seconds": 300,
+    # Renovação do lease enquanto o worker processa (bem abaixo de lease_seconds)
+    "heartbeat_seconds": 60,
+    "retry_backoff_seconds": 30,
+    "poll_interval": 1.0,
+    # Menor valor = maior prioridade
+    "priorities": {
+        "Certificado_Sanitario": 0,
+        "Certificado_Seguranca": 1,
+        "Autorizacao_IBAMA": 1,
+        "DUE": 2,
+        "Manifesto": 3,
+        "Plano_Carga": 4
+    }
+}
+
+# Pipeline de análise: etapas de CPU (texto, renderização, codificação) em processos,
+# chamada de IA em threads, sobrepondo o processamento de um documento à espera do outro
+PIPELINE_CONFIG = {
+    "cpu_workers": int(os.getenv("PIPELINE_CPU_WORKERS", str(os.cpu_count() or 1))),
+    "start_method": "spawn"
+}
+
+# Métricas de desempenho (página "Desempenho" e exportação no formato do Prometheus)
+METRICS_CONFIG = {
+    "prefix": "porto_",
+    "buckets": [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60],
+    "reservoir_size": 1024,
+    # Arquivo para o textfile collector do node_exporter, regravado a cada export_interval segundos
+    "export_path": os.getenv("METRICS_EXPORT_PATH", os.path.join(DATA_DIR, "metrics.prom")),
+    "export_interval": 15,
+    # Endpoint HTTP /metrics (0 = desativado)
+    "http_port": int(os.getenv("METRICS_PORT", "0"))
+}
+
+# Modo de memória limitada para uploads grandes: o PDF é copiado em blocos para disco,
+# páginas são renderizadas e codificadas uma a uma e as análises simultâneas reservam
+# memória de um orçamento comum antes de começar
+MEMORY_CONFIG = {
+    "bounded": os.getenv("PORTO_MEMORIA_LIMITADA", "0") == "1",
+    "max_memory_mb": int(os.getenv("PORTO_MEMORIA_MAXIMA_MB", "512")),
+    # Estimativa por documento: overhead fixo (pdfplumber, prompt, resposta) + bitmaps
+    "document_overhead_mb": 40,
+    "spool_chunk_bytes": 1024 * 1024,
+    "admission_timeout_s": 120
 }
@@ -0,0 +1,121 @@
+"""
+Gerenciador único, por processo, das conexões de saída (OpenAI, n8n e APIs AmiGU)
+
+Mantém os clientes com keep-alive e limite de conexões por host, preservados entre reruns
+e sessões do Streamlit, e contabiliza quantas requisições reaproveitaram conexões abertas.
+"""
+import hashlib
+import threading
+from collections import defaultdict
+from typing import Dict, Any, Optional
+
+import openai
+
+from config import CONNECTION_CONFIG
+from http_client import AmiguAPIClient, PooledHTTPClient
+from metrics import metrics
+
+
+class _OpenAITracer:
+    """Conta requisições e conexões novas do cliente OpenAI via eventos de trace do httpcore"""
+
+    def __init__(self, stats: Dict[str, Dict[str, int]], lock: threading.Lock):
+        self.stats = stats
+        self.lock = lock
+
+    def on_request(self, request) -> None:
+        host = request.url.host
+        with self.lock:
+            self.stats[host]["requisicoes"] += 1
+
+        def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                with self.lock:
+                    self.stats[host]["conexoes"] += 1
+        request.extensions["trace"] = trace
+
+
+class ConnectionManager:
+    """Dono dos clientes HTTP de saída; use get_connection_manager()"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.amigu_http = PooledHTTPClient()
+        self.amigu = AmiguAPIClient(self.amigu_http)
+        # n8n não recebe o cabeçalho de autenticação das APIs AmiGU
+        self.n8n = PooledHTTPClient(CONNECTION_CONFIG["n8n"], headers={"Content-Type": "application/json"})
+        self._openai_clients: Dict[str, openai.OpenAI] = {}
+        self._openai_stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"requisicoes": 0, "conexoes": 0})
+        self._openai_tracer = _OpenAITracer(self._openai_stats, self._lock)
+
+    def openai_client(self, api_key: str) -> openai.OpenAI:
+        """Cliente OpenAI compartilhado por chave de API (a chave não fica como chave do dicionário)"""
+        key_id = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+        with self._lock:
+            client = self._openai_clients.get(key_id)
+            if client is None:
+                config = CONNECTION_CONFIG["openai"]
+                # Limits/Timeout vêm do cliente HTTP que o próprio SDK usa (sem fixar a versão aqui)
+                limits_type = type(openai.DEFAULT_CONNECTION_LIMITS)
+                http_client = openai.DefaultHttpxClient(
+                    limits=limits_type(
+                        max_connections=config["max_connections"],
+                        max_keepalive_connections=config["max_keepalive_connections"],
+                        keepalive_expiry=config["keepalive_expiry"]
+                    ),
+                    timeout=openai.Timeout(config["read_timeout"], connect=config["connect_timeout"]),
+                    event_hooks={"request": [self._openai_tracer.on_request]}
+                )
+                client = openai.OpenAI(api_key=api_key, http_client=http_client)
+                self._openai_clients[key_id] = client
+        return client
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Requisições, conexões abertas e taxa de reaproveitamento por host"""
+        combined: Dict[str, Dict[str, int]] = defaultdict(lambda: {"requisicoes": 0, "conexoes": 0})
+        for http in (self.amigu_http, self.n8n):
+            for host, counts in http.connection_stats().items():
+                combined[host]["requisicoes"] += counts["requisicoes"]
+                combined[host]["conexoes"] += counts["conexoes"]
+        with self._lock:
+            for host, counts in self._openai_stats.items():
+                combined[host]["requisicoes"] += counts["requisicoes"]
+                combined[host]["conexoes"] += counts["conexoes"]
+
+        return {
+            host: {
+                **counts,
+                "reuso_percentual": round(100 * (1 - counts["conexoes"] / counts["requisicoes"]), 1)
+                if counts["requisicoes"] else 0.0
+            }
+            for host, counts in sorted(combined.items())
+        }
+
+    def close(self) -> None:
+        self.amigu_http.close()
+        self.n8n.close()
+        with self._lock:
+            for client in self._openai_clients.values():
+                client.close()
+            self._openai_clients.clear()
+
+
+_manager: Optional[ConnectionManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_connection_manager() -> ConnectionManager:
+    """Gerenciador único por processo, preservado entre reruns do Streamlit"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ConnectionManager()
+            metrics.register_collector(_connection_counters)
+        return _manager
+
+
+def _connection_counters():
+    """Contadores de conexões exportados junto com as demais métricas"""
+    for host, counts in get_connection_manager().stats().items():
+        yield "http_requisicoes_total", {"host": host}, counts["requisicoes"]
+        yield "http_conexoes_abertas_total", {"host": host}, counts["conexoes"]
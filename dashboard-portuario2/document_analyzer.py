@@ -1,93 +1,242 @@
 import base64
 import io
 import json
+import logging
+import os
+import tempfile
+import time
 import requests
-from typing import Dict, List, Any
+from contextlib import contextmanager
+from typing import Dict, List, Any, Callable, Iterable, Iterator, Optional, Tuple
 import pdfplumber
 from PIL import Image
 import pdf2image
 import openai
 import streamlit as st
 
+from config import (PORTO_SANTOS_RULES, BATCH_CONFIG, IMAGE_ENCODING_CONFIG, PROMPT_CONFIG,
+                    PRE_VALIDATION_CONFIG, JOB_QUEUE_CONFIG, PIPELINE_CONFIG, MEMORY_CONFIG)
+from analysis_cache import AnalysisCache, make_cache_key, make_cache_key_from_path
+from bounded_memory import SpooledPDFFile, estimate_document_mb, memory_budget
+from connections import get_connection_manager
+from batch_processor import BatchReport, infer_document_type, process_batch
+from job_queue import JobQueue, STATUS_CONCLUIDO, STATUS_ERRO
+from prompt_builder import (build_prompt_context, estimate_image_tokens, estimate_tokens, fields_in_text,
+                            vision_stats)
+from pre_validator import pre_validate, pre_validation_stats
+from streaming_json import IncrementalJSONParser
+from metrics import metrics, timed
+
+logger = logging.getLogger(__name__)
+
+# Orçamentos de texto: o prompt usa até PROMPT_TEXT_CHARS caracteres e a prévia 500
+PROMPT_TEXT_CHARS = PROMPT_CONFIG["text_token_budget"] * PROMPT_CONFIG["chars_per_token"]
+PREVIEW_TEXT_CHARS = 500
+
+# Histograma das etapas de process_document (rótulo "etapa")
+STAGE_METRIC = "analise_etapa_segundos"
+
+# Páginas enviadas para a análise visual e DPI padrão quando a regra não define
+ANALYSIS_PAGES = PROMPT_CONFIG["max_images"]
+DEFAULT_RENDER_DPI = 200
+
 class RealDocumentAnalyzer:
     """Analisador real de documentos portuários usando IA"""
     
-    def __init__(self, openai_api_key: str):
-        self.client = openai.OpenAI(api_key=openai_api_key)
+    def __init__(self, openai_api_key: str, cache: Optional[AnalysisCache] = None,
+                 bounded_memory: Optional[bool] = None):
+        self.openai_api_key = openai_api_key
+        self._client = None
+        self.cache = cache
+        self.image_encoding = IMAGE_ENCODING_CONFIG
+        # Limitador opcional de chamadas à IA (usado no processamento em lote)
+        self.rate_limiter = None
+        # Modo de memória limitada (ver bounded_memory.py)
+        self.bounded_memory = MEMORY_CONFIG["bounded"] if bounded_memory is None else bounded_memory
         
-        # Regras específicas do Porto de Santos
-        self.porto_santos_rules = {
-            "DUE": {
-                "required_fields": ["numero_due", "navio", "agente", "carga"],
-                "format": "PDF",
-                "max_size_mb": 10,
-                "description": "Declaração Única de Exportação"
-            },
-            "Manifesto": {
-                "required_fields": ["lista_carga", "origem", "destino", "peso"],
-                "format": "PDF", 
-                "max_size_mb": 15,
-                "description": "Manifesto de Carga"
-            },
-            "Certificado_Sanitario": {
-                "required_fields": ["autoridade_sanitaria", "data_inspecao", "resultado"],
-                "format": "PDF",
-                "max_size_mb": 5,
-                "description": "Certificado Sanitário ANVISA"
-            },
-            "Certificado_Seguranca": {
-                "required_fields": ["validade", "autoridade_emissora", "tipo_certificado"],
-                "format": "PDF",
-                "max_size_mb": 5,
-                "description": "Certificado de Segurança"
-            },
-            "Plano_Carga": {
-                "required_fields": ["distribuicao_carga", "peso_total", "centro_gravidade"],
-                "format": "PDF",
-                "max_size_mb": 20,
-                "description": "Plano de Carregamento"
-            }
-        }
+        # Regras específicas do Porto de Santos (fonte única em config.py)
+        self.porto_santos_rules = PORTO_SANTOS_RULES
+    
+    @property
+    def client(self) -> openai.OpenAI:
+        """Cliente OpenAI do processo (pool de conexões compartilhado entre analisadores e reruns)"""
+        if self._client is None:
+            self._client = get_connection_manager().openai_client(self.openai_api_key)
+        return self._client
     
-    def extract_text_from_pdf(self, pdf_file) -> str:
-        """Extrai texto do PDF usando pdfplumber"""
+    def __getstate__(self) -> Dict[str, Any]:
+        # Enviado aos processos do pipeline apenas para as etapas de CPU:
+        # cliente HTTP, cache SQLite e limitador ficam no processo principal
+        state = self.__dict__.copy()
+        state.update(_client=None, cache=None, rate_limiter=None)
+        return state
+    
+    def iter_page_texts(self, pdf_file, max_pages: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """Gera (número da página, texto) sob demanda, liberando o cache do pdfplumber a cada página.
+        
+        Páginas sem camada de texto (escaneadas) vêm com texto vazio.
+        """
+        if hasattr(pdf_file, "seek"):
+            pdf_file.seek(0)
+        with pdfplumber.open(pdf_file) as pdf:
+            for index, page in enumerate(pdf.pages):
+                if max_pages is not None and index >= max_pages:
+                    break
+                page_text = page.extract_text()
+                page.flush_cache()
+                yield index + 1, page_text or ""
+    
+    def extract_pages_for_prompt(self, pdf_file, document_type: str) -> List[Tuple[int, str]]:
+        """Lê páginas até localizar os rótulos de todos os campos obrigatórios e encher o orçamento.
+        
+        Retorna todas as páginas lidas, inclusive as sem texto.
+        """
+        required = self.porto_santos_rules.get(document_type, {}).get("required_fields", [])
+        pages, located, total_chars = [], set(), 0
         try:
-            text = ""
-            with pdfplumber.open(pdf_file) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            return text
+            for page_number, page_text in self.iter_page_texts(pdf_file, PROMPT_CONFIG["max_scan_pages"]):
+                pages.append((page_number, page_text))
+                located.update(fields_in_text(page_text, required))
+                total_chars += len(page_text)
+                if len(located) == len(required) and total_chars >= PROMPT_TEXT_CHARS:
+                    break
         except Exception as e:
             st.error(f"Erro ao extrair texto do PDF: {str(e)}")
-            return ""
+        return pages
+    
+    def count_pdf_pages(self, pdf_file) -> int:
+        """Obtém o número de páginas a partir dos metadados do PDF, sem renderizar"""
+        try:
+            if isinstance(pdf_file, SpooledPDFFile):
+                info = pdf2image.pdfinfo_from_path(pdf_file.path)
+            else:
+                info = pdf2image.pdfinfo_from_bytes(pdf_file.getvalue())
+            return int(info.get("Pages", 0))
+        except Exception as e:
+            st.error(f"Erro ao ler metadados do PDF: {str(e)}")
+            return 0
     
-    def convert_pdf_to_images(self, pdf_file) -> List[Image.Image]:
-        """Converte PDF em imagens para análise visual"""
+    def get_render_dpi(self, document_type: Optional[str]) -> int:
+        """DPI de renderização definido nas regras do tipo de documento"""
+        return self.porto_santos_rules.get(document_type, {}).get("dpi", DEFAULT_RENDER_DPI)
+    
+    def iter_pdf_page_images(self, pdf_bytes: bytes, pages: Iterable[int], dpi: int,
+                             grayscale: bool = False) -> Iterator[Image.Image]:
+        """Renderiza sob demanda apenas as páginas pedidas (numeração a partir de 1)"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "documento.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(pdf_bytes)
+            yield from self.iter_pdf_path_images(pdf_path, pages, dpi, grayscale)
+    
+    def iter_pdf_path_images(self, pdf_path: str, pages: Iterable[int], dpi: int,
+                             grayscale: bool = False) -> Iterator[Image.Image]:
+        """Renderiza uma página por vez a partir de um PDF em disco"""
+        for page_number in pages:
+            with metrics.span(STAGE_METRIC, etapa="rasterizacao"):
+                rendered = pdf2image.convert_from_path(
+                    pdf_path, dpi=dpi, first_page=page_number, last_page=page_number, grayscale=grayscale
+                )
+            if rendered:
+                yield rendered[0]
+    
+    def convert_pdf_to_images(self, pdf_file, document_type: Optional[str] = None,
+                              pages: Optional[Iterable[int]] = None,
+                              total_pages: Optional[int] = None, encode: bool = False) -> List[Any]:
+        """Converte em imagens apenas as páginas usadas na análise visual.
+        
+        Com encode=True cada página é codificada (encode_page_image) e o bitmap liberado antes
+        da próxima ser renderizada.
+        """
         try:
-            # Salva temporariamente o arquivo
-            with open("temp_pdf.pdf", "wb") as f:
-                f.write(pdf_file.getvalue())
+            if pages is None:
+                if total_pages is None:
+                    total_pages = self.count_pdf_pages(pdf_file)
+                pages = range(1, min(total_pages, ANALYSIS_PAGES) + 1)
             
-            # Converte para imagens
-            images = pdf2image.convert_from_path("temp_pdf.pdf", dpi=200)
-            return images
+            dpi = self.get_render_dpi(document_type)
+            grayscale = bool(self.porto_santos_rules.get(document_type, {}).get("grayscale"))
+            if isinstance(pdf_file, SpooledPDFFile):
+                images = self.iter_pdf_path_images(pdf_file.path, pages, dpi, grayscale)
+            else:
+                images = self.iter_pdf_page_images(pdf_file.getvalue(), pages, dpi, grayscale)
+            if not encode:
+                return list(images)
+            return [self._encode_and_release(image, document_type) for image in images]
         except Exception as e:
             st.error(f"Erro ao converter PDF para imagens: {str(e)}")
             return []
     
-    def encode_image_to_base64(self, image: Image.Image) -> str:
-        """Codifica imagem para base64"""
+    def prepare_image_for_vision(self, image: Image.Image, document_type: Optional[str] = None) -> Image.Image:
+        """Reduz a imagem à resolução efetiva do modelo e converte para tons de cinza quando configurado"""
+        config = self.image_encoding
+        long_side, short_side = max(image.size), min(image.size)
+        scale = min(1.0, config["max_long_side"] / long_side, config["max_short_side"] / short_side)
+        if scale < 1.0:
+            new_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+            image = image.resize(new_size, Image.LANCZOS)
+        
+        if self.porto_santos_rules.get(document_type, {}).get("grayscale"):
+            image = image.convert("L")
+        elif image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        return image
+    
+    @timed(STAGE_METRIC, etapa="codificacao")
+    def encode_page_image(self, image: Image.Image, document_type: Optional[str] = None) -> Dict[str, Any]:
+        """Prepara e codifica uma página, devolvendo o base64 e as dimensões enviadas ao modelo"""
+        config = self.image_encoding
+        image = self.prepare_image_for_vision(image, document_type)
         buffer = io.BytesIO()
-        image.save(buffer, format="PNG")
-        return base64.b64encode(buffer.getvalue()).decode('utf-8')
+        if config["format"].upper() == "PNG":
+            image.save(buffer, format="PNG", optimize=True)
+        else:
+            image.save(buffer, format=config["format"], quality=config["quality"], optimize=True)
+        return {
+            "data": base64.b64encode(buffer.getvalue()).decode('utf-8'),
+            "width": image.width,
+            "height": image.height
+        }
     
-    def analyze_document_with_ai(self, document_type: str, text_content: str, images: List[Image.Image]) -> Dict[str, Any]:
-        """Analisa documento usando GPT-4 Vision"""
+    def render_encoded_pages(self, pdf_path: str, pages: Iterable[int],
+                             document_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Renderiza e codifica as páginas pedidas de um PDF em disco (unidade de trabalho do pool)"""
+        dpi = self.get_render_dpi(document_type)
+        grayscale = bool(self.porto_santos_rules.get(document_type, {}).get("grayscale"))
+        return [self._encode_and_release(image, document_type)
+                for image in self.iter_pdf_path_images(pdf_path, pages, dpi, grayscale)]
+    
+    def _encode_and_release(self, image: Image.Image, document_type: Optional[str]) -> Dict[str, Any]:
+        try:
+            return self.encode_page_image(image, document_type)
+        finally:
+            image.close()
+    
+    def image_mime_type(self) -> str:
+        return f"image/{self.image_encoding['format'].lower()}"
+    
+    def analyze_document_with_ai(self, document_type: str, text_content: str, images: List[Any],
+                                 on_field: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+        """Analisa documento usando GPT-4 Vision.
+        
+        images aceita imagens PIL ou páginas já codificadas por encode_page_image.
+        Com on_field, a resposta é recebida em streaming e cada campo do JSON é entregue
+        ao callback assim que termina de chegar.
+        """
+        rules = self.porto_santos_rules.get(document_type, {})
+        if not text_content.strip() and not images:
+            # Nada foi extraído (texto ou páginas renderizadas): falha em vez de enviar um prompt vazio
+            return {
+                "valido": False,
+                "campos_encontrados": [],
+                "campos_faltantes": rules.get('required_fields', []),
+                "observacoes": ["Não foi possível extrair texto nem imagens do documento para a análise"],
+                "score_conformidade": 0,
+                "recomendacoes": ["Verificar se o PDF está íntegro e enviar novamente"],
+                "erro_analise": True
+            }
+        
         try:
-            rules = self.porto_santos_rules.get(document_type, {})
-            
             # Prepara o prompt específico para o tipo de documento
             prompt = f"""
             Analise este documento portuário do tipo {document_type} ({rules.get('description', '')}).
@@ -97,8 +246,8 @@ class RealDocumentAnalyzer:
             - Formato: {rules.get('format', 'PDF')}
             - Tamanho máximo: {rules.get('max_size_mb', 10)}MB
             
-            Texto extraído do documento:
-            {text_content[:2000]}...
+            Trechos do documento relevantes para os campos obrigatórios:
+            {text_content[:PROMPT_TEXT_CHARS]}
             
             Por favor, analise e retorne um JSON com:
             1. "valido": true/false
@@ -119,44 +268,96 @@ class RealDocumentAnalyzer:
             ]
             
             # Adiciona imagens se disponíveis
-            if images:
-                for i, image in enumerate(images[:3]):  # Máximo 3 páginas
-                    base64_image = self.encode_image_to_base64(image)
-                    messages[0]["content"].append({
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/png;base64,{base64_image}"
-                        }
-                    })
+            image_bytes = 0
+            encoded_pages = [image if isinstance(image, dict) else self.encode_page_image(image, document_type)
+                             for image in (images or [])[:ANALYSIS_PAGES]]
+            for encoded in encoded_pages:
+                image_bytes += len(encoded["data"])
+                messages[0]["content"].append({
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:{self.image_mime_type()};base64,{encoded['data']}",
+                        "detail": self.image_encoding["detail"]
+                    }
+                })
             
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=messages,
-                max_tokens=1000,
-                temperature=0.1
+            payload_bytes = len(json.dumps(messages, ensure_ascii=False).encode("utf-8"))
+            estimated_tokens = estimate_tokens(prompt) + sum(
+                estimate_image_tokens(encoded["width"], encoded["height"], self.image_encoding["detail"])
+                for encoded in encoded_pages
             )
+            logger.info("Requisição de análise %s: ~%d tokens, %d bytes (%d de imagens, %d páginas)",
+                        document_type, estimated_tokens, payload_bytes, image_bytes,
+                        len(encoded_pages))
+            
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            
+            started = time.perf_counter()
+            first_field_latency = None
+            
+            with metrics.span(STAGE_METRIC, etapa="llm"):
+                if on_field is None:
+                    response = self.client.chat.completions.create(
+                        model="gpt-4o",
+                        messages=messages,
+                        max_tokens=1000,
+                        temperature=0.1
+                    )
+                    response_text = response.choices[0].message.content
+                else:
+                    stream = self.client.chat.completions.create(
+                        model="gpt-4o",
+                        messages=messages,
+                        max_tokens=1000,
+                        temperature=0.1,
+                        stream=True
+                    )
+                    parser = IncrementalJSONParser()
+                    for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if not delta:
+                            continue
+                        for key, value in parser.feed(delta):
+                            if first_field_latency is None:
+                                first_field_latency = time.perf_counter() - started
+                            on_field(key, value)
+                    response_text = parser.buffer
+            
+            total_latency = time.perf_counter() - started
             
             # Tenta extrair JSON da resposta
-            response_text = response.choices[0].message.content
-            try:
-                # Procura por JSON na resposta
-                start = response_text.find('{')
-                end = response_text.rfind('}') + 1
-                if start != -1 and end != 0:
-                    json_str = response_text[start:end]
-                    return json.loads(json_str)
-            except:
-                pass
+            with metrics.span(STAGE_METRIC, etapa="parsing"):
+                analysis = None
+                try:
+                    # Procura por JSON na resposta
+                    start = response_text.find('{')
+                    end = response_text.rfind('}') + 1
+                    if start != -1 and end != 0:
+                        json_str = response_text[start:end]
+                        analysis = json.loads(json_str)
+                except:
+                    pass
             
-            # Se não conseguir extrair JSON, retorna análise básica
-            return {
-                "valido": "aprovado" in response_text.lower(),
-                "campos_encontrados": [],
-                "campos_faltantes": rules.get('required_fields', []),
-                "observacoes": [response_text[:200] + "..."],
-                "score_conformidade": 50,
-                "recomendacoes": ["Revisar documento conforme regras do porto"]
-            }
+                # Se não conseguir extrair JSON, retorna análise básica
+                if not isinstance(analysis, dict):
+                    analysis = {
+                        "valido": "aprovado" in response_text.lower(),
+                        "campos_encontrados": [],
+                        "campos_faltantes": rules.get('required_fields', []),
+                        "observacoes": [response_text[:200] + "..."],
+                        "score_conformidade": 50,
+                        "recomendacoes": ["Revisar documento conforme regras do porto"]
+                    }
+            
+            analysis["payload_bytes"] = payload_bytes
+            analysis["estimated_tokens"] = estimated_tokens
+            analysis["latencia_total_s"] = round(total_latency, 2)
+            if first_field_latency is not None:
+                analysis["latencia_primeiro_campo_s"] = round(first_field_latency, 2)
+            return analysis
             
         except Exception as e:
             st.error(f"Erro na análise por IA: {str(e)}")
@@ -166,7 +367,8 @@ class RealDocumentAnalyzer:
                 "campos_faltantes": rules.get('required_fields', []),
                 "observacoes": [f"Erro na análise: {str(e)}"],
                 "score_conformidade": 0,
-                "recomendacoes": ["Verificar documento e tentar novamente"]
+                "recomendacoes": ["Verificar documento e tentar novamente"],
+                "erro_analise": True
             }
     
     def validate_file_format(self, file, document_type: str) -> Dict[str, Any]:
@@ -182,43 +384,174 @@ class RealDocumentAnalyzer:
         
         return validation
     
-    def process_document(self, file, document_type: str) -> Dict[str, Any]:
-        """Processa documento completo"""
-        
-        # 1. Validação básica
+    @timed(STAGE_METRIC, etapa="validacao")
+    def start_document(self, file, document_type: str) -> Dict[str, Any]:
+        """Validação do arquivo e consulta ao cache; "result" vem preenchido quando não há o que processar"""
         file_validation = self.validate_file_format(file, document_type)
+        state = {"document_type": document_type, "file_validation": file_validation,
+                 "cache_key": None, "result": None}
         
         if not file_validation["formato_valido"]:
-            return {
+            state["result"] = {
                 "status": "erro",
                 "mensagem": "Formato de arquivo inválido. Apenas PDF é aceito.",
                 "detalhes": file_validation
             }
+            return state
         
         if not file_validation["tamanho_valido"]:
-            return {
+            state["result"] = {
                 "status": "erro", 
                 "mensagem": f"Arquivo muito grande. Máximo: {self.porto_santos_rules[document_type]['max_size_mb']}MB",
                 "detalhes": file_validation
             }
+            return state
         
-        # 2. Extração de texto
-        text_content = self.extract_text_from_pdf(file)
-        
-        # 3. Conversão para imagens
-        images = self.convert_pdf_to_images(file)
-        
-        # 4. Análise por IA
-        ai_analysis = self.analyze_document_with_ai(document_type, text_content, images)
-        
-        # 5. Resultado final
+        # Resultado já calculado para este conteúdo/tipo/versão de regras
+        if self.cache is not None:
+            if isinstance(file, SpooledPDFFile):
+                state["cache_key"] = make_cache_key_from_path(file.path, document_type)
+            else:
+                state["cache_key"] = make_cache_key(file.getvalue(), document_type)
+            cached = self.cache.get(state["cache_key"])
+            if cached is not None:
+                cached["cache_hit"] = True
+                state["result"] = cached
+        return state
+    
+    @timed(STAGE_METRIC, etapa="extracao")
+    def extract_document_text(self, file, document_type: str) -> Dict[str, Any]:
+        """Extração de texto e seleção dos trechos/páginas dentro do orçamento de tokens"""
+        pages = self.extract_pages_for_prompt(file, document_type)
+        total_pages = self.count_pdf_pages(file)
         return {
+            "text_content": "\n".join(page_text for _, page_text in pages if page_text),
+            "total_pages": total_pages,
+            "prompt_context": build_prompt_context(document_type, pages, total_pages)
+        }
+    
+    @timed(STAGE_METRIC, etapa="pre_validacao")
+    def decide_locally(self, document_type: str, extraction: Dict[str, Any]) -> Dict[str, Any]:
+        """Pré-validação local: só documentos ambíguos seguem para imagens e IA"""
+        if not PRE_VALIDATION_CONFIG["enabled"]:
+            return {"decisao": "ambiguo"}
+        local_validation = pre_validate(document_type, extraction["text_content"])
+        # Campo ausente só reprova se todas as páginas lidas têm texto utilizável: em PDFs
+        # mistos ele pode estar numa página escaneada, que só a IA enxerga
+        prompt_context = extraction["prompt_context"]
+        if (local_validation["decisao"] == "reprovado"
+                and len(prompt_context["text_pages"]) < prompt_context["scanned_pages"]):
+            local_validation["decisao"] = "ambiguo"
+        pre_validation_stats.record(local_validation["decisao"])
+        return local_validation
+    
+    def select_vision_pages(self, extraction: Dict[str, Any]) -> List[int]:
+        """Páginas a renderizar para a IA, registrando as renderizações evitadas pela camada de texto"""
+        image_pages = extraction["prompt_context"]["image_pages"]
+        considered = min(extraction["total_pages"], ANALYSIS_PAGES)
+        vision_stats.record(len(image_pages), max(0, considered - len(image_pages)))
+        return image_pages
+    
+    def finish_document(self, state: Dict[str, Any], extraction: Dict[str, Any],
+                        ai_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Monta o resultado final e o grava no cache"""
+        text_content = extraction["text_content"]
+        result = {
             "status": "sucesso",
-            "validacao_arquivo": file_validation,
+            "validacao_arquivo": state["file_validation"],
             "analise_ia": ai_analysis,
-            "texto_extraido": text_content[:500] + "..." if len(text_content) > 500 else text_content,
-            "total_paginas": len(images)
+            "texto_extraido": text_content[:PREVIEW_TEXT_CHARS] + "..." if len(text_content) > PREVIEW_TEXT_CHARS else text_content,
+            "total_paginas": extraction["total_pages"],
+            "payload_bytes": ai_analysis.get("payload_bytes", 0),
+            "estimated_tokens": ai_analysis.get("estimated_tokens", 0)
         }
+        
+        # Falhas na chamada de IA não são armazenadas para permitir nova tentativa
+        if state["cache_key"] is not None and not ai_analysis.get("erro_analise"):
+            self.cache.set(state["cache_key"], state["document_type"], result)
+        
+        result["cache_hit"] = False
+        return result
+    
+    def record_outcome(self, document_type: str, result: Dict[str, Any]) -> None:
+        """Contabiliza o documento pela origem do resultado (cache, validador local, IA ou erro)"""
+        ai_result = result.get("analise_ia", {})
+        if result.get("status") != "sucesso" or ai_result.get("erro_analise"):
+            origin = "erro"
+        elif result.get("cache_hit"):
+            origin = "cache"
+        else:
+            origin = ai_result.get("origem", "ia")
+        metrics.inc("analise_documentos_total", tipo=document_type, origem=origin)
+    
+    def process_document(self, file, document_type: str,
+                         on_field: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+        """Processa documento completo (on_field recebe os campos da IA conforme chegam)"""
+        with metrics.span("analise_documento_segundos", tipo=document_type):
+            if self.bounded_memory:
+                result = self._process_document_bounded(file, document_type, on_field)
+            else:
+                result = self._process_document(file, document_type, on_field)
+        self.record_outcome(document_type, result)
+        return result
+    
+    def _process_document_bounded(self, file, document_type: str,
+                                  on_field: Optional[Callable[[str, Any], None]]) -> Dict[str, Any]:
+        """Modo de memória limitada: reserva do orçamento comum e processamento a partir do disco"""
+        validation = self.validate_file_format(file, document_type)
+        if not (validation["formato_valido"] and validation["tamanho_valido"]):
+            return self.start_document(file, document_type)["result"]
+        
+        with self.bounded_document(file, document_type) as spooled:
+            return self._process_document(spooled, document_type, on_field)
+    
+    @contextmanager
+    def bounded_document(self, file, document_type: str) -> Iterator[SpooledPDFFile]:
+        """Reserva a memória estimada no orçamento comum e copia o upload para o disco"""
+        rules = self.porto_santos_rules.get(document_type, {})
+        estimate = estimate_document_mb(file.size, self.get_render_dpi(document_type), bool(rules.get("grayscale")))
+        with memory_budget.reserve(estimate):
+            with SpooledPDFFile(file) as spooled:
+                yield spooled
+    
+    def _process_document(self, file, document_type: str,
+                          on_field: Optional[Callable[[str, Any], None]]) -> Dict[str, Any]:
+        # 1. Validação básica e cache
+        state = self.start_document(file, document_type)
+        if state["result"] is not None:
+            return state["result"]
+        
+        # 2. Extração de texto
+        extraction = self.extract_document_text(file, document_type)
+        
+        # 3. Pré-validação local
+        local_validation = self.decide_locally(document_type, extraction)
+        if local_validation["decisao"] != "ambiguo":
+            ai_analysis = local_validation["resultado"]
+        else:
+            # 4. Conversão para imagens (apenas páginas escaneadas ou sem texto utilizável)
+            prompt_context = extraction["prompt_context"]
+            image_pages = self.select_vision_pages(extraction)
+            images = []
+            if image_pages:
+                images = self.convert_pdf_to_images(file, document_type, pages=image_pages,
+                                                    encode=self.bounded_memory)
+            
+            # 5. Análise por IA
+            ai_analysis = self.analyze_document_with_ai(document_type, prompt_context["text"], images, on_field)
+        
+        # 6. Resultado final
+        return self.finish_document(state, extraction, ai_analysis)
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """Fila persistente compartilhada com os processos de job_worker.py"""
+    return JobQueue()
+
+@st.cache_resource
+def get_analysis_cache() -> AnalysisCache:
+    """Cache de análises compartilhado entre sessões e reruns do Streamlit"""
+    return AnalysisCache()
 
 def create_document_upload_interface():
     """Interface de upload de documentos no Streamlit"""
@@ -232,7 +565,8 @@ def create_document_upload_interface():
         st.warning("⚠️ Configure sua OpenAI API Key na barra lateral para habilitar a análise por IA")
         return
     
-    analyzer = RealDocumentAnalyzer(openai_key)
+    analysis_cache = get_analysis_cache()
+    analyzer = RealDocumentAnalyzer(openai_key, cache=analysis_cache)
     
     # Seleção do tipo de documento
     document_types = list(analyzer.porto_santos_rules.keys())
@@ -249,6 +583,15 @@ def create_document_upload_interface():
         st.write(f"**Formato:** {rules['format']}")
         st.write(f"**Tamanho máximo:** {rules['max_size_mb']}MB")
     
+    mode = st.radio("Modo de envio", ["Documento único", "Lote (vários PDFs)", "Fila em segundo plano"],
+                    horizontal=True)
+    if mode == "Lote (vários PDFs)":
+        create_batch_upload_interface(analyzer, selected_type)
+        return
+    if mode == "Fila em segundo plano":
+        create_queue_upload_interface(analyzer, selected_type)
+        return
+    
     # Upload do arquivo
     uploaded_file = st.file_uploader(
         f"Enviar {rules['description']}",
@@ -268,54 +611,205 @@ def create_document_upload_interface():
         
         # Botão para processar
         if st.button("🔍 Analisar Documento", type="primary"):
-            with st.spinner("Analisando documento..."):
-                result = analyzer.process_document(uploaded_file, selected_type)
-                
-                if result["status"] == "erro":
-                    st.error(f"❌ {result['mensagem']}")
-                    st.json(result["detalhes"])
-                else:
-                    # Mostra resultados da análise
-                    st.success("✅ Documento processado com sucesso!")
-                    
-                    # Análise por IA
-                    ai_result = result["analise_ia"]
-                    
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        if ai_result["valido"]:
+            # Campos da IA aparecem assim que são recebidos; o resultado completo substitui a prévia
+            live_preview = st.empty()
+            live_fields = {}
+            
+            def show_field(key, value):
+                live_fields[key] = value
+                with live_preview.container():
+                    st.caption("⏳ Recebendo análise da IA...")
+                    if "valido" in live_fields:
+                        if live_fields["valido"]:
                             st.success("✅ Documento Válido")
                         else:
                             st.error("❌ Documento Inválido")
-                    
-                    with col2:
-                        st.metric("Score de Conformidade", f"{ai_result['score_conformidade']}/100")
-                    
-                    # Campos encontrados/faltantes
-                    if ai_result["campos_encontrados"]:
-                        st.write("**✅ Campos Encontrados:**")
-                        for campo in ai_result["campos_encontrados"]:
-                            st.write(f"- {campo}")
-                    
-                    if ai_result["campos_faltantes"]:
-                        st.write("**❌ Campos Faltantes:**")
-                        for campo in ai_result["campos_faltantes"]:
-                            st.write(f"- {campo}")
-                    
-                    # Observações e recomendações
-                    if ai_result["observacoes"]:
-                        with st.expander("📝 Observações"):
-                            for obs in ai_result["observacoes"]:
-                                st.write(f"• {obs}")
-                    
-                    if ai_result["recomendacoes"]:
-                        with st.expander("💡 Recomendações"):
-                            for rec in ai_result["recomendacoes"]:
-                                st.write(f"• {rec}")
-                    
-                    # Texto extraído
-                    with st.expander("📄 Texto Extraído"):
-                        st.text_area("Conteúdo", result["texto_extraido"], height=200)
+                    if "score_conformidade" in live_fields:
+                        st.metric("Score de Conformidade", f"{live_fields['score_conformidade']}/100")
+                    if live_fields.get("campos_encontrados"):
+                        st.write("**✅ Campos Encontrados:** " + ", ".join(map(str, live_fields["campos_encontrados"])))
+                    if live_fields.get("campos_faltantes"):
+                        st.write("**❌ Campos Faltantes:** " + ", ".join(map(str, live_fields["campos_faltantes"])))
+            
+            with st.spinner("Analisando documento..."):
+                result = analyzer.process_document(uploaded_file, selected_type, on_field=show_field)
+            live_preview.empty()
+            
+            render_analysis_result(result, analysis_cache)
+
+def render_analysis_result(result: Dict[str, Any], analysis_cache: Optional[AnalysisCache] = None):
+    """Exibe o resultado de process_document"""
+    
+    if result["status"] == "erro":
+        st.error(f"❌ {result['mensagem']}")
+        st.json(result["detalhes"])
+    else:
+        # Mostra resultados da análise
+        st.success("✅ Documento processado com sucesso!")
+        if result.get("cache_hit") and analysis_cache is not None:
+            stats = analysis_cache.stats()
+            st.caption(f"⚡ Resultado recuperado do cache "
+                       f"(acertos: {stats['hits']}, faltas: {stats['misses']}, "
+                       f"taxa: {stats['hit_rate']:.0%})")
+        elif result.get("cache_hit"):
+            # Resultados da fila vêm do cache do worker, em outro processo
+            st.caption("⚡ Resultado recuperado do cache")
+        
+        # Análise por IA
+        ai_result = result["analise_ia"]
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if ai_result["valido"]:
+                st.success("✅ Documento Válido")
+            else:
+                st.error("❌ Documento Inválido")
+        
+        with col2:
+            st.metric("Score de Conformidade", f"{ai_result['score_conformidade']}/100")
+        
+        if ai_result.get("origem") == "validador_local":
+            stats = pre_validation_stats.summary()
+            st.caption(f"⚡ Decidido pela validação local (confiança {ai_result['confianca']:.0%}), "
+                       f"sem chamada à IA - {stats['percentual_sem_ia']}% dos documentos "
+                       f"desta instância dispensaram a IA")
+        elif result.get("payload_bytes"):
+            st.caption(f"📦 Payload enviado à IA: {result['payload_bytes'] / 1024:.0f} KB, "
+                       f"~{result.get('estimated_tokens', 0)} tokens "
+                       f"({result['total_paginas']} páginas no documento)")
+            stats = vision_stats.summary()
+            if stats["paginas_evitadas"]:
+                st.caption(f"🖼️ Camada de texto suficiente: {stats['percentual_paginas_evitadas']}% das "
+                           f"renderizações evitadas nesta instância "
+                           f"({stats['documentos_sem_imagens']}/{stats['documentos']} documentos sem imagens)")
+        if ai_result.get("latencia_total_s") is not None and not result.get("cache_hit"):
+            st.caption(f"⏱️ Primeiro campo em {ai_result.get('latencia_primeiro_campo_s', '-')}s, "
+                       f"resposta completa em {ai_result['latencia_total_s']}s")
+        
+        # Campos encontrados/faltantes
+        if ai_result["campos_encontrados"]:
+            st.write("**✅ Campos Encontrados:**")
+            for campo in ai_result["campos_encontrados"]:
+                st.write(f"- {campo}")
+        
+        if ai_result["campos_faltantes"]:
+            st.write("**❌ Campos Faltantes:**")
+            for campo in ai_result["campos_faltantes"]:
+                st.write(f"- {campo}")
+        
+        # Observações e recomendações
+        if ai_result["observacoes"]:
+            with st.expander("📝 Observações"):
+                for obs in ai_result["observacoes"]:
+                    st.write(f"• {obs}")
+        
+        if ai_result["recomendacoes"]:
+            with st.expander("💡 Recomendações"):
+                for rec in ai_result["recomendacoes"]:
+                    st.write(f"• {rec}")
+        
+        # Texto extraído
+        with st.expander("📄 Texto Extraído"):
+            st.text_area("Conteúdo", result["texto_extraido"], height=200)
+
+def create_batch_upload_interface(analyzer: RealDocumentAnalyzer, default_type: str):
+    """Interface de envio em lote: vários PDFs analisados em paralelo"""
+    
+    uploaded_files = st.file_uploader(
+        "Enviar documentos da escala",
+        type=['pdf'],
+        accept_multiple_files=True,
+        help="O tipo é deduzido pelo prefixo do nome (ex: Manifesto_MSC.pdf); "
+             f"caso contrário é usado {default_type}"
+    )
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        max_workers = st.slider("Análises simultâneas", 1, 16, BATCH_CONFIG["max_workers"])
+    with col2:
+        requests_per_minute = st.number_input(
+            "Limite de chamadas de IA por minuto", min_value=0,
+            value=BATCH_CONFIG["requests_per_minute"], help="0 = sem limite"
+        )
+    with col3:
+        cpu_workers = st.number_input(
+            "Processos de CPU", min_value=0, value=min(PIPELINE_CONFIG["cpu_workers"], max_workers),
+            help="Extração, renderização e codificação em paralelo (0 = nas próprias threads)"
+        )
+    
+    if uploaded_files and st.button("🔍 Analisar Lote", type="primary"):
+        items = [(f, infer_document_type(f.name, default_type)) for f in uploaded_files]
+        report = BatchReport()
+        progress = st.progress(0.0, text="Analisando documentos...")
+        table = st.empty()
+        
+        for row in process_batch(analyzer, items, max_workers, requests_per_minute, cpu_workers):
+            report.add(row)
+            progress.progress(len(report.rows) / len(items),
+                              text=f"{len(report.rows)}/{len(items)} documentos analisados")
+            table.dataframe(report.rows, use_container_width=True)
+        
+        summary = report.summary()
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Documentos", summary["documentos"])
+        with col2:
+            st.metric("Erros", summary["erros"])
+        with col3:
+            st.metric("Tempo Total", f"{summary['tempo_total_s']}s")
+        with col4:
+            st.metric("Vazão", f"{summary['docs_por_minuto']} docs/min")
+
+def create_queue_upload_interface(analyzer: RealDocumentAnalyzer, selected_type: str):
+    """Envio para a fila persistente: a análise roda nos processos de job_worker.py"""
+    
+    queue = get_job_queue()
+    uploaded_files = st.file_uploader(
+        "Enviar documentos para a fila",
+        type=['pdf'],
+        accept_multiple_files=True,
+        help="Os documentos são analisados em segundo plano por job_worker.py"
+    )
+    
+    if uploaded_files and st.button("📥 Enfileirar", type="primary"):
+        job_ids = st.session_state.setdefault("analysis_jobs", [])
+        for uploaded_file in uploaded_files:
+            validation = analyzer.validate_file_format(uploaded_file, selected_type)
+            if not (validation["formato_valido"] and validation["tamanho_valido"]):
+                st.error(f"{uploaded_file.name}: formato ou tamanho inválido ({validation['tamanho_mb']}MB)")
+                continue
+            job_ids.append(queue.submit(uploaded_file.getvalue(), uploaded_file.name, selected_type))
+        st.success(f"{len(job_ids)} documento(s) na fila desta sessão")
+    
+    show_queued_jobs(queue)
+
+@st.fragment(run_every=JOB_QUEUE_CONFIG["poll_interval"] * 2)
+def show_queued_jobs(queue: JobQueue):
+    """Acompanha os jobs desta sessão sem bloquear o restante da página"""
+    
+    depth = queue.depth()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Na Fila", depth["pendente"])
+    with col2:
+        st.metric("Processando", depth["processando"])
+    with col3:
+        st.metric("Concluídos", depth["concluido"])
+    with col4:
+        st.metric("Com Erro", depth["erro"])
+    
+    for job_id in reversed(st.session_state.get("analysis_jobs", [])):
+        job = queue.get(job_id)
+        if job is None:
+            continue
+        label = f"#{job['id']} {job['file_name']} ({job['document_type']}) — {job['status']}"
+        if job["status"] == STATUS_CONCLUIDO:
+            with st.expander(f"✅ {label}"):
+                render_analysis_result(job["result"])
+        elif job["status"] == STATUS_ERRO:
+            st.error(f"❌ {label}: {job['error']}")
+        else:
+            st.caption(f"⏳ {label} · tentativa {job['attempts']}/{job['max_attempts']}")
 
 # Exemplo de uso
 if __name__ == "__main__":
@@ -0,0 +1,58 @@
+"""
+Barramento de eventos em processo para as atualizações em tempo real (navios e berços)
+
+Produtores publicam eventos numerados em sequência; cada leitor guarda o número do último
+evento que aplicou e busca apenas os posteriores. Os eventos ficam num buffer circular: um
+leitor que ficou para trás recebe None e recarrega o estado completo.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Any, Optional, Tuple
+
+from config import REALTIME_CONFIG
+
+EVENTO_NAVIO_ATUALIZADO = "navio_atualizado"
+EVENTO_NAVIO_POSICAO = "navio_posicao"
+
+
+class EventBus:
+    """Eventos {"seq", "tipo", "chave", "dados", "ts"} em ordem de publicação"""
+
+    def __init__(self, max_eventos: Optional[int] = None):
+        self._eventos = deque(maxlen=max_eventos or REALTIME_CONFIG["max_eventos"])
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    @property
+    def versao(self) -> int:
+        """Número do último evento publicado"""
+        return self._seq
+
+    def publicar(self, tipo: str, chave: str, dados: Any = None) -> int:
+        with self._lock:
+            self._seq += 1
+            evento = {"seq": self._seq, "tipo": tipo, "chave": chave, "dados": dados, "ts": time.time()}
+            self._eventos.append(evento)
+        return evento["seq"]
+
+    def eventos_desde(self, seq: int) -> Tuple[Optional[List[Dict[str, Any]]], int]:
+        """(eventos posteriores a `seq`, novo cursor) lidos juntos sob o lock.
+
+        Os eventos vêm como None se algum deles já saiu do buffer (recarregar tudo); o cursor é
+        a versão no momento da leitura, então nada publicado depois dela é pulado.
+        """
+        with self._lock:
+            versao = self._seq
+            if seq < 0:
+                return None, versao
+            if seq >= versao:
+                return [], versao
+            primeiro = self._eventos[0]["seq"] if self._eventos else versao + 1
+            if seq + 1 < primeiro:
+                return None, versao
+            return [evento for evento in self._eventos if evento["seq"] > seq], versao
+
+
+# Barramento único do processo, preservado entre reruns do Streamlit
+bus = EventBus()
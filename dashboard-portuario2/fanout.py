@@ -0,0 +1,34 @@
+"""
+Execução concorrente de chamadas por item (navio, operação) com limite de concorrência
+"""
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Iterable, Iterator, List, Tuple
+
+
+def executar_concorrente(funcao: Callable[[Any], Any], itens: Iterable[Any],
+                         max_workers: int) -> Iterator[Tuple[Any, Any, float]]:
+    """Executa funcao(item) em paralelo e gera (item, resultado, latência em s) na ordem de conclusão"""
+    def cronometrar(item):
+        inicio = time.perf_counter()
+        resultado = funcao(item)
+        return item, resultado, time.perf_counter() - inicio
+    
+    itens = list(itens)
+    if not itens:
+        return
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(itens)))) as pool:
+        futuros = [pool.submit(cronometrar, item) for item in itens]
+        for futuro in as_completed(futuros):
+            yield futuro.result()
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil pelo método nearest-rank (p entre 0 e 100)"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    posicao = max(1, math.ceil(p / 100 * len(ordenados)))
+    return ordenados[posicao - 1]
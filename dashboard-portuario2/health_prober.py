@@ -0,0 +1,168 @@
+"""
+Verificação de saúde em segundo plano das APIs do Instituto AmiGU e do webhook do n8n
+
+Uma thread por processo testa cada serviço a cada HEALTH_CONFIG["interval"] segundos e mantém
+uma janela das últimas verificações (latência e erro). A sidebar lê apenas o retrato em memória
+e os clientes HTTP consultam host_status() para ajustar retentativas e timeouts.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from config import API_CONFIG, API_HEADERS, API_SIMULADA, HEALTH_CONFIG, N8N_CONFIG
+from fanout import executar_concorrente, percentil
+from metrics import metrics
+
+STATUS_ONLINE = "online"
+STATUS_DEGRADADO = "degradado"
+STATUS_OFFLINE = "offline"
+STATUS_VERIFICANDO = "verificando"
+STATUS_SIMULADO = "simulado"
+
+NOMES_SERVICOS = {
+    "capitania": "Capitania dos Portos",
+    "terminal": "Terminal Portuário",
+    "agencia": "Agência Marítima"
+}
+NOME_N8N = "Assistente AI (n8n)"
+
+
+def alvos_padrao() -> List[Tuple[str, str, str]]:
+    """(nome, método, url) de cada serviço verificado"""
+    alvos = [(NOMES_SERVICOS.get(servico, servico), "HEAD", config["base_url"])
+             for servico, config in API_CONFIG.items()]
+    n8n = urlsplit(N8N_CONFIG["webhook_url"])
+    # O webhook só aceita POST (e dispara o fluxo); a saúde vem do endpoint da instância
+    alvos.append((NOME_N8N, "GET", f"{n8n.scheme}://{n8n.netloc}{HEALTH_CONFIG['n8n_probe_path']}"))
+    return alvos
+
+
+class _Janela:
+    """Últimas verificações de um serviço"""
+
+    def __init__(self, tamanho: int):
+        self.amostras = deque(maxlen=tamanho)
+        self.falhas_seguidas = 0
+        self.ultimo_erro: Optional[str] = None
+        self.ultima_verificacao: Optional[float] = None
+
+    def registrar(self, latencia_s: float, erro: Optional[str]) -> None:
+        self.amostras.append((latencia_s, erro is None))
+        self.falhas_seguidas = self.falhas_seguidas + 1 if erro else 0
+        if erro:
+            self.ultimo_erro = erro
+        self.ultima_verificacao = time.time()
+
+    def resumo(self) -> Dict[str, Any]:
+        if not self.amostras:
+            return {"status": STATUS_VERIFICANDO, "p50_ms": None, "p95_ms": None, "taxa_erro": None,
+                    "amostras": 0, "ultimo_erro": None, "ultima_verificacao": None}
+
+        latencias = [latencia * 1000 for latencia, ok in self.amostras if ok]
+        taxa_erro = sum(1 for _, ok in self.amostras if not ok) / len(self.amostras)
+        p95 = percentil(latencias, 95) if latencias else None
+
+        if self.falhas_seguidas >= HEALTH_CONFIG["offline_after_failures"]:
+            status = STATUS_OFFLINE
+        elif taxa_erro >= HEALTH_CONFIG["degraded_error_rate"] or (p95 or 0) >= HEALTH_CONFIG["degraded_p95_ms"]:
+            status = STATUS_DEGRADADO
+        else:
+            status = STATUS_ONLINE
+
+        return {
+            "status": status,
+            "p50_ms": percentil(latencias, 50) if latencias else None,
+            "p95_ms": p95,
+            "taxa_erro": taxa_erro,
+            "amostras": len(self.amostras),
+            "ultimo_erro": self.ultimo_erro,
+            "ultima_verificacao": self.ultima_verificacao
+        }
+
+
+class HealthProber(threading.Thread):
+    """Testa os serviços periodicamente, fora do caminho de renderização da página"""
+
+    def __init__(self, alvos: Optional[List[Tuple[str, str, str]]] = None, interval: Optional[float] = None):
+        super().__init__(name="health-prober", daemon=True)
+        self.alvos = alvos if alvos is not None else alvos_padrao()
+        self.interval = interval or HEALTH_CONFIG["interval"]
+        self._janelas = {nome: _Janela(HEALTH_CONFIG["window"]) for nome, _, _ in self.alvos}
+        self._hosts = {nome: urlsplit(url).netloc for nome, _, url in self.alvos}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        # Sessão própria: sondas não entram nas estatísticas de reuso nem nas retentativas dos clientes
+        self._session = requests.Session()
+        self._session.headers.update({"Authorization": API_HEADERS["Authorization"]})
+
+    def verificar(self, alvo: Tuple[str, str, str]) -> Tuple[float, Optional[str]]:
+        """Uma verificação: qualquer resposta abaixo de 500 conta como serviço no ar"""
+        nome, metodo, url = alvo
+        inicio = time.perf_counter()
+        try:
+            response = self._session.request(metodo, url, timeout=HEALTH_CONFIG["timeout"],
+                                             allow_redirects=False)
+            response.close()
+            erro = f"HTTP {response.status_code}" if response.status_code >= 500 else None
+        except requests.RequestException as e:
+            erro = type(e).__name__
+        return time.perf_counter() - inicio, erro
+
+    def verificar_todos(self) -> None:
+        """Uma rodada de verificações, em paralelo (um serviço lento não atrasa os demais)"""
+        for alvo, (latencia, erro), _ in executar_concorrente(self.verificar, self.alvos, len(self.alvos)):
+            nome = alvo[0]
+            metrics.observe("sonda_saude_segundos", latencia, servico=nome)
+            if erro:
+                metrics.inc("sonda_saude_falhas_total", servico=nome)
+            with self._lock:
+                self._janelas[nome].registrar(latencia, erro)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Retrato atual de cada serviço (não faz chamadas de rede)"""
+        with self._lock:
+            return {nome: janela.resumo() for nome, janela in self._janelas.items()}
+
+    def status_do_host(self, host: str) -> Optional[str]:
+        """Pior status entre os serviços de um host (None se o host não é verificado)"""
+        ordem = [STATUS_OFFLINE, STATUS_DEGRADADO, STATUS_ONLINE, STATUS_VERIFICANDO]
+        with self._lock:
+            status = [janela.resumo()["status"] for nome, janela in self._janelas.items()
+                      if self._hosts[nome] == host]
+        return min(status, key=ordem.index) if status else None
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            self.verificar_todos()
+            self._stop_event.wait(self.interval)
+
+    def parar(self) -> None:
+        self._stop_event.set()
+
+
+_prober: Optional[HealthProber] = None
+_prober_lock = threading.Lock()
+
+
+def get_health_prober() -> HealthProber:
+    """Verificador único por processo, iniciado na primeira chamada"""
+    global _prober
+    with _prober_lock:
+        if _prober is None:
+            alvos = alvos_padrao()
+            if API_SIMULADA:
+                # APIs simuladas: só o n8n é verificado
+                alvos = [alvo for alvo in alvos if alvo[0] == NOME_N8N]
+            _prober = HealthProber(alvos)
+            _prober.start()
+        return _prober
+
+
+def host_status(host: str) -> Optional[str]:
+    """Status conhecido do host, sem iniciar o verificador (None se não há verificação)"""
+    prober = _prober
+    return prober.status_do_host(host) if prober is not None else None
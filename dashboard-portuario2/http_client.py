@@ -0,0 +1,152 @@
+"""
+Cliente HTTP compartilhado para as APIs do Instituto AmiGU (Capitania, Terminal e Agência)
+"""
+import random
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import API_CONFIG, API_HEADERS, HEALTH_CONFIG, HTTP_CLIENT_CONFIG
+from health_prober import STATUS_DEGRADADO, STATUS_OFFLINE, host_status
+
+
+class AmiguAPIError(Exception):
+    """Falha definitiva ao chamar uma API do Instituto AmiGU"""
+
+
+class PooledHTTPClient:
+    """Cliente com keep-alive por origem (esquema + host), limite de concorrência por host e retentativas.
+    
+    As operações das APIs são identificadas por ID (autorizacao_id, operacao_id, escala_id),
+    por isso também repetimos POSTs após falhas de conexão ou respostas 429/5xx.
+    
+    Hosts que a verificação de saúde marcou como degradados recebem menos retentativas e
+    hosts offline uma única tentativa com timeout de conexão curto (ver health_prober.py).
+    """
+    
+    def __init__(self, config: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None):
+        self.config = {**HTTP_CLIENT_CONFIG, **(config or {})}
+        self.headers = headers if headers is not None else API_HEADERS
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+    
+    def _session_for(self, base_url: str) -> Tuple[requests.Session, threading.BoundedSemaphore]:
+        parts = urlsplit(base_url)
+        host = parts.netloc
+        # Serviços no mesmo host (capitania, terminal e agência) compartilham o mesmo pool
+        origin = f"{parts.scheme}://{host}"
+        with self._lock:
+            session = self._sessions.get(origin)
+            if session is None:
+                session = requests.Session()
+                session.headers.update(self.headers)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.config["pool_maxsize"])
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[origin] = session
+            
+            limit = self._host_limits.get(host)
+            if limit is None:
+                limit = threading.BoundedSemaphore(self.config["max_concurrency_per_host"])
+                self._host_limits[host] = limit
+        return session, limit
+    
+    def _backoff(self, attempt: int) -> float:
+        """Backoff exponencial com jitter completo"""
+        ceiling = min(self.config["backoff_max"], self.config["backoff_base"] * (2 ** attempt))
+        return random.uniform(0, ceiling)
+    
+    def request(self, method: str, base_url: str, path: str = "", timeout: Optional[Tuple[float, float]] = None,
+                max_retries: Optional[int] = None, **kwargs) -> requests.Response:
+        """Executa a requisição reaproveitando conexões e repetindo falhas transitórias"""
+        session, limit = self._session_for(base_url)
+        url = f"{base_url}{path}"
+        timeout = timeout or (self.config["connect_timeout"], self.config["read_timeout"])
+        max_retries = self.config["max_retries"] if max_retries is None else max_retries
+        
+        saude = host_status(urlsplit(base_url).netloc)
+        if saude == STATUS_OFFLINE:
+            max_retries = 0
+            timeout = (min(timeout[0], HEALTH_CONFIG["offline_connect_timeout"]), timeout[1])
+        elif saude == STATUS_DEGRADADO:
+            max_retries = min(max_retries, HEALTH_CONFIG["degraded_max_retries"])
+        
+        last_error = None
+        for attempt in range(max_retries + 1):
+            delay = self._backoff(attempt)
+            with limit:
+                try:
+                    response = session.request(method, url, timeout=timeout, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    last_error = e
+                else:
+                    if response.status_code not in self.config["retry_statuses"] or attempt == max_retries:
+                        return response
+                    last_error = AmiguAPIError(f"Erro HTTP {response.status_code} em {url}")
+                    retry_after = response.headers.get("Retry-After", "")
+                    if retry_after.isdigit():
+                        delay = min(float(retry_after), self.config["backoff_max"])
+                    response.close()
+            
+            if attempt < max_retries:
+                time.sleep(delay)
+        
+        raise AmiguAPIError(f"Falha após {max_retries + 1} tentativas em {url}: {last_error}")
+    
+    def connection_stats(self) -> Dict[str, Dict[str, int]]:
+        """Requisições enviadas e conexões abertas por host, lidas dos pools do urllib3"""
+        stats: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            pools = session.get_adapter("https://").poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                counts = stats.setdefault(pool.host, {"requisicoes": 0, "conexoes": 0})
+                counts["requisicoes"] += pool.num_requests
+                counts["conexoes"] += pool.num_connections
+        return stats
+    
+    def close(self) -> None:
+        """Fecha todas as conexões mantidas no pool"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+class AmiguAPIClient:
+    """Acesso aos endpoints de API_CONFIG por nome de serviço e endpoint"""
+    
+    def __init__(self, http: Optional[PooledHTTPClient] = None, api_config: Optional[Dict[str, Any]] = None):
+        self.http = http or PooledHTTPClient()
+        self.api_config = api_config or API_CONFIG
+    
+    def _resolve(self, servico: str, endpoint: str) -> Tuple[str, str]:
+        config = self.api_config[servico]
+        return config["base_url"], config["endpoints"][endpoint]
+    
+    def get(self, servico: str, endpoint: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+        base_url, path = self._resolve(servico, endpoint)
+        response = self.http.request("GET", base_url, path, params=params, **kwargs)
+        response.raise_for_status()
+        return response.json()
+    
+    def post(self, servico: str, endpoint: str, payload: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        base_url, path = self._resolve(servico, endpoint)
+        response = self.http.request("POST", base_url, path, json=payload, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+
+def get_amigu_client() -> AmiguAPIClient:
+    """Cliente único por processo, preservado entre reruns do Streamlit"""
+    from connections import get_connection_manager
+    return get_connection_manager().amigu
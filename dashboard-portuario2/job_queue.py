@@ -0,0 +1,219 @@
+"""
+Fila persistente (SQLite) de análises de documentos, com prioridade, retentativas e lease por worker
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from config import JOB_QUEUE_CONFIG
+
+STATUS_PENDENTE = "pendente"
+STATUS_PROCESSANDO = "processando"
+STATUS_CONCLUIDO = "concluido"
+STATUS_ERRO = "erro"
+
+
+class JobQueue:
+    """Fila compartilhada entre a interface (produtora) e os processos de job_worker.py"""
+    
+    def __init__(self, path: Optional[str] = None, files_dir: Optional[str] = None):
+        self.path = path or JOB_QUEUE_CONFIG["path"]
+        self.files_dir = files_dir or JOB_QUEUE_CONFIG["files_dir"]
+        os.makedirs(self.files_dir, exist_ok=True)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                document_type TEXT NOT NULL,
+                file_name TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                available_at REAL NOT NULL,
+                lease_expires REAL,
+                worker TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_fila ON jobs (status, priority, available_at, id);
+        """)
+    
+    def submit(self, pdf_bytes: bytes, file_name: str, document_type: str,
+               priority: Optional[int] = None) -> int:
+        """Grava o PDF e enfileira a análise; retorna o id do job imediatamente"""
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        file_path = os.path.join(self.files_dir, f"{digest}.pdf")
+        self._write_file(file_path, pdf_bytes)
+        
+        if priority is None:
+            priority = JOB_QUEUE_CONFIG["priorities"].get(document_type, 5)
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (document_type, file_name, file_path, priority, status, max_attempts, "
+                "available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (document_type, file_name, file_path, priority, STATUS_PENDENTE,
+                 JOB_QUEUE_CONFIG["max_attempts"], now, now, now)
+            )
+        # Um worker pode ter removido o arquivo (mesmo conteúdo, job anterior concluído) entre a
+        # gravação e o INSERT; com o job já registrado ele não é mais removido
+        self._write_file(file_path, pdf_bytes)
+        return cursor.lastrowid
+    
+    @staticmethod
+    def _write_file(file_path: str, pdf_bytes: bytes) -> None:
+        if os.path.exists(file_path):
+            return
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(pdf_bytes)
+        os.replace(tmp_path, file_path)
+    
+    def _remove_unused_files(self, file_paths) -> None:
+        """Remove os PDFs que nenhum job pendente ou em processamento usa (chamar com o lock)"""
+        for file_path in set(file_paths):
+            in_use = self._conn.execute(
+                "SELECT 1 FROM jobs WHERE file_path = ? AND status IN (?, ?) LIMIT 1",
+                (file_path, STATUS_PENDENTE, STATUS_PROCESSANDO)
+            ).fetchone()
+            if in_use is None:
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+    
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Reserva atomicamente o próximo job disponível (por prioridade e ordem de chegada)"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs de workers que morreram voltam para a fila quando o lease expira; se já
+                # usaram todas as tentativas (ex: o documento derruba o worker), viram erro
+                exhausted = [r["file_path"] for r in self._conn.execute(
+                    "SELECT file_path FROM jobs WHERE status = ? AND lease_expires < ? AND attempts >= max_attempts",
+                    (STATUS_PROCESSANDO, now)
+                )]
+                self._conn.execute(
+                    "UPDATE jobs SET worker = NULL, lease_expires = NULL, updated_at = ?, "
+                    "status = CASE WHEN attempts >= max_attempts THEN ? ELSE ? END, "
+                    "error = CASE WHEN attempts >= max_attempts THEN ? ELSE error END "
+                    "WHERE status = ? AND lease_expires < ?",
+                    (now, STATUS_ERRO, STATUS_PENDENTE,
+                     "Worker interrompido (lease expirado) em todas as tentativas",
+                     STATUS_PROCESSANDO, now)
+                )
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? AND available_at <= ? "
+                    "ORDER BY priority, id LIMIT 1",
+                    (STATUS_PENDENTE, now)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    self._remove_unused_files(exhausted)
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, "
+                    "lease_expires = ?, updated_at = ? WHERE id = ?",
+                    (STATUS_PROCESSANDO, worker, now + JOB_QUEUE_CONFIG["lease_seconds"], now, row["id"])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._remove_unused_files(exhausted)
+        job = dict(row)
+        job["attempts"] += 1
+        return job
+    
+    def renew(self, job_id: int, worker: str) -> bool:
+        """Estende o lease enquanto o worker ainda processa o job; False se ele já perdeu o job"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                (time.time() + JOB_QUEUE_CONFIG["lease_seconds"], time.time(), job_id, worker, STATUS_PROCESSANDO)
+            )
+        return cursor.rowcount > 0
+    
+    def complete(self, job_id: int, worker: str, result: Dict[str, Any]) -> bool:
+        """Grava o resultado; False (sem alterar nada) se o lease do worker expirou e o job foi retomado"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_expires = NULL, worker = NULL, "
+                "updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                (STATUS_CONCLUIDO, json.dumps(result, ensure_ascii=False, default=str), time.time(),
+                 job_id, worker, STATUS_PROCESSANDO)
+            )
+            if cursor.rowcount == 0:
+                return False
+            self._remove_job_file(job_id)
+        return True
+    
+    def fail(self, job_id: int, worker: str, error: str) -> bool:
+        """Reagenda com backoff enquanto houver tentativas; depois marca como erro.
+        
+        Retorna False (sem alterar nada) se o lease do worker expirou e o job foi retomado.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND worker = ? AND status = ?",
+                (job_id, worker, STATUS_PROCESSANDO)
+            ).fetchone()
+            if row is None:
+                return False
+            if row["attempts"] < row["max_attempts"]:
+                delay = JOB_QUEUE_CONFIG["retry_backoff_seconds"] * (2 ** (row["attempts"] - 1))
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_expires = NULL, "
+                    "worker = NULL, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                    (STATUS_PENDENTE, error, now + delay, now, job_id, worker, STATUS_PROCESSANDO)
+                )
+            else:
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, lease_expires = NULL, worker = NULL, updated_at = ? "
+                    "WHERE id = ? AND worker = ? AND status = ?",
+                    (STATUS_ERRO, error, now, job_id, worker, STATUS_PROCESSANDO)
+                )
+                if cursor.rowcount:
+                    self._remove_job_file(job_id)
+        return cursor.rowcount > 0
+    
+    def _remove_job_file(self, job_id: int) -> None:
+        row = self._conn.execute("SELECT file_path FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is not None:
+            self._remove_unused_files([row["file_path"]])
+    
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, document_type, file_name, priority, status, attempts, max_attempts, worker, "
+                "result, error, created_at, updated_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+    
+    def depth(self) -> Dict[str, int]:
+        """Quantidade de jobs por status (profundidade da fila)"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {STATUS_PENDENTE: 0, STATUS_PROCESSANDO: 0, STATUS_CONCLUIDO: 0, STATUS_ERRO: 0}
+        counts.update({status: total for status, total in rows})
+        return counts
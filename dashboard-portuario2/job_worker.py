@@ -0,0 +1,114 @@
+"""
+Processos worker que consomem a fila persistente de análises de documentos
+
+Uso:
+    OPENAI_API_KEY=sk-... python job_worker.py --processos 4
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from config import JOB_QUEUE_CONFIG, OPENAI_CONFIG
+
+
+@contextmanager
+def lease_heartbeat(queue, job_id: int, worker_name: str):
+    """Renova o lease do job em segundo plano enquanto o bloco executa"""
+    stop = threading.Event()
+    
+    def beat() -> None:
+        while not stop.wait(JOB_QUEUE_CONFIG["heartbeat_seconds"]):
+            if not queue.renew(job_id, worker_name):
+                return
+    
+    thread = threading.Thread(target=beat, name=f"heartbeat-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_worker(worker_name: str, stop_when_empty: bool = False) -> None:
+    """Laço de um worker: reserva, processa e registra o resultado de cada job"""
+    from analysis_cache import AnalysisCache
+    from batch_processor import LocalPDFFile
+    from document_analyzer import RealDocumentAnalyzer
+    from job_queue import JobQueue
+    
+    queue = JobQueue()
+    analyzer = RealDocumentAnalyzer(OPENAI_CONFIG["api_key"], cache=AnalysisCache())
+    
+    while True:
+        job = queue.claim(worker_name)
+        if job is None:
+            if stop_when_empty:
+                return
+            time.sleep(JOB_QUEUE_CONFIG["poll_interval"])
+            continue
+        
+        try:
+            with lease_heartbeat(queue, job["id"], worker_name):
+                file = LocalPDFFile(job["file_path"])
+                file.name = job["file_name"]
+                result = analyzer.process_document(file, job["document_type"])
+        except Exception as e:
+            recorded = queue.fail(job["id"], worker_name, str(e))
+        else:
+            # Falha transitória na IA: devolve à fila enquanto houver tentativas
+            ai_result = result.get("analise_ia", {})
+            if ai_result.get("erro_analise") and job["attempts"] < job["max_attempts"]:
+                recorded = queue.fail(job["id"], worker_name, "; ".join(ai_result.get("observacoes", [])))
+            else:
+                recorded = queue.complete(job["id"], worker_name, result)
+        
+        if not recorded:
+            # O lease expirou e outro worker retomou o job: o resultado dele prevalece
+            print(f"{worker_name}: job {job['id']} retomado por outro worker, resultado descartado",
+                  file=sys.stderr)
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Workers da fila de análise de documentos")
+    parser.add_argument("--processos", type=int, default=max(1, os.cpu_count() // 2),
+                        help="Número de processos worker")
+    parser.add_argument("--ate-esvaziar", action="store_true",
+                        help="Encerra quando não houver mais jobs disponíveis")
+    args = parser.parse_args(argv)
+    
+    if not OPENAI_CONFIG["api_key"]:
+        print("Defina OPENAI_API_KEY para executar a análise por IA", file=sys.stderr)
+        return 2
+    
+    host = socket.gethostname()
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(f"{host}-{os.getpid()}-{i}", args.ate_esvaziar))
+        for i in range(args.processos)
+    ]
+    for process in processes:
+        process.start()
+    print(f"{len(processes)} workers processando a fila {JOB_QUEUE_CONFIG['path']}")
+    
+    def stop(signum, frame):
+        for process in processes:
+            process.terminate()
+    signal.signal(signal.SIGTERM, stop)
+    
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        stop(None, None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Fonte local de eventos de navios: substitui as APIs no modo simulado
+
+Calcula a posição de cada navio a partir da ETA (fundeadouro -> cais) e publica no barramento
+apenas os navios cuja posição ou situação mudou. Só publica eventos: o repositório de navios
+nunca é alterado por dados simulados.
+"""
+import math
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+
+from config import BERTH_CONFIG, REALTIME_CONFIG
+from event_bus import EVENTO_NAVIO_POSICAO, EventBus, bus as bus_padrao
+
+SITUACAO_ATRACADO = "Atracado"
+SITUACAO_APROXIMANDO = "Aproximando"
+SITUACAO_AGUARDANDO = "Aguardando"
+
+# Casas decimais das coordenadas publicadas (~100 m): movimentos menores não geram evento
+PRECISAO_COORDENADAS = 3
+
+
+def posicao_estimada(navio: Dict[str, Any], agora: Optional[datetime] = None) -> Tuple[str, float, float, str]:
+    """(nome, lat, lon, situação) do navio pela ETA: no cais após a ETA, senão a caminho do fundeadouro"""
+    agora = agora or datetime.now()
+    horas = (navio["eta"] - agora).total_seconds() / 3600 if navio.get("eta") else math.inf
+    cais_lat, cais_lon = REALTIME_CONFIG["cais"]
+    fundeadouro_lat, fundeadouro_lon = REALTIME_CONFIG["fundeadouro"]
+    # Direção de chegada estável por navio, para os pontos não se sobreporem
+    angulo = zlib.crc32(navio["navio_id"].encode("utf-8")) % 360 * math.pi / 180
+
+    if horas <= 0:
+        bercos = list(BERTH_CONFIG["bercos"])
+        indice = bercos.index(navio["berco"]) if navio.get("berco") in bercos else 0
+        lat, lon, situacao = cais_lat, cais_lon + 0.01 * indice, SITUACAO_ATRACADO
+    else:
+        distancia = 0.02 + 0.15 * min(horas, REALTIME_CONFIG["horizonte_aproximacao_h"]) / \
+            REALTIME_CONFIG["horizonte_aproximacao_h"]
+        lat = fundeadouro_lat - distancia * abs(math.cos(angulo))
+        lon = fundeadouro_lon + distancia * math.sin(angulo)
+        situacao = SITUACAO_APROXIMANDO if horas <= REALTIME_CONFIG["aproximando_h"] else SITUACAO_AGUARDANDO
+
+    return (navio["nome"], round(lat, PRECISAO_COORDENADAS), round(lon, PRECISAO_COORDENADAS), situacao)
+
+
+class LocalEventSource(threading.Thread):
+    """Publica as posições estimadas dos navios em intervalos regulares (somente leitura do repositório)"""
+
+    def __init__(self, repo, event_bus: Optional[EventBus] = None, intervalo: Optional[float] = None):
+        super().__init__(name="fonte-eventos-local", daemon=True)
+        self.repo = repo
+        self.bus = event_bus or bus_padrao
+        self.intervalo = intervalo or REALTIME_CONFIG["intervalo_fonte_s"]
+        self._posicoes: Dict[str, Tuple[str, float, float, str]] = {}
+        self.erro: Optional[str] = None
+        self._stop_event = threading.Event()
+
+    def passo(self, agora: Optional[datetime] = None) -> int:
+        """Uma rodada: publica os navios que mudaram; retorna quantos eventos foram publicados"""
+        publicados = 0
+        navios = self.repo.listar(status=BERTH_CONFIG["status_planejados"])
+        for navio in navios:
+            posicao = posicao_estimada(navio, agora)
+            if self._posicoes.get(navio["navio_id"]) != posicao:
+                self._posicoes[navio["navio_id"]] = posicao
+                self.bus.publicar(EVENTO_NAVIO_POSICAO, navio["navio_id"], posicao)
+                publicados += 1
+
+        ativos = {navio["navio_id"] for navio in navios}
+        for navio_id in [n for n in self._posicoes if n not in ativos]:
+            del self._posicoes[navio_id]
+            self.bus.publicar(EVENTO_NAVIO_POSICAO, navio_id, None)
+            publicados += 1
+        return publicados
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.passo()
+                self.erro = None
+            except Exception as e:
+                self.erro = str(e)
+            self._stop_event.wait(self.intervalo)
+
+    def parar(self) -> None:
+        self._stop_event.set()
@@ -0,0 +1,95 @@
+"""
+Armazenamento local (SQLite) dos registros sincronizados das APIs do Instituto AmiGU
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Any, Optional, Tuple
+
+from config import SYNC_CONFIG
+
+
+class LocalStore:
+    """Registros por recurso com versão monotônica para leitura incremental pelas páginas"""
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or SYNC_CONFIG["path"]
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS registros (
+                recurso TEXT NOT NULL,
+                registro_id TEXT NOT NULL,
+                dados TEXT NOT NULL,
+                versao INTEGER NOT NULL,
+                PRIMARY KEY (recurso, registro_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_registros_versao ON registros (versao);
+            CREATE TABLE IF NOT EXISTS cursores (
+                recurso TEXT PRIMARY KEY,
+                cursor TEXT,
+                sincronizado_em REAL
+            );
+        """)
+        self._conn.commit()
+    
+    def cursor(self, recurso: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT cursor FROM cursores WHERE recurso = ?", (recurso,)).fetchone()
+        return row[0] if row else None
+    
+    def upsert(self, recurso: str, registros: List[Dict[str, Any]], id_field: str,
+               cursor: Optional[str]) -> int:
+        """Grava os registros alterados e o novo cursor; retorna quantos mudaram de fato"""
+        alterados = 0
+        with self._lock:
+            (versao,) = self._conn.execute("SELECT COALESCE(MAX(versao), 0) FROM registros").fetchone()
+            for registro in registros:
+                registro_id = registro.get(id_field, registro.get("id"))
+                if registro_id is None:
+                    continue
+                dados = json.dumps(registro, ensure_ascii=False, sort_keys=True, default=str)
+                atual = self._conn.execute(
+                    "SELECT dados FROM registros WHERE recurso = ? AND registro_id = ?",
+                    (recurso, str(registro_id))
+                ).fetchone()
+                if atual and atual[0] == dados:
+                    continue
+                versao += 1
+                alterados += 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO registros (recurso, registro_id, dados, versao) VALUES (?, ?, ?, ?)",
+                    (recurso, str(registro_id), dados, versao)
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cursores (recurso, cursor, sincronizado_em) VALUES (?, ?, ?)",
+                (recurso, cursor, time.time())
+            )
+            self._conn.commit()
+        return alterados
+    
+    def registros_desde(self, versao: int) -> List[Tuple[str, Dict[str, Any], int]]:
+        """Registros alterados após a versão informada, em ordem de alteração"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT recurso, dados, versao FROM registros WHERE versao > ? ORDER BY versao", (versao,)
+            ).fetchall()
+        return [(recurso, json.loads(dados), v) for recurso, dados, v in rows]
+    
+    def listar(self, recurso: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT dados FROM registros WHERE recurso = ? ORDER BY versao", (recurso,)
+            ).fetchall()
+        return [json.loads(dados) for (dados,) in rows]
+    
+    def ultima_sincronizacao(self) -> Optional[float]:
+        with self._lock:
+            (momento,) = self._conn.execute("SELECT MAX(sincronizado_em) FROM cursores").fetchone()
+        return momento
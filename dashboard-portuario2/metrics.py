@@ -0,0 +1,245 @@
+"""
+Métricas de desempenho em processo: spans cronometrados, histogramas e contadores
+
+O registro é um singleton de módulo (sobrevive aos reruns do Streamlit) e pode ser exportado
+no formato texto do Prometheus, em arquivo para o textfile collector do node_exporter ou em
+um endpoint HTTP /metrics.
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from config import METRICS_CONFIG
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> LabelSet:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: LabelSet, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    """Histograma cumulativo (buckets do Prometheus) com amostras recentes para percentis"""
+
+    def __init__(self, buckets: List[float], reservoir_size: int):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=reservoir_size)
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.bucket_counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def percentile(self, p: float) -> Optional[float]:
+        values = sorted(self.recent)
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+class MetricsRegistry:
+    """Contadores e histogramas identificados por nome + rótulos"""
+
+    def __init__(self, buckets: Optional[List[float]] = None, reservoir_size: Optional[int] = None):
+        self.buckets = sorted(buckets or METRICS_CONFIG["buckets"])
+        self.reservoir_size = reservoir_size or METRICS_CONFIG["reservoir_size"]
+        self.help: Dict[str, str] = {}
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._histograms: Dict[str, Dict[LabelSet, Histogram]] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]] = []
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str) -> None:
+        self.help[name] = help_text
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]) -> None:
+        """Contadores mantidos fora do registro, lidos a cada snapshot/exportação como (nome, rótulos, valor)"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def _collected(self) -> Dict[str, Dict[LabelSet, float]]:
+        collected: Dict[str, Dict[LabelSet, float]] = {}
+        for collector in list(self._collectors):
+            for name, labels, value in collector():
+                collected.setdefault(name, {})[_labels(labels)] = value
+        return collected
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets, self.reservoir_size)
+            histogram.observe(value)
+
+    @contextmanager
+    def span(self, name: str, **labels) -> Iterator[None]:
+        """Cronometra o bloco em `name` (segundos); exceções também contam em `name`_erros_total"""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc(f"{name}_erros_total", **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Resumo para exibição: contagem, média e percentis de cada série"""
+        collected = self._collected()
+        with self._lock:
+            histograms = [
+                {
+                    "metrica": name,
+                    "rotulos": dict(labels),
+                    "contagem": h.count,
+                    "media_s": h.sum / h.count if h.count else 0.0,
+                    "p50_s": h.percentile(50),
+                    "p95_s": h.percentile(95),
+                    "p99_s": h.percentile(99)
+                }
+                for name, series in sorted(self._histograms.items())
+                for labels, h in sorted(series.items())
+            ]
+            counters = [
+                {"metrica": name, "rotulos": dict(labels), "valor": value}
+                for name, series in sorted({**self._counters, **collected}.items())
+                for labels, value in sorted(series.items())
+            ]
+        return {"histogramas": histograms, "contadores": counters}
+
+    def to_prometheus(self) -> str:
+        """Formato texto de exposição do Prometheus (versão 0.0.4)"""
+        prefix = METRICS_CONFIG["prefix"]
+        lines = []
+        collected = self._collected()
+        with self._lock:
+            for name, series in sorted({**self._counters, **collected}.items()):
+                metric = f"{prefix}{name}"
+                if name in self.help:
+                    lines.append(f"# HELP {metric} {self.help[name]}")
+                lines.append(f"# TYPE {metric} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                metric = f"{prefix}{name}"
+                if name in self.help:
+                    lines.append(f"# HELP {metric} {self.help[name]}")
+                lines.append(f"# TYPE {metric} histogram")
+                for labels, h in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(h.buckets, h.bucket_counts):
+                        cumulative += count
+                        lines.append(f"{metric}_bucket{_format_labels(labels, ('le', f'{bound:g}'))} {cumulative}")
+                    lines.append(f"{metric}_bucket{_format_labels(labels, ('le', '+Inf'))} {h.count}")
+                    lines.append(f"{metric}_sum{_format_labels(labels)} {h.sum:.6f}")
+                    lines.append(f"{metric}_count{_format_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_file(self, path: Optional[str] = None) -> str:
+        """Grava a exportação de forma atômica (o coletor nunca lê um arquivo pela metade)"""
+        path = path or METRICS_CONFIG["export_path"]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+        return path
+
+
+metrics = MetricsRegistry()
+metrics.describe("analise_documento_segundos", "Duração total de process_document por tipo de documento")
+metrics.describe("analise_etapa_segundos", "Duração de cada etapa da análise de documentos")
+metrics.describe("analise_documentos_total", "Documentos analisados por tipo e origem do resultado")
+metrics.describe("chamada_externa_segundos", "Duração das chamadas às APIs AmiGU e ao assistente n8n")
+metrics.describe("chamada_externa_falhas_total", "Chamadas externas que falharam ou caíram no fallback")
+metrics.describe("chamada_resiliente_total", "Chamadas protegidas por resultado: cache, compartilhada, chamada, falha, circuito_aberto")
+metrics.describe("sonda_saude_segundos", "Latência das verificações de saúde em segundo plano por serviço")
+metrics.describe("sonda_saude_falhas_total", "Verificações de saúde sem resposta ou com erro 5xx")
+metrics.describe("tempo_real_fragmento_segundos", "Duração de cada atualização parcial da página de tempo real")
+metrics.describe("http_requisicoes_total", "Requisições HTTP de saída por host")
+metrics.describe("sincronizacao_registros_invalidos_total", "Registros sincronizados descartados por dados malformados")
+metrics.describe("http_conexoes_abertas_total", "Conexões HTTP de saída abertas por host (o restante reaproveitou keep-alive)")
+
+
+def timed(name: str, **labels):
+    """Decorador: cronometra cada chamada da função com metrics.span"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with metrics.span(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _export_loop(interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            metrics.write_prometheus_file()
+        except OSError:
+            pass
+
+
+def start_exporters() -> None:
+    """Inicia (uma vez por processo) a gravação periódica do arquivo e o endpoint HTTP, se configurado"""
+    global _exporter_started
+    with _exporter_lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+
+    if METRICS_CONFIG["export_interval"]:
+        threading.Thread(target=_export_loop, args=(METRICS_CONFIG["export_interval"],),
+                         name="metrics-export", daemon=True).start()
+    if METRICS_CONFIG["http_port"]:
+        server = ThreadingHTTPServer(("0.0.0.0", METRICS_CONFIG["http_port"]), _MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
@@ -0,0 +1,111 @@
+"""
+Pipeline de análise de documentos com pool de processos
+
+As etapas de CPU (extração de texto com pdfplumber, renderização com pdf2image e
+codificação das imagens) rodam em um ProcessPoolExecutor; cada página a renderizar é
+uma tarefa independente. A validação, o cache, a pré-validação local e a chamada de IA
+ficam nas threads do processo principal, de modo que a CPU trabalha no documento N+1
+enquanto o documento N aguarda a resposta do modelo.
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from bounded_memory import SpooledPDFFile
+from config import PIPELINE_CONFIG
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Analisador do processo worker (sem cliente OpenAI nem cache; ver RealDocumentAnalyzer.__getstate__)
+_worker_analyzer = None
+
+
+def _init_worker(analyzer) -> None:
+    global _worker_analyzer
+    _worker_analyzer = analyzer
+
+
+# As tarefas recebem o caminho da cópia do documento em disco, nunca os bytes do PDF
+
+def _extract_text(pdf_path: str, document_type: str) -> Dict[str, Any]:
+    with SpooledPDFFile.attach(pdf_path) as pdf_file:
+        return _worker_analyzer.extract_document_text(pdf_file, document_type)
+
+
+def _render_page(pdf_path: str, page_number: int, document_type: str) -> List[Dict[str, Any]]:
+    return _worker_analyzer.render_encoded_pages(pdf_path, [page_number], document_type)
+
+
+class DocumentPipeline:
+    """Executa process_document distribuindo as etapas de CPU por um pool de processos"""
+    
+    def __init__(self, analyzer, cpu_workers: Optional[int] = None):
+        self.analyzer = analyzer
+        self.cpu_workers = cpu_workers or PIPELINE_CONFIG["cpu_workers"]
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.cpu_workers,
+            mp_context=multiprocessing.get_context(PIPELINE_CONFIG["start_method"]),
+            initializer=_init_worker,
+            initargs=(analyzer,)
+        )
+    
+    def process_document(self, file, document_type: str) -> Dict[str, Any]:
+        """Mesmo resultado de RealDocumentAnalyzer.process_document; seguro para chamar de várias threads"""
+        with metrics.span("analise_documento_segundos", tipo=document_type):
+            result = self._process_document(file, document_type)
+        self.analyzer.record_outcome(document_type, result)
+        return result
+    
+    def _process_document(self, file, document_type: str) -> Dict[str, Any]:
+        analyzer = self.analyzer
+        validation = analyzer.validate_file_format(file, document_type)
+        if not (validation["formato_valido"] and validation["tamanho_valido"]):
+            return analyzer.start_document(file, document_type)["result"]
+        
+        # Uma cópia em disco por documento, removida ao terminar: cada tarefa do pool recebe
+        # só (caminho, página). No modo de memória limitada a cópia também reserva o orçamento
+        if analyzer.bounded_memory:
+            with analyzer.bounded_document(file, document_type) as spooled:
+                return self._analyze(spooled, document_type)
+        with SpooledPDFFile(file) as spooled:
+            return self._analyze(spooled, document_type)
+    
+    def _analyze(self, spooled: SpooledPDFFile, document_type: str) -> Dict[str, Any]:
+        analyzer = self.analyzer
+        state = analyzer.start_document(spooled, document_type)
+        if state["result"] is not None:
+            return state["result"]
+        
+        extraction = self._pool.submit(_extract_text, spooled.path, document_type).result()
+        
+        local_validation = analyzer.decide_locally(document_type, extraction)
+        if local_validation["decisao"] != "ambiguo":
+            ai_analysis = local_validation["resultado"]
+        else:
+            # Páginas independentes são renderizadas em paralelo
+            prompt_context = extraction["prompt_context"]
+            futures = [self._pool.submit(_render_page, spooled.path, page_number, document_type)
+                       for page_number in analyzer.select_vision_pages(extraction)]
+            images = []
+            for future in futures:
+                try:
+                    images.extend(future.result())
+                except Exception as e:
+                    # Mesmo comportamento de convert_pdf_to_images: segue só com o texto
+                    images = []
+                    logger.warning("Erro ao converter PDF para imagens: %s", e)
+                    break
+            ai_analysis = analyzer.analyze_document_with_ai(document_type, prompt_context["text"], images)
+        
+        return analyzer.finish_document(state, extraction, ai_analysis)
+    
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
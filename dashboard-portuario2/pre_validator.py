@@ -0,0 +1,149 @@
+"""
+Pré-validação local dos campos obrigatórios por casamento de rótulos e padrões de valor,
+evitando a chamada à IA quando o resultado é evidente
+"""
+import re
+import threading
+from typing import Dict, List, Any, Optional, Pattern
+
+from config import FIELD_LABELS, FIELD_VALUE_TYPES, PORTO_SANTOS_RULES, PRE_VALIDATION_CONFIG
+from prompt_builder import label_pattern, normalize_text
+
+# Padrões de valor aplicados ao texto normalizado (minúsculas, sem acentos)
+VALUE_PATTERNS: Dict[str, Pattern] = {
+    "due": re.compile(r"\b\d{2}br\d{10}-?\d\b"),
+    "data": re.compile(r"\b(?:\d{2}[/.-]\d{2}[/.-]\d{4}|\d{4}-\d{2}-\d{2})\b"),
+    "peso": re.compile(r"\b\d{1,3}(?:[.\s]?\d{3})*(?:,\d+)?\s*(?:kg|t|ton|toneladas)\b"),
+    "codigo": re.compile(r"\b[a-z]{0,4}[-/]?\d[\d./-]{3,}\b"),
+    "texto": re.compile(r"\b(?:[a-z0-9]{3,}|\d)")
+}
+
+_SEPARATORS = " \t:-–=."
+
+# Início de campo: começo da linha ou depois de um separador de colunas ("|", ";", tab, 2+ espaços)
+_FIELD_START = r"(?:^|[|;\t]|\s{2,})\s*"
+
+_field_labels: Dict[str, Pattern] = {}
+
+
+def field_label_pattern(field: str) -> Pattern:
+    """Rótulo do campo no início de um campo do formulário e seguido de ":" ou "=" (memoizado)"""
+    pattern = _field_labels.get(field)
+    if pattern is None:
+        labels = FIELD_LABELS.get(field) or [field.replace("_", " ")]
+        alternatives = "|".join(re.escape(label) for label in sorted(labels, key=len, reverse=True))
+        pattern = re.compile(rf"{_FIELD_START}(?:{alternatives})\s*[:=]")
+        _field_labels[field] = pattern
+    return pattern
+
+
+# Linha que é um rótulo, não um valor: rótulo conhecido seguido de ":"/"=" ou qualquer texto
+# curto terminado em ":" (ex: campo em branco de formulário)
+_KNOWN_LABEL = re.compile(
+    r"^(?:%s)\s*[:=]" % "|".join(
+        re.escape(label) for label in sorted({l for ls in FIELD_LABELS.values() for l in ls}, key=len, reverse=True)
+    )
+)
+_GENERIC_LABEL = re.compile(r"^[a-z][a-z0-9 ./()]{0,40}:")
+
+
+def is_label_line(line: str) -> bool:
+    """Se a linha (normalizada) começa com um rótulo de campo em vez de trazer um valor"""
+    return bool(_KNOWN_LABEL.match(line) or _GENERIC_LABEL.match(line))
+
+
+def mentions_field(field: str, line: str) -> bool:
+    """Rótulo citado em qualquer ponto da linha; rótulos curtos ("kg", "bl", "due") não contam"""
+    return any(len(match.group(0)) >= PRE_VALIDATION_CONFIG["min_label_chars"]
+               for match in label_pattern(field).finditer(line))
+
+
+class PreValidationStats:
+    """Contadores de documentos decididos localmente e enviados à IA"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"aprovado": 0, "reprovado": 0, "ambiguo": 0}
+    
+    def record(self, decision: str) -> None:
+        with self._lock:
+            self.counts[decision] += 1
+    
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.counts)
+        total = sum(counts.values())
+        short_circuited = counts["aprovado"] + counts["reprovado"]
+        return {
+            **counts,
+            "total": total,
+            "percentual_sem_ia": round(100 * short_circuited / total, 1) if total else 0.0
+        }
+
+
+pre_validation_stats = PreValidationStats()
+
+
+def match_field(field: str, lines: List[str]) -> float:
+    """Força da evidência de um campo: 1.0 rótulo + valor válido, 0.5 só rótulo, 0.0 ausente.
+    
+    Só "Rótulo: valor" no início de um campo conta como preenchido; o rótulo citado no meio
+    do texto corrido vale apenas como indício (0.5), que evita a reprovação local.
+    """
+    label = field_label_pattern(field)
+    value = VALUE_PATTERNS[FIELD_VALUE_TYPES.get(field, "texto")]
+    strength = 0.0
+    for index, line in enumerate(lines):
+        match = label.search(line)
+        if not match:
+            if not strength and mentions_field(field, line):
+                strength = 0.5
+            continue
+        strength = 0.5
+        remainder = line[match.end():].lstrip(_SEPARATORS)
+        if not remainder and index + 1 < len(lines):
+            # Valor na linha seguinte, desde que ela não seja o rótulo do próximo campo
+            remainder = lines[index + 1]
+        if is_label_line(remainder):
+            continue
+        if value.search(remainder):
+            return 1.0
+    return strength
+
+
+def pre_validate(document_type: str, text: str) -> Dict[str, Any]:
+    """Decide localmente ("aprovado"/"reprovado") ou marca como "ambiguo" para seguir à IA.
+    
+    O resultado usa o mesmo esquema de analyze_document_with_ai, com "confianca" e "origem".
+    """
+    required = PORTO_SANTOS_RULES.get(document_type, {}).get("required_fields", [])
+    lines = [line.strip() for line in normalize_text(text).splitlines() if line.strip()]
+    strengths = {field: match_field(field, lines) for field in required}
+    
+    found = [f for f, s in strengths.items() if s == 1.0]
+    absent = [f for f, s in strengths.items() if s == 0.0]
+    confidence = sum(strengths.values()) / len(required) if required else 0.0
+    text_ok = len(text) >= PRE_VALIDATION_CONFIG["min_text_chars"]
+    
+    if text_ok and required and confidence >= PRE_VALIDATION_CONFIG["pass_confidence"] and not absent:
+        decision = "aprovado"
+    elif text_ok and required and len(absent) / len(required) >= PRE_VALIDATION_CONFIG["fail_missing_ratio"]:
+        decision = "reprovado"
+        confidence = len(absent) / len(required)
+    else:
+        decision = "ambiguo"
+    
+    missing = [f for f in required if f not in found]
+    return {
+        "decisao": decision,
+        "resultado": {
+            "valido": decision == "aprovado",
+            "campos_encontrados": found,
+            "campos_faltantes": missing,
+            "observacoes": [f"Validação local por padrões de texto ({len(found)}/{len(required)} campos com valor)"],
+            "score_conformidade": round(100 * len(found) / len(required)) if required else 0,
+            "recomendacoes": [f"Incluir o campo obrigatório: {f}" for f in missing],
+            "confianca": round(confidence, 2),
+            "origem": "validador_local"
+        }
+    }
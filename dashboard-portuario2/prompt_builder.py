@@ -0,0 +1,195 @@
+"""
+Montagem do prompt de análise dentro de um orçamento de tokens, priorizando trechos e páginas
+que contêm os campos obrigatórios do tipo de documento
+"""
+import math
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Any, Optional, Pattern, Tuple
+
+from config import FIELD_LABELS, PORTO_SANTOS_RULES, PROMPT_CONFIG
+
+_compiled_labels: Dict[str, Pattern] = {}
+_unmapped_glyph = re.compile(r"\(cid:\d+\)")
+_readable_char = re.compile(r"[\w.,;:/()\-%$&@#'\"ºª°]")
+
+
+class VisionStats:
+    """Contadores de páginas renderizadas para a IA e de renderizações evitadas pela camada de texto"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"documentos": 0, "documentos_sem_imagens": 0,
+                       "paginas_renderizadas": 0, "paginas_evitadas": 0}
+    
+    def record(self, rendered: int, avoided: int) -> None:
+        with self._lock:
+            self.counts["documentos"] += 1
+            self.counts["documentos_sem_imagens"] += rendered == 0
+            self.counts["paginas_renderizadas"] += rendered
+            self.counts["paginas_evitadas"] += avoided
+    
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.counts)
+        pages = counts["paginas_renderizadas"] + counts["paginas_evitadas"]
+        return {
+            **counts,
+            "percentual_paginas_evitadas": round(100 * counts["paginas_evitadas"] / pages, 1) if pages else 0.0
+        }
+
+
+vision_stats = VisionStats()
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas e sem acentos, para casar rótulos independentemente da grafia"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def label_pattern(field: str) -> Pattern:
+    """Expressão compilada (e memoizada) com os rótulos de um campo"""
+    pattern = _compiled_labels.get(field)
+    if pattern is None:
+        labels = FIELD_LABELS.get(field) or [field.replace("_", " ")]
+        alternatives = "|".join(re.escape(label) for label in sorted(labels, key=len, reverse=True))
+        pattern = re.compile(rf"\b(?:{alternatives})\b")
+        _compiled_labels[field] = pattern
+    return pattern
+
+
+def fields_in_text(text: str, fields: List[str]) -> List[str]:
+    """Campos cujos rótulos aparecem no texto"""
+    normalized = normalize_text(text)
+    return [field for field in fields if label_pattern(field).search(normalized)]
+
+
+def text_layer_quality(text: str, fields: List[str]) -> Dict[str, Any]:
+    """Avalia se a camada de texto da página substitui a imagem: densidade, legibilidade e rótulos"""
+    glyphs = _unmapped_glyph.findall(text)
+    stripped = "".join(_unmapped_glyph.sub("", text).split())
+    chars = len(stripped)
+    total = chars + len(glyphs)
+    readable_ratio = len(_readable_char.findall(stripped)) / total if total else 0.0
+    labels = fields_in_text(text, fields) if fields else []
+    return {
+        "chars": chars,
+        "readable_ratio": round(readable_ratio, 3),
+        "labels": labels,
+        "sufficient": readable_ratio >= PROMPT_CONFIG["min_readable_ratio"]
+                      and (chars >= PROMPT_CONFIG["min_page_chars"] or bool(labels))
+    }
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa offline de tokens de texto (caracteres / chars_per_token)"""
+    return math.ceil(len(text) / PROMPT_CONFIG["chars_per_token"])
+
+
+def estimate_image_tokens(width: int, height: int, detail: str = "high") -> int:
+    """Custo em tokens de uma imagem no GPT-4o: 85 base + 170 por bloco de 512px"""
+    if detail == "low":
+        return 85
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return 85 + 170 * tiles
+
+
+def split_chunks(page_number: int, text: str, chunk_chars: int) -> List[Tuple[int, str]]:
+    """Divide o texto da página em trechos de até chunk_chars, respeitando quebras de linha"""
+    chunks, current, size = [], [], 0
+    for line in text.splitlines():
+        if current and size + len(line) + 1 > chunk_chars:
+            chunks.append((page_number, "\n".join(current)))
+            current, size = [], 0
+        current.append(line[:chunk_chars])
+        size += len(line) + 1
+    if current:
+        chunks.append((page_number, "\n".join(current)))
+    return chunks
+
+
+def build_prompt_context(document_type: str, pages: List[Tuple[int, str]],
+                         total_pages: int, token_budget: Optional[int] = None) -> Dict[str, Any]:
+    """Escolhe os trechos de texto e as páginas para imagens dentro do orçamento de tokens.
+    
+    Primeiro garante um trecho para cada campo obrigatório, depois completa o orçamento com os
+    trechos mais relevantes; o texto final mantém a ordem do documento. pages traz todas as
+    páginas lidas, inclusive as sem texto. Para imagens vão primeiro as páginas lidas sem camada
+    de texto utilizável e só depois as não lidas (além de max_scan_pages); com total_pages
+    desconhecido (0) as primeiras max_images páginas são as candidatas.
+    """
+    required = PORTO_SANTOS_RULES.get(document_type, {}).get("required_fields", [])
+    token_budget = token_budget or PROMPT_CONFIG["text_token_budget"]
+    
+    chunks = []
+    page_scores: Dict[int, int] = {}
+    text_pages = set()
+    scanned_pages = [page_number for page_number, _ in pages]
+    for page_number, text in pages:
+        if text_layer_quality(text, required)["sufficient"]:
+            text_pages.add(page_number)
+        for position, (number, chunk) in enumerate(split_chunks(page_number, text, PROMPT_CONFIG["chunk_chars"])):
+            hits = fields_in_text(chunk, required)
+            chunks.append({"page": number, "position": position, "text": chunk, "fields": hits})
+            page_scores[number] = page_scores.get(number, 0) + len(hits)
+    
+    selected, selected_ids, used_tokens, located = [], set(), 0, {}
+    
+    def take(chunk) -> bool:
+        nonlocal used_tokens
+        cost = estimate_tokens(chunk["text"])
+        if id(chunk) in selected_ids or used_tokens + cost > token_budget:
+            return False
+        selected.append(chunk)
+        selected_ids.add(id(chunk))
+        used_tokens += cost
+        for field in chunk["fields"]:
+            located.setdefault(field, chunk["page"])
+        return True
+    
+    # 1. Um trecho por campo obrigatório (o que cobre mais campos, no início do documento)
+    for field in required:
+        if field in located:
+            continue
+        candidates = [c for c in chunks if field in c["fields"]]
+        candidates.sort(key=lambda c: (-len(c["fields"]), c["page"], c["position"]))
+        for candidate in candidates:
+            if take(candidate):
+                break
+    
+    # 2. Completa com os demais trechos por relevância e posição
+    for chunk in sorted(chunks, key=lambda c: (-len(c["fields"]), c["page"], c["position"])):
+        take(chunk)
+    
+    selected.sort(key=lambda c: (c["page"], c["position"]))
+    text = "\n".join(f"[Página {c['page']}]\n{c['text']}" for c in selected)
+    
+    # Páginas para análise visual: só quando falta algum campo no texto. Primeiro as páginas lidas
+    # sem camada de texto utilizável (escaneadas ou ilegíveis), as com indícios de campos primeiro;
+    # as páginas além do limite de leitura, cujo conteúdo é desconhecido, só completam a lista
+    missing = [f for f in required if f not in located]
+    image_pages = []
+    if missing:
+        last_page = total_pages or max(scanned_pages + [PROMPT_CONFIG["max_images"]])
+        scanned = set(scanned_pages)
+        candidates = sorted((n for n in scanned_pages if n not in text_pages),
+                            key=lambda n: (-page_scores.get(n, 0), n))
+        candidates += [n for n in range(1, last_page + 1) if n not in scanned]
+        image_pages = candidates[:PROMPT_CONFIG["max_images"]]
+    
+    return {
+        "text": text,
+        "text_tokens": used_tokens,
+        "image_pages": sorted(image_pages),
+        "fields_located": located,
+        "fields_missing": missing,
+        "page_scores": page_scores,
+        "text_pages": sorted(text_pages),
+        "scanned_pages": len(scanned_pages)
+    }
@@ -0,0 +1,214 @@
+"""
+Proteções para chamadas externas lentas ou instáveis (ex: assistente AI do n8n)
+
+- SingleFlight: chamadas idênticas simultâneas compartilham uma única requisição
+- TTLCache: respostas recentes reaproveitadas por alguns minutos
+- CircuitBreaker: após falhas seguidas, cai direto no fallback e só deixa passar
+  uma chamada de teste (meio-aberto) a cada reset_timeout segundos
+
+As instâncias ficam no módulo (get_resilient_call), preservadas entre reruns do Streamlit.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from metrics import metrics
+
+CIRCUITO_FECHADO = "fechado"
+CIRCUITO_ABERTO = "aberto"
+CIRCUITO_MEIO_ABERTO = "meio_aberto"
+
+
+class CircuitOpenError(Exception):
+    """Circuito aberto: a chamada nem foi tentada"""
+
+
+def payload_key(payload: Any) -> str:
+    """Hash estável do payload (ordem das chaves não importa)"""
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """Cache LRU em memória com expiração por entrada"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Executa no máximo uma chamada por chave; quem chega durante a chamada espera o mesmo resultado"""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Retorna (resultado, compartilhado); compartilhado=True quando outra thread fez a chamada"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = func()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+
+class CircuitBreaker:
+    """Disjuntor: fechado -> aberto após failure_threshold falhas seguidas -> meio-aberto após reset_timeout"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CIRCUITO_FECHADO
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """True se a chamada pode ir ao serviço; no meio-aberto só uma chamada de teste por vez"""
+        with self._lock:
+            if self.state == CIRCUITO_FECHADO:
+                return True
+            if self.state == CIRCUITO_ABERTO and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = CIRCUITO_MEIO_ABERTO
+            if self.state == CIRCUITO_MEIO_ABERTO and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CIRCUITO_FECHADO
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == CIRCUITO_MEIO_ABERTO or self.failures >= self.failure_threshold:
+                self.state = CIRCUITO_ABERTO
+                self.opened_at = time.monotonic()
+
+    def retry_in(self) -> float:
+        """Segundos até a próxima chamada de teste (0 se o circuito não está aberto)"""
+        with self._lock:
+            if self.state != CIRCUITO_ABERTO:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+
+class ResilientCall:
+    """Cache com TTL + single-flight + disjuntor em volta de uma chamada externa"""
+
+    def __init__(self, name: str, cache_ttl_seconds: float, cache_max_entries: int,
+                 failure_threshold: int, reset_timeout_seconds: float):
+        self.name = name
+        self.cache = TTLCache(cache_ttl_seconds, cache_max_entries)
+        self.flights = SingleFlight()
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout_seconds)
+
+    def call(self, key: str, func: Callable[[], Any], fallback: Callable[[BaseException], Any]) -> Any:
+        """func() levanta exceção em caso de falha; fallback(erro) produz a resposta alternativa.
+
+        Só respostas de func() entram no cache; fallbacks não são compartilhados entre chamadas.
+        """
+        hit, value = self.cache.get(key)
+        if hit:
+            metrics.inc("chamada_resiliente_total", servico=self.name, resultado="cache")
+            return value
+
+        try:
+            value, shared = self.flights.do(key, lambda: self._call_upstream(key, func))
+        except Exception as e:
+            return fallback(e)
+        if shared:
+            metrics.inc("chamada_resiliente_total", servico=self.name, resultado="compartilhada")
+        return value
+
+    def _call_upstream(self, key: str, func: Callable[[], Any]) -> Any:
+        # Outra chamada pode ter preenchido o cache entre a consulta e o início do voo
+        hit, value = self.cache.get(key)
+        if hit:
+            return value
+
+        if not self.breaker.allow():
+            metrics.inc("chamada_resiliente_total", servico=self.name, resultado="circuito_aberto")
+            raise CircuitOpenError(f"Circuito aberto para {self.name}; nova tentativa em "
+                                   f"{self.breaker.retry_in():.0f}s")
+        try:
+            value = func()
+        except Exception:
+            self.breaker.record_failure()
+            metrics.inc("chamada_resiliente_total", servico=self.name, resultado="falha")
+            raise
+        self.breaker.record_success()
+        self.cache.set(key, value)
+        metrics.inc("chamada_resiliente_total", servico=self.name, resultado="chamada")
+        return value
+
+
+_calls: Dict[str, ResilientCall] = {}
+_calls_lock = threading.Lock()
+
+
+def get_resilient_call(name: str, config: Dict[str, Any]) -> ResilientCall:
+    """Instância única por nome no processo (cache e disjuntor valem para todas as sessões)"""
+    with _calls_lock:
+        call = _calls.get(name)
+        if call is None:
+            call = _calls[name] = ResilientCall(name, **config)
+        return call
@@ -0,0 +1,69 @@
+"""
+Parser incremental de JSON para respostas em streaming do modelo
+"""
+import json
+from typing import Any, List, Tuple
+
+
+class IncrementalJSONParser:
+    """Recebe pedaços de texto e devolve cada membro do objeto JSON de nível superior
+    assim que ele termina, sem esperar o fechamento do objeto.
+    
+    Texto antes do primeiro '{' (ex: ```json) é ignorado.
+    """
+    
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+        self.done = False
+    
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Adiciona um pedaço e retorna os pares (chave, valor) completados"""
+        self.buffer += chunk
+        completed = []
+        
+        while self._pos < len(self.buffer) and not self.done:
+            char = self.buffer[self._pos]
+            
+            if self._depth == 0 and char != "{":
+                # Texto antes do objeto é ignorado
+                pass
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                if self._depth >= 1:
+                    self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = self._pos + 1
+            elif char in "}]":
+                if self._depth == 1:
+                    completed.extend(self._close_member(self._pos))
+                    self.done = True
+                self._depth = max(0, self._depth - 1)
+            elif char == "," and self._depth == 1:
+                completed.extend(self._close_member(self._pos))
+                self._member_start = self._pos + 1
+            
+            self._pos += 1
+        
+        return completed
+    
+    def _close_member(self, end: int) -> List[Tuple[str, Any]]:
+        member = self.buffer[self._member_start:end].strip()
+        if not member:
+            return []
+        try:
+            return list(json.loads("{" + member + "}").items())
+        except ValueError:
+            return []
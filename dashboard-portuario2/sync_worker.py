@@ -0,0 +1,107 @@
+"""
+Sincronização incremental em segundo plano das APIs do Instituto AmiGU para o LocalStore
+"""
+import json
+import threading
+import time
+from typing import Dict, List, Any, Optional, Tuple
+
+from config import SYNC_CONFIG, SYSTEM_CONFIG
+from http_client import AmiguAPIClient, get_amigu_client
+from local_store import LocalStore
+
+
+def _extrair_registros(resposta: Any) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Aceita uma lista simples ou um envelope {"dados"/"data"/"items": [...], "cursor": ...}"""
+    if isinstance(resposta, list):
+        return resposta, None
+    for chave in ("dados", "data", "items"):
+        if isinstance(resposta.get(chave), list):
+            return resposta[chave], resposta.get("cursor") or resposta.get("next_cursor")
+    return [], None
+
+
+def _ordem_id(registro_id: Any) -> Tuple[int, int, str]:
+    """Ordem dos ids no servidor: numérica para ids numéricos ("9" < "10"), textual para os demais"""
+    texto = str(registro_id)
+    return (0, int(texto), "") if texto.isdigit() else (1, 0, texto)
+
+
+def _cursor_dos_registros(registros: List[Dict[str, Any]], id_field: str) -> Optional[Tuple[str, str]]:
+    """(marca de atualização, id) do último registro: o id desempata registros com a mesma marca"""
+    marcas = [(str(r.get("atualizado_em") or r.get("updated_at")), str(r.get(id_field, r.get("id", ""))))
+              for r in registros if r.get("atualizado_em") or r.get("updated_at")]
+    return max(marcas, key=lambda marca: (marca[0], _ordem_id(marca[1]))) if marcas else None
+
+
+def _codificar_cursor(cursor: Tuple[str, str]) -> str:
+    return json.dumps(list(cursor))
+
+
+def _decodificar_cursor(cursor: Optional[str]) -> Optional[Tuple[str, Optional[str]]]:
+    """Cursor gravado no store; cursores antigos (só a marca) não têm id de desempate"""
+    if not cursor:
+        return None
+    try:
+        marca, registro_id = json.loads(cursor)
+        return str(marca), str(registro_id)
+    except (ValueError, TypeError):
+        return cursor, None
+
+
+class IncrementalSyncer(threading.Thread):
+    """Consulta periodicamente apenas os registros alterados desde o último cursor de cada recurso"""
+    
+    def __init__(self, store: LocalStore, client: Optional[AmiguAPIClient] = None,
+                 interval: Optional[float] = None):
+        super().__init__(name="amigu-sync", daemon=True)
+        self.store = store
+        self.client = client or get_amigu_client()
+        self.interval = interval or SYSTEM_CONFIG["refresh_interval"]
+        self.erros: Dict[str, str] = {}
+        self._stop_event = threading.Event()
+    
+    def sincronizar_recurso(self, recurso: str) -> int:
+        """Busca as páginas de alterações de um recurso e grava no store"""
+        config = SYNC_CONFIG["recursos"][recurso]
+        page_size = SYNC_CONFIG["page_size"]
+        cursor = self.store.cursor(recurso)
+        alterados = 0
+        
+        while True:
+            params = {"limit": page_size}
+            marca, registro_id = _decodificar_cursor(cursor) or (None, None)
+            if marca:
+                params[SYNC_CONFIG["cursor_param"]] = marca
+            if registro_id is not None:
+                params[SYNC_CONFIG["cursor_id_param"]] = registro_id
+            resposta = self.client.get(config["servico"], recurso, params=params)
+            registros, cursor_servidor = _extrair_registros(resposta)
+            # (marca, id) do último registro: uma página cheia que termina no meio de registros
+            # com a mesma marca continua a partir do id, sem pular os restantes
+            ultimo = _cursor_dos_registros(registros, config["id_field"])
+            proximo_cursor = _codificar_cursor(ultimo) if ultimo else cursor_servidor or cursor
+            
+            alterados += self.store.upsert(recurso, registros, config["id_field"], proximo_cursor)
+            if len(registros) < page_size or proximo_cursor == cursor:
+                return alterados
+            cursor = proximo_cursor
+    
+    def sincronizar(self) -> int:
+        """Executa uma rodada completa de sincronização"""
+        alterados = 0
+        for recurso in SYNC_CONFIG["recursos"]:
+            try:
+                alterados += self.sincronizar_recurso(recurso)
+                self.erros.pop(recurso, None)
+            except Exception as e:
+                self.erros[recurso] = str(e)
+        return alterados
+    
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            self.sincronizar()
+            self._stop_event.wait(self.interval)
+    
+    def parar(self) -> None:
+        self._stop_event.set()
@@ -0,0 +1,212 @@
+"""
+Gerador de PDFs portuários sintéticos (DUE, Manifesto, Plano_Carga) para benchmarks
+
+Gera documentos com camada de texto (PDF "nascido digital") ou escaneados (uma imagem
+monocromática por página, como um scanner de documentos, sem texto), escrevendo página a
+página para não manter o documento inteiro em memória.
+
+Uso:
+    python synthetic_pdfs.py Manifesto 100 --escaneado -o manifesto_100.pdf
+"""
+import argparse
+import io
+import sys
+import zlib
+from typing import BinaryIO, Dict, List
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Cabeçalho de cada tipo: rótulo + valor no formato esperado pela pré-validação
+DOCUMENT_HEADERS: Dict[str, List[str]] = {
+    "DUE": [
+        "DECLARACAO UNICA DE EXPORTACAO",
+        "Numero da DUE: 24BR0000123456-7",
+        "Navio: MSC AURORA",
+        "Agente maritimo: Santos Shipping Agencia Ltda",
+        "Carga: Cafe verde em graos, 19.200 sacas",
+        "Exportador: Cooperativa Agricola do Sul de Minas"
+    ],
+    "Manifesto": [
+        "MANIFESTO DE CARGA",
+        "Lista de carga: 1.250 conteineres conforme relacao anexa",
+        "Porto de origem: Santos (BRSSZ)",
+        "Porto de destino: Rotterdam (NLRTM)",
+        "Peso bruto: 18.750.000 kg",
+        "Navio: MAERSK ESSEX"
+    ],
+    "Plano_Carga": [
+        "PLANO DE CARGA E ESTIVA",
+        "Distribuicao da carga: poroes 1 a 7, bays 01 a 42",
+        "Peso total: 52.300 t",
+        "Centro de gravidade: KG 11,42 m / GM 1,85 m",
+        "Navio: CMA CGM SANTOS"
+    ]
+}
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+LINES_PER_PAGE = 48
+SCAN_DPI = 100
+
+
+def page_lines(document_type: str, page_number: int) -> List[str]:
+    """Linhas de texto de uma página: cabeçalho na primeira, relação de carga nas demais"""
+    lines = []
+    if page_number == 1:
+        lines.extend(DOCUMENT_HEADERS[document_type])
+        lines.append("")
+    while len(lines) < LINES_PER_PAGE:
+        item = (page_number - 1) * LINES_PER_PAGE + len(lines) + 1
+        lines.append(
+            f"{item:05d}  MSCU{item * 7919 % 10000000:07d}  40HC  Bay {item % 42 + 1:02d}  "
+            f"Tier {item % 9 * 2 + 2:02d}  {18000 + item * 37 % 12000:,} kg  BRSSZ > NLRTM".replace(",", ".")
+        )
+    return lines
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+class _PDFWriter:
+    """Escritor mínimo de PDF que grava cada objeto assim que é criado"""
+
+    CATALOG, PAGES, FONT = 1, 2, 3
+
+    def __init__(self, out: BinaryIO):
+        self.out = out
+        self.offsets: Dict[int, int] = {}
+        self.next_id = 4
+        self.kids: List[int] = []
+        self.position = 0
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(self.FONT, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+                                b"/Encoding /WinAnsiEncoding >>")
+
+    def _write(self, data: bytes) -> None:
+        self.out.write(data)
+        self.position += len(data)
+
+    def _object(self, object_id: int, body: bytes) -> None:
+        self.offsets[object_id] = self.position
+        self._write(b"%d 0 obj\n" % object_id + body + b"\nendobj\n")
+
+    def _new_id(self) -> int:
+        self.next_id += 1
+        return self.next_id - 1
+
+    def _stream(self, dictionary: bytes, data: bytes) -> int:
+        object_id = self._new_id()
+        self._object(object_id, b"<< %s /Length %d >>\nstream\n" % (dictionary, len(data)) + data + b"\nendstream")
+        return object_id
+
+    def _page(self, contents_id: int, resources: bytes) -> None:
+        page_id = self._new_id()
+        self._object(page_id, b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources %s "
+                              b"/Contents %d 0 R >>" % (self.PAGES, PAGE_WIDTH, PAGE_HEIGHT, resources, contents_id))
+        self.kids.append(page_id)
+
+    def add_text_page(self, lines: List[str]) -> None:
+        commands = " ".join(f"({_escape(line)}) '" for line in lines)
+        data = f"BT /F1 9 Tf 40 {PAGE_HEIGHT - 40} Td 16 TL {commands} ET".encode("cp1252", "replace")
+        contents_id = self._stream(b"", data)
+        self._page(contents_id, b"<< /Font << /F1 %d 0 R >> >>" % self.FONT)
+
+    def add_image_page(self, bitmap: bytes, width: int, height: int) -> None:
+        image_id = self._stream(
+            b"/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+            b"/BitsPerComponent 1 /Filter /FlateDecode" % (width, height), bitmap
+        )
+        contents_id = self._stream(b"", b"q %d 0 0 %d 0 0 cm /Im0 Do Q" % (PAGE_WIDTH, PAGE_HEIGHT))
+        self._page(contents_id, b"<< /XObject << /Im0 %d 0 R >> >>" % image_id)
+
+    def close(self) -> None:
+        kids = b" ".join(b"%d 0 R" % kid for kid in self.kids)
+        self._object(self.PAGES, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.kids)))
+        self._object(self.CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGES)
+        xref_position = self.position
+        size = self.next_id
+        entries = [b"0000000000 65535 f \n"]
+        entries.extend(b"%010d 00000 n \n" % self.offsets[i] for i in range(1, size))
+        self._write(b"xref\n0 %d\n" % size + b"".join(entries))
+        self._write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (size, self.CATALOG, xref_position))
+
+
+class _GlyphCache:
+    """Máscaras de caracteres renderizadas uma única vez (desenhar texto com FreeType é lento)"""
+
+    def __init__(self):
+        try:
+            self.font = ImageFont.load_default(size=16)
+        except TypeError:
+            self.font = ImageFont.load_default()
+        self.glyphs: Dict[str, tuple] = {}
+
+    def glyph(self, char: str) -> tuple:
+        cached = self.glyphs.get(char)
+        if cached is None:
+            left, top, right, bottom = self.font.getbbox(char)
+            mask = Image.new("1", (max(1, right - left), max(1, bottom - top)), 0)
+            ImageDraw.Draw(mask).text((-left, -top), char, fill=1, font=self.font)
+            cached = (mask, left, top, self.font.getlength(char))
+            self.glyphs[char] = cached
+        return cached
+
+    def draw_line(self, image: Image.Image, x: float, y: int, text: str) -> None:
+        for char in text:
+            mask, left, top, advance = self.glyph(char)
+            if not char.isspace():
+                image.paste(0, (round(x) + left, y + top), mask)
+            x += advance
+
+
+def _scan_page(lines: List[str], glyphs: _GlyphCache) -> bytes:
+    """Página "escaneada": texto desenhado em bitmap de 1 bit, comprimido com Flate"""
+    width, height = PAGE_WIDTH * SCAN_DPI // 72, PAGE_HEIGHT * SCAN_DPI // 72
+    image = Image.new("1", (width, height), 1)
+    line_height = (height - 80) // LINES_PER_PAGE
+    for index, line in enumerate(lines):
+        glyphs.draw_line(image, 50, 40 + index * line_height, line)
+    return zlib.compress(image.tobytes(), 6)
+
+
+def write_document(out: BinaryIO, document_type: str, pages: int, scanned: bool = False) -> None:
+    """Grava um documento sintético de `pages` páginas em `out`"""
+    if document_type not in DOCUMENT_HEADERS:
+        raise ValueError(f"Tipo sem modelo sintético: {document_type}")
+
+    writer = _PDFWriter(out)
+    glyphs = _GlyphCache() if scanned else None
+
+    for page_number in range(1, pages + 1):
+        lines = page_lines(document_type, page_number)
+        if scanned:
+            bitmap = _scan_page(lines, glyphs)
+            writer.add_image_page(bitmap, PAGE_WIDTH * SCAN_DPI // 72, PAGE_HEIGHT * SCAN_DPI // 72)
+        else:
+            writer.add_text_page(lines)
+    writer.close()
+
+
+def generate_document(document_type: str, pages: int, scanned: bool = False) -> bytes:
+    """Documento sintético em memória"""
+    buffer = io.BytesIO()
+    write_document(buffer, document_type, pages, scanned)
+    return buffer.getvalue()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Gera PDFs portuários sintéticos")
+    parser.add_argument("tipo", choices=list(DOCUMENT_HEADERS.keys()))
+    parser.add_argument("paginas", type=int)
+    parser.add_argument("--escaneado", action="store_true", help="Páginas como imagem, sem camada de texto")
+    parser.add_argument("-o", "--saida", required=True, help="Arquivo PDF de saída")
+    args = parser.parse_args(argv)
+
+    with open(args.saida, "wb") as f:
+        write_document(f, args.tipo, args.paginas, args.escaneado)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# Bancos e caches dos testes fora de data/ (config lê PORTO_DATA_DIR na importação)
+os.environ.setdefault("PORTO_DATA_DIR", tempfile.mkdtemp(prefix="porto-testes-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "poppler: precisa do pdftoppm/pdfinfo (poppler-utils) instalados")
+
+
+def pytest_collection_modifyitems(config, items):
+    if shutil.which("pdftoppm") and shutil.which("pdfinfo"):
+        return
+    skip = pytest.mark.skip(reason="poppler-utils (pdftoppm/pdfinfo) não instalado")
+    for item in items:
+        if "poppler" in item.keywords:
+            item.add_marker(skip)
@@ -0,0 +1,206 @@
+import io
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+from PIL import Image
+
+import document_analyzer
+from batch_processor import LocalPDFFile
+from bounded_memory import MemoryBudget, SpooledPDFFile, memory_budget
+from config import MEMORY_CONFIG, PRE_VALIDATION_CONFIG, PROMPT_CONFIG
+from document_analyzer import RealDocumentAnalyzer
+from synthetic_pdfs import write_document
+
+PACOTE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_reserva_e_liberacao_do_orcamento():
+    budget = MemoryBudget(max_mb=100)
+    with budget.reserve(60):
+        assert (budget.reserved_mb, budget.active) == (60, 1)
+        with budget.reserve(40):
+            assert (budget.reserved_mb, budget.active) == (100, 2)
+    assert (budget.reserved_mb, budget.active) == (0, 0)
+
+
+def test_analise_sozinha_acima_do_teto_e_admitida():
+    budget = MemoryBudget(max_mb=100)
+    with budget.reserve(250, timeout=0):
+        assert budget.reserved_mb == 250
+
+
+def test_reserva_que_nao_cabe_espera_ate_o_timeout():
+    budget = MemoryBudget(max_mb=100)
+    with budget.reserve(80):
+        with pytest.raises(TimeoutError):
+            with budget.reserve(30, timeout=0.05):
+                pass
+        assert (budget.reserved_mb, budget.active) == (80, 1)
+
+
+def test_reserva_liberada_admite_quem_esperava():
+    budget = MemoryBudget(max_mb=100)
+    liberar, admitido = threading.Event(), threading.Event()
+
+    def primeira():
+        with budget.reserve(80):
+            liberar.wait(5)
+
+    def segunda():
+        with budget.reserve(30, timeout=5):
+            admitido.set()
+
+    threads = [threading.Thread(target=primeira), threading.Thread(target=segunda)]
+    threads[0].start()
+    while budget.active == 0:
+        pass
+    threads[1].start()
+    assert not admitido.wait(0.05)
+    liberar.set()
+    for thread in threads:
+        thread.join(5)
+    assert admitido.is_set()
+    assert (budget.reserved_mb, budget.active) == (0, 0)
+
+
+def test_reserva_liberada_em_excecao():
+    budget = MemoryBudget(max_mb=100)
+    with pytest.raises(RuntimeError):
+        with budget.reserve(60):
+            raise RuntimeError("falha na análise")
+    assert (budget.reserved_mb, budget.active) == (0, 0)
+
+
+def test_spooled_remove_o_arquivo_ao_fechar(tmp_path):
+    origem = io.BytesIO(b"%PDF-1.4 conteudo")
+    origem.name = "doc.pdf"
+    with SpooledPDFFile(origem, directory=str(tmp_path)) as spooled:
+        assert os.path.exists(spooled.path)
+        assert spooled.size == len(origem.getvalue())
+        assert spooled.read() == origem.getvalue()
+        assert spooled.source_name == "doc.pdf"
+    assert not os.path.exists(spooled.path)
+    assert os.listdir(tmp_path) == []
+
+
+def test_spooled_remove_o_arquivo_em_excecao(tmp_path):
+    with pytest.raises(RuntimeError):
+        with SpooledPDFFile(io.BytesIO(b"%PDF-1.4"), directory=str(tmp_path)) as spooled:
+            raise RuntimeError("falha na análise")
+    assert not os.path.exists(spooled.path)
+    assert os.listdir(tmp_path) == []
+
+
+def test_spooled_remove_o_arquivo_se_a_copia_falhar(tmp_path):
+    class OrigemQuebrada(io.BytesIO):
+        def read(self, *args):
+            raise OSError("upload interrompido")
+
+    with pytest.raises(OSError):
+        SpooledPDFFile(OrigemQuebrada(b"%PDF-1.4"), directory=str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_attach_nao_remove_a_copia(tmp_path):
+    with SpooledPDFFile(io.BytesIO(b"%PDF-1.4"), directory=str(tmp_path)) as spooled:
+        with SpooledPDFFile.attach(spooled.path) as anexado:
+            assert anexado.read() == b"%PDF-1.4"
+        assert os.path.exists(spooled.path)
+    assert os.listdir(tmp_path) == []
+
+
+class UploadSemCopia(LocalPDFFile):
+    """Upload que falha se o analisador pedir uma cópia integral do PDF"""
+
+    def getvalue(self):
+        raise AssertionError("getvalue() chamado no modo de memória limitada")
+
+
+def test_memoria_limitada_renderiza_e_codifica_uma_pagina_por_vez(tmp_path, monkeypatch):
+    paginas_visuais = 20
+    monkeypatch.setitem(PRE_VALIDATION_CONFIG, "enabled", False)
+    monkeypatch.setitem(PROMPT_CONFIG, "max_images", paginas_visuais)
+    monkeypatch.setattr(document_analyzer, "ANALYSIS_PAGES", paginas_visuais)
+    caminho = str(tmp_path / "manifesto.pdf")
+    with open(caminho, "wb") as f:
+        write_document(f, "Manifesto", 40, scanned=True)
+
+    renderizadas, abertas = [], []
+
+    def convert_from_path(pdf_path, dpi, first_page, last_page, grayscale):
+        # Uma página por chamada, lida da cópia em disco, com a reserva do orçamento ativa
+        assert os.path.exists(pdf_path) and pdf_path != caminho
+        assert memory_budget.active == 1
+        assert len(abertas) == 0, "bitmap da página anterior ainda aberto"
+        renderizadas.append((first_page, last_page))
+        imagem = Image.new("L", (120, 170), 255)
+        fechar = imagem.close
+
+        def close():
+            abertas.remove(imagem)
+            fechar()
+        imagem.close = close
+        abertas.append(imagem)
+        return [imagem]
+
+    monkeypatch.setattr(document_analyzer.pdf2image, "convert_from_path", convert_from_path)
+    monkeypatch.setattr(document_analyzer.pdf2image, "pdfinfo_from_path", lambda path: {"Pages": 40})
+
+    analyzer = RealDocumentAnalyzer("sk-teste", bounded_memory=True)
+    enviadas = []
+    analyzer.analyze_document_with_ai = lambda tipo, texto, imagens, on_field=None: enviadas.extend(imagens) or {}
+    resultado = analyzer.process_document(UploadSemCopia(caminho), "Manifesto")
+
+    assert resultado["status"] == "sucesso"
+    assert renderizadas == [(n, n) for n in range(1, paginas_visuais + 1)]
+    assert abertas == []
+    assert len(enviadas) == paginas_visuais and all(isinstance(img, dict) for img in enviadas)
+    assert memory_budget.active == 0 and memory_budget.reserved_mb == 0
+
+
+# Mede, num processo separado, o pico de RSS de process_document sobre um PDF escaneado grande
+# com `paginas_visuais` páginas renderizadas para a análise visual
+_SCRIPT_RSS = """
+import copy, resource, sys
+from config import PORTO_SANTOS_RULES, PRE_VALIDATION_CONFIG, PROMPT_CONFIG
+caminho, limitada, paginas_visuais = sys.argv[1], sys.argv[2] == "1", int(sys.argv[3])
+PROMPT_CONFIG["max_images"] = paginas_visuais
+PRE_VALIDATION_CONFIG["enabled"] = False
+from batch_processor import LocalPDFFile
+from benchmark import StubOpenAI
+from document_analyzer import RealDocumentAnalyzer
+analyzer = RealDocumentAnalyzer("teste", bounded_memory=limitada)
+analyzer._client = StubOpenAI(0)
+analyzer.porto_santos_rules = copy.deepcopy(PORTO_SANTOS_RULES)
+analyzer.porto_santos_rules["Manifesto"]["max_size_mb"] = float("inf")
+resultado = analyzer.process_document(LocalPDFFile(caminho), "Manifesto")
+assert resultado["status"] == "sucesso", resultado
+pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(pico / 2 ** 20 if sys.platform == "darwin" else pico / 1024)
+"""
+
+
+def _pico_rss_mb(caminho: str, limitada: bool, paginas_visuais: int) -> float:
+    resultado = subprocess.run(
+        [sys.executable, "-c", _SCRIPT_RSS, caminho, "1" if limitada else "0", str(paginas_visuais)],
+        cwd=PACOTE, capture_output=True, text=True, timeout=1800
+    )
+    assert resultado.returncode == 0, resultado.stderr
+    return float(resultado.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.poppler
+def test_pico_de_rss_com_500_paginas_dentro_do_orcamento(tmp_path):
+    caminho = str(tmp_path / "manifesto_500.pdf")
+    with open(caminho, "wb") as f:
+        write_document(f, "Manifesto", 500, scanned=True)
+
+    limitada = _pico_rss_mb(caminho, True, paginas_visuais=60)
+    sem_limite = _pico_rss_mb(caminho, False, paginas_visuais=60)
+
+    assert limitada <= MEMORY_CONFIG["max_memory_mb"]
+    # Sem o modo limitado os 60 bitmaps ficam na memória ao mesmo tempo
+    assert limitada < sem_limite
@@ -0,0 +1,27 @@
+from event_bus import EventBus
+
+
+def test_eventos_desde_retorna_cursor_consistente():
+    bus = EventBus(max_eventos=10)
+    assert bus.eventos_desde(-1) == (None, 0)
+
+    bus.publicar("navio_atualizado", "N1")
+    bus.publicar("navio_atualizado", "N2")
+    eventos, cursor = bus.eventos_desde(0)
+    assert [e["chave"] for e in eventos] == ["N1", "N2"]
+    assert cursor == 2
+
+    # Publicado depois da leitura: aparece na próxima, a partir do cursor devolvido
+    bus.publicar("navio_atualizado", "N3")
+    eventos, cursor = bus.eventos_desde(cursor)
+    assert [e["chave"] for e in eventos] == ["N3"]
+    assert bus.eventos_desde(cursor) == ([], 3)
+
+
+def test_leitor_atrasado_recarrega():
+    bus = EventBus(max_eventos=2)
+    for chave in ("N1", "N2", "N3"):
+        bus.publicar("navio_atualizado", chave)
+    assert bus.eventos_desde(0) == (None, 3)
+    eventos, _ = bus.eventos_desde(1)
+    assert [e["chave"] for e in eventos] == ["N2", "N3"]
@@ -0,0 +1,133 @@
+import os
+import time
+
+from job_queue import JobQueue, STATUS_CONCLUIDO, STATUS_ERRO, STATUS_PENDENTE, STATUS_PROCESSANDO
+
+
+def _fila(tmp_path):
+    return JobQueue(path=str(tmp_path / "jobs.sqlite3"), files_dir=str(tmp_path / "jobs"))
+
+
+def _expirar_lease(fila, job_id):
+    fila._conn.execute("UPDATE jobs SET lease_expires = ? WHERE id = ?", (time.time() - 1, job_id))
+
+
+def test_lease_expirado_volta_para_a_fila(tmp_path):
+    fila = _fila(tmp_path)
+    job_id = fila.submit(b"%PDF-1.4", "doc.pdf", "DUE")
+    assert fila.claim("w1")["id"] == job_id
+
+    _expirar_lease(fila, job_id)
+    job = fila.claim("w2")
+    assert job["id"] == job_id
+    assert job["attempts"] == 2
+    assert fila.get(job_id)["status"] == STATUS_PROCESSANDO
+
+
+def test_lease_expirado_na_ultima_tentativa_vira_erro(tmp_path):
+    fila = _fila(tmp_path)
+    job_id = fila.submit(b"%PDF-1.4", "doc.pdf", "DUE")
+    max_attempts = fila.get(job_id)["max_attempts"]
+
+    for tentativa in range(max_attempts):
+        job = fila.claim(f"w{tentativa}")
+        assert job["id"] == job_id
+        _expirar_lease(fila, job_id)
+
+    assert fila.claim("w-final") is None
+    job = fila.get(job_id)
+    assert job["status"] == STATUS_ERRO
+    assert job["attempts"] == max_attempts
+    assert job["worker"] is None
+    assert "lease" in job["error"]
+    assert fila.depth()[STATUS_PENDENTE] == 0
+
+
+def test_worker_com_lease_expirado_nao_sobrescreve_o_resultado(tmp_path):
+    fila = _fila(tmp_path)
+    job_id = fila.submit(b"%PDF-1.4", "doc.pdf", "DUE")
+    fila.claim("w1")
+    _expirar_lease(fila, job_id)
+    fila.claim("w2")
+
+    assert not fila.complete(job_id, "w1", {"origem": "w1"})
+    assert not fila.fail(job_id, "w1", "erro tardio")
+    assert not fila.renew(job_id, "w1")
+    assert fila.get(job_id)["status"] == STATUS_PROCESSANDO
+
+    assert fila.complete(job_id, "w2", {"origem": "w2"})
+    job = fila.get(job_id)
+    assert job["status"] == STATUS_CONCLUIDO
+    assert job["result"] == {"origem": "w2"}
+
+
+def test_renovacao_mantem_o_lease(tmp_path):
+    fila = _fila(tmp_path)
+    job_id = fila.submit(b"%PDF-1.4", "doc.pdf", "DUE")
+    fila.claim("w1")
+    _expirar_lease(fila, job_id)
+    assert fila.renew(job_id, "w1")
+    # Lease renovado: ninguém retoma o job
+    assert fila.claim("w2") is None
+
+
+def _arquivos(tmp_path):
+    return os.listdir(tmp_path / "jobs")
+
+
+def test_arquivo_removido_ao_concluir(tmp_path):
+    fila = _fila(tmp_path)
+    job_id = fila.submit(b"%PDF-1.4 a", "doc.pdf", "DUE")
+    fila.claim("w1")
+    assert len(_arquivos(tmp_path)) == 1
+    fila.complete(job_id, "w1", {})
+    assert _arquivos(tmp_path) == []
+
+
+def test_arquivo_removido_so_na_falha_final(tmp_path):
+    fila = _fila(tmp_path)
+    job_id = fila.submit(b"%PDF-1.4 b", "doc.pdf", "DUE")
+    max_attempts = fila.get(job_id)["max_attempts"]
+    for tentativa in range(max_attempts):
+        fila._conn.execute("UPDATE jobs SET available_at = 0 WHERE id = ?", (job_id,))
+        fila.claim("w1")
+        assert len(_arquivos(tmp_path)) == 1
+        assert fila.fail(job_id, "w1", "falhou")
+    assert fila.get(job_id)["status"] == STATUS_ERRO
+    assert _arquivos(tmp_path) == []
+
+
+def test_arquivo_compartilhado_fica_enquanto_outro_job_usa(tmp_path):
+    fila = _fila(tmp_path)
+    primeiro = fila.submit(b"%PDF-1.4 c", "doc.pdf", "DUE")
+    segundo = fila.submit(b"%PDF-1.4 c", "copia.pdf", "DUE")
+    fila.claim("w1")
+    fila.complete(primeiro, "w1", {})
+    assert len(_arquivos(tmp_path)) == 1
+    assert fila.claim("w1")["id"] == segundo
+    fila.complete(segundo, "w1", {})
+    assert _arquivos(tmp_path) == []
+
+
+def test_lease_expirado_na_ultima_tentativa_remove_o_arquivo(tmp_path):
+    fila = _fila(tmp_path)
+    job_id = fila.submit(b"%PDF-1.4 d", "doc.pdf", "DUE")
+    for tentativa in range(fila.get(job_id)["max_attempts"]):
+        fila.claim(f"w{tentativa}")
+        _expirar_lease(fila, job_id)
+    fila.claim("w-final")
+    assert _arquivos(tmp_path) == []
+
+
+def test_heartbeat_renova_o_lease_durante_o_processamento(tmp_path, monkeypatch):
+    from config import JOB_QUEUE_CONFIG
+    from job_worker import lease_heartbeat
+
+    monkeypatch.setitem(JOB_QUEUE_CONFIG, "heartbeat_seconds", 0.01)
+    fila = _fila(tmp_path)
+    job_id = fila.submit(b"%PDF-1.4 e", "doc.pdf", "DUE")
+    fila.claim("w1")
+    with lease_heartbeat(fila, job_id, "w1"):
+        _expirar_lease(fila, job_id)
+        time.sleep(0.1)
+    assert fila.claim("w2") is None
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+
+from config import BERTH_CONFIG
+from event_bus import EVENTO_NAVIO_POSICAO, EventBus
+from local_event_source import LocalEventSource
+from vessel_repository import VesselRepository
+
+
+def test_fonte_local_so_publica_eventos(tmp_path):
+    repo = VesselRepository(str(tmp_path / "porto.sqlite3"))
+    agora = datetime(2025, 1, 1, 12)
+    for n in range(5):
+        repo.salvar({"navio_id": f"N{n}", "nome": f"Navio {n}", "tipo_carga": "Carga Geral",
+                     "eta": agora + timedelta(hours=n), "status": BERTH_CONFIG["status_planejados"][0],
+                     "berco": "Berço 1"})
+    antes = [(n["navio_id"], n["eta"]) for n in repo.listar()]
+    versao = repo.versao
+
+    bus = EventBus()
+    fonte = LocalEventSource(repo, event_bus=bus)
+    for minuto in range(0, 600, 5):
+        fonte.passo(agora + timedelta(minutes=minuto))
+
+    assert repo.versao == versao
+    assert [(n["navio_id"], n["eta"]) for n in repo.listar()] == antes
+    eventos, _ = bus.eventos_desde(0)
+    assert eventos and all(evento["tipo"] == EVENTO_NAVIO_POSICAO for evento in eventos)
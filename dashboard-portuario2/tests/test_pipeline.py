@@ -0,0 +1,52 @@
+import os
+from concurrent.futures import Future
+
+import pipeline
+from batch_processor import LocalPDFFile
+from config import PRE_VALIDATION_CONFIG
+from document_analyzer import RealDocumentAnalyzer
+from synthetic_pdfs import write_document
+
+
+class ExecutorEmLinha:
+    """Executa as tarefas no próprio processo, registrando os argumentos recebidos"""
+
+    def __init__(self):
+        self.tarefas = []
+
+    def submit(self, fn, *args):
+        self.tarefas.append((fn.__name__, args, os.path.exists(args[0])))
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, **kwargs):
+        pass
+
+
+def test_tarefas_recebem_caminho_da_copia_unica(tmp_path, monkeypatch):
+    monkeypatch.setitem(PRE_VALIDATION_CONFIG, "enabled", False)
+    caminho = str(tmp_path / "manifesto.pdf")
+    with open(caminho, "wb") as f:
+        write_document(f, "Manifesto", 3, scanned=True)
+
+    analyzer = RealDocumentAnalyzer("sk-teste")
+    analyzer.count_pdf_pages = lambda pdf_file: 3
+    analyzer.render_encoded_pages = lambda pdf_path, pages, document_type=None: [{"pagina": list(pages)}]
+    analyzer.analyze_document_with_ai = lambda tipo, texto, imagens, on_field=None: {"valido": True, "imagens": imagens}
+    monkeypatch.setattr(pipeline, "_worker_analyzer", analyzer)
+
+    doc_pipeline = pipeline.DocumentPipeline.__new__(pipeline.DocumentPipeline)
+    doc_pipeline.analyzer = analyzer
+    doc_pipeline._pool = ExecutorEmLinha()
+    resultado = doc_pipeline.process_document(LocalPDFFile(caminho), "Manifesto")
+
+    assert resultado["status"] == "sucesso"
+    tarefas = doc_pipeline._pool.tarefas
+    assert [nome for nome, _, _ in tarefas] == ["_extract_text"] + ["_render_page"] * len(tarefas[1:])
+    assert len(tarefas) > 1
+    caminhos = {args[0] for _, args, _ in tarefas}
+    # Um único arquivo por documento, que existia durante as tarefas e foi removido no fim
+    assert len(caminhos) == 1 and all(isinstance(c, str) for c in caminhos)
+    assert all(existia for _, _, existia in tarefas)
+    assert not os.path.exists(caminhos.pop())
@@ -0,0 +1,80 @@
+from pre_validator import is_label_line, match_field, pre_validate
+from synthetic_pdfs import page_lines
+
+FILLER = "\n".join(
+    "Este certificado e emitido conforme as normas da autoridade maritima vigentes no porto."
+    for _ in range(5)
+)
+
+
+def test_formulario_em_branco_nao_e_aprovado():
+    texto = "Autoridade emissora:\nTipo de certificado:\nValidade: 10/10/2025\n" + FILLER
+    decisao = pre_validate("Certificado_Seguranca", texto)
+    assert decisao["decisao"] != "aprovado"
+    assert decisao["resultado"]["campos_encontrados"] == ["validade"]
+
+
+def test_valor_na_linha_seguinte_continua_valendo():
+    texto = "Autoridade emissora:\nCapitania dos Portos de SP\nTipo de certificado:\nSeguranca da navegacao\n" \
+            "Validade:\n10/10/2025\n" + FILLER
+    decisao = pre_validate("Certificado_Seguranca", texto)
+    assert decisao["decisao"] == "aprovado"
+
+
+def test_linha_seguinte_com_rotulo_nao_e_valor():
+    linhas = ["autoridade emissora:", "tipo de certificado: seguranca"]
+    assert match_field("autoridade_emissora", linhas) == 0.5
+    assert is_label_line("observacoes:")
+    assert not is_label_line("capitania dos portos de sp")
+
+
+def test_documento_sintetico_continua_aprovado():
+    texto = "\n".join(page_lines("DUE", 1))
+    assert pre_validate("DUE", texto)["decisao"] == "aprovado"
+
+
+def _extraction(texto, text_pages, scanned_pages, total_pages=None):
+    return {"text_content": texto, "total_pages": total_pages or scanned_pages,
+            "prompt_context": {"text_pages": text_pages, "scanned_pages": scanned_pages}}
+
+
+def test_pdf_misto_nao_e_reprovado_localmente():
+    from document_analyzer import RealDocumentAnalyzer
+
+    analyzer = RealDocumentAnalyzer("sk-teste")
+    texto = "Relacao de itens embarcados conforme conferencia no terminal.\n" + FILLER
+    assert analyzer.decide_locally("DUE", _extraction(texto, [1], 3))["decisao"] == "ambiguo"
+    assert analyzer.decide_locally("DUE", _extraction(texto, [1, 2, 3], 3))["decisao"] == "reprovado"
+
+
+def test_documento_longo_pode_ser_reprovado_localmente():
+    from document_analyzer import RealDocumentAnalyzer
+
+    analyzer = RealDocumentAnalyzer("sk-teste")
+    texto = "Relacao de itens embarcados conforme conferencia no terminal.\n" + FILLER
+    # 120 páginas, das quais só as 30 lidas contam: todas com texto utilizável
+    extraction = _extraction(texto, list(range(1, 31)), 30, total_pages=120)
+    assert analyzer.decide_locally("DUE", extraction)["decisao"] == "reprovado"
+    extraction = _extraction(texto, list(range(1, 30)), 30, total_pages=120)
+    assert analyzer.decide_locally("DUE", extraction)["decisao"] == "ambiguo"
+
+
+def test_texto_corrido_com_rotulos_nao_e_aprovado():
+    prosa = ("O navio informou que o produto due em 10 kg de amostra chega com o agente e a carga "
+             "no bl indicado; o navio segue para o bay 4 apos a declaracao unica de exportacao.\n")
+    decisao = pre_validate("DUE", prosa * 4)
+    assert decisao["decisao"] != "aprovado"
+    assert decisao["resultado"]["campos_encontrados"] == []
+
+
+def test_rotulo_curto_exige_separador():
+    assert match_field("peso", ["amostra de 10 kg recebida"]) == 0.0
+    assert match_field("peso", ["kg: 18.750 kg"]) == 1.0
+    assert match_field("navio", ["conforme o navio msc aurora"]) == 0.5
+    assert match_field("navio", ["Navio: MSC AURORA".lower()]) == 1.0
+    assert match_field("navio", ["bl: 123  navio: msc aurora"]) == 1.0
+
+
+def test_documentos_sinteticos_continuam_aprovados():
+    for tipo in ("DUE", "Manifesto", "Plano_Carga"):
+        assert pre_validate(tipo, "\n".join(page_lines(tipo, 1)))["decisao"] == "aprovado", tipo
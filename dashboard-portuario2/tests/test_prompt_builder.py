@@ -0,0 +1,38 @@
+from prompt_builder import build_prompt_context
+
+PAGINA_COM_TEXTO = "Relacao de itens embarcados conforme conferencia no terminal de Santos.\n" * 5
+
+
+def test_paginas_lidas_sem_texto_tem_prioridade_sobre_nao_lidas():
+    # 40 páginas, só as 30 primeiras lidas; a 5 e a 12 são escaneadas
+    paginas = [(n, "" if n in (5, 12) else PAGINA_COM_TEXTO) for n in range(1, 31)]
+    contexto = build_prompt_context("DUE", paginas, 40)
+    assert contexto["scanned_pages"] == 30
+    assert contexto["image_pages"] == [5, 12, 31]
+
+
+def test_paginas_com_texto_nao_viram_imagem():
+    paginas = [(n, PAGINA_COM_TEXTO) for n in range(1, 31)]
+    contexto = build_prompt_context("DUE", paginas, 30)
+    assert contexto["fields_missing"]
+    assert contexto["image_pages"] == []
+
+
+def test_total_de_paginas_desconhecido_usa_paginas_lidas():
+    contexto = build_prompt_context("DUE", [(1, ""), (2, PAGINA_COM_TEXTO), (3, "")], 0)
+    assert contexto["image_pages"] == [1, 3]
+
+
+def test_sem_paginas_lidas_nem_total_usa_primeiras_paginas():
+    contexto = build_prompt_context("DUE", [], 0)
+    assert contexto["text"] == ""
+    assert contexto["image_pages"] == [1, 2, 3]
+
+
+def test_sem_conteudo_nao_chama_a_ia():
+    from document_analyzer import RealDocumentAnalyzer
+
+    analyzer = RealDocumentAnalyzer("sk-teste")
+    resultado = analyzer.analyze_document_with_ai("DUE", "", [])
+    assert resultado["erro_analise"]
+    assert analyzer._client is None
@@ -0,0 +1,60 @@
+from amigu_stub_server import iniciar_em_thread
+from config import SYNC_CONFIG
+from http_client import AmiguAPIClient
+from local_store import LocalStore
+from sync_worker import IncrementalSyncer
+
+
+def test_pagina_cheia_com_marcas_iguais_nao_pula_registros(monkeypatch):
+    monkeypatch.setitem(SYNC_CONFIG, "page_size", 2)
+    server = iniciar_em_thread()
+    try:
+        # Cinco registros gravados no mesmo instante, mais que uma página
+        server.registros["/operacoes"] = {
+            f"OP{n}": {"operacao_id": f"OP{n}", "atualizado_em": "2025-01-01T10:00:00+00:00"}
+            for n in range(5)
+        }
+        server.registros["/operacoes"]["OP9"] = {"operacao_id": "OP9",
+                                                  "atualizado_em": "2025-01-01T11:00:00+00:00"}
+        client = AmiguAPIClient(api_config={"terminal": {
+            "base_url": f"http://127.0.0.1:{server.server_address[1]}",
+            "endpoints": {"operacoes": "/operacoes"}
+        }})
+        store = LocalStore(":memory:")
+        syncer = IncrementalSyncer(store, client=client)
+
+        assert syncer.sincronizar_recurso("operacoes") == 6
+        assert sorted(r["operacao_id"] for r in store.listar("operacoes")) == \
+            ["OP0", "OP1", "OP2", "OP3", "OP4", "OP9"]
+        # Sem alterações, a rodada seguinte não traz nada de novo
+        assert syncer.sincronizar_recurso("operacoes") == 0
+    finally:
+        server.shutdown()
+
+
+def test_ids_numericos_desempatam_em_ordem_numerica(monkeypatch):
+    from sync_worker import _cursor_dos_registros
+
+    marca = "2025-01-01T10:00:00+00:00"
+    assert _cursor_dos_registros([{"operacao_id": "9", "atualizado_em": marca},
+                                  {"operacao_id": "10", "atualizado_em": marca}], "operacao_id") == (marca, "10")
+
+    monkeypatch.setitem(SYNC_CONFIG, "page_size", 2)
+    server = iniciar_em_thread()
+    try:
+        server.registros["/operacoes"] = {
+            str(n): {"operacao_id": str(n), "atualizado_em": marca} for n in (9, 10, 11)
+        }
+        client = AmiguAPIClient(api_config={"terminal": {
+            "base_url": f"http://127.0.0.1:{server.server_address[1]}",
+            "endpoints": {"operacoes": "/operacoes"}
+        }})
+        store = LocalStore(":memory:")
+        syncer = IncrementalSyncer(store, client=client)
+
+        assert syncer.sincronizar_recurso("operacoes") == 3
+        assert sorted(int(r["operacao_id"]) for r in store.listar("operacoes")) == [9, 10, 11]
+        # Páginas [9, 10] e [11]: o cursor parou no 10, sem buscar de novo a partir do 9
+        assert server.stats["requisicoes"] == 2
+    finally:
+        server.shutdown()
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from local_store import LocalStore
+from vessel_repository import VesselRepository
+
+
+def _navio(navio_id, **campos):
+    return {"navio_id": navio_id, "nome": f"Navio {navio_id}", "tipo_carga": "Contêiner",
+            "eta": datetime(2025, 1, 1, 10), "status": "Aprovado", "berco": "Berço 1", **campos}
+
+
+def test_versao_muda_so_com_escritas_em_navios(tmp_path):
+    caminho = str(tmp_path / "porto.sqlite3")
+    repo = VesselRepository(caminho)
+    store = LocalStore(caminho)
+
+    versao = repo.versao
+    # Rodada de sincronização sem novidades, metadados e IDs não invalidam os caches
+    store.upsert("escalas", [], "escala_id", "2025-01-01T10:00:00")
+    repo.definir_metadado("sync_versao", "3")
+    repo.proximo_id("AUTH")
+    assert repo.versao == versao
+
+    repo.salvar(_navio("N1"))
+    assert repo.versao > versao
+    versao = repo.versao
+    repo.atualizar("N1", status="Pendente")
+    assert repo.versao > versao
+
+
+def test_versao_ve_escritas_de_outra_conexao(tmp_path):
+    caminho = str(tmp_path / "porto.sqlite3")
+    repo, outro = VesselRepository(caminho), VesselRepository(caminho)
+    versao = repo.versao
+    outro.salvar(_navio("N2"))
+    assert repo.versao > versao
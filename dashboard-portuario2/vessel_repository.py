@@ -0,0 +1,208 @@
+"""
+Repositório persistente (SQLite) de navios/escalas com índices para as consultas do dashboard
+
+Cada escrita publica um evento "navio_atualizado" no barramento (event_bus.py).
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Iterable, Optional
+
+from config import VESSEL_STORE_CONFIG
+from event_bus import EVENTO_NAVIO_ATUALIZADO, bus
+
+CAMPOS_NAVIO = [
+    "navio_id", "nome", "tipo_carga", "eta", "status", "berco", "documentos", "agente",
+    "autorizacao_id", "data_aprovacao", "tipo_operacao", "operacao_id", "inicio_operacao", "escala_id"
+]
+
+
+def _para_linha(navio: Dict[str, Any]) -> List[Any]:
+    valores = []
+    for campo in CAMPOS_NAVIO:
+        valor = navio.get(campo)
+        if isinstance(valor, datetime):
+            valor = valor.isoformat()
+        valores.append(valor)
+    return valores
+
+
+def _para_navio(linha: sqlite3.Row) -> Dict[str, Any]:
+    navio = dict(linha)
+    if navio["eta"]:
+        navio["eta"] = datetime.fromisoformat(navio["eta"])
+    return navio
+
+
+class VesselRepository:
+    """Navios indexados por navio_id, status, eta e berço, com geração atômica de IDs"""
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or VESSEL_STORE_CONFIG["path"]
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS navios (
+                navio_id TEXT PRIMARY KEY,
+                nome TEXT NOT NULL,
+                tipo_carga TEXT,
+                eta TEXT,
+                status TEXT,
+                berco TEXT,
+                documentos TEXT,
+                agente TEXT,
+                autorizacao_id TEXT,
+                data_aprovacao TEXT,
+                tipo_operacao TEXT,
+                operacao_id TEXT,
+                inicio_operacao TEXT,
+                escala_id TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_navios_status ON navios (status);
+            CREATE INDEX IF NOT EXISTS idx_navios_eta ON navios (eta);
+            CREATE INDEX IF NOT EXISTS idx_navios_berco ON navios (berco);
+            CREATE TABLE IF NOT EXISTS sequencias (
+                prefixo TEXT PRIMARY KEY,
+                valor INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS metadados (
+                chave TEXT PRIMARY KEY,
+                valor TEXT
+            );
+            -- Contador de alterações da tabela navios, mantido por gatilhos: escritas de qualquer
+            -- processo o incrementam, mas as do LocalStore e dos metadados (mesmo banco) não
+            CREATE TABLE IF NOT EXISTS versao_navios (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                valor INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO versao_navios (id, valor) VALUES (1, 0);
+            CREATE TRIGGER IF NOT EXISTS navios_versao_insert AFTER INSERT ON navios
+                BEGIN UPDATE versao_navios SET valor = valor + 1 WHERE id = 1; END;
+            CREATE TRIGGER IF NOT EXISTS navios_versao_update AFTER UPDATE ON navios
+                BEGIN UPDATE versao_navios SET valor = valor + 1 WHERE id = 1; END;
+            CREATE TRIGGER IF NOT EXISTS navios_versao_delete AFTER DELETE ON navios
+                BEGIN UPDATE versao_navios SET valor = valor + 1 WHERE id = 1; END;
+        """)
+    
+    @property
+    def versao(self) -> int:
+        """Versão dos navios (escritas deste e de outros processos), usada como chave de caches"""
+        with self._lock:
+            (versao,) = self._conn.execute("SELECT valor FROM versao_navios WHERE id = 1").fetchone()
+        return versao
+    
+    def vazio(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM navios LIMIT 1").fetchone() is None
+    
+    def obter(self, navio_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            linha = self._conn.execute("SELECT * FROM navios WHERE navio_id = ?", (navio_id,)).fetchone()
+        return _para_navio(linha) if linha else None
+    
+    def listar(self, status: Optional[Iterable[str]] = None, berco: Optional[str] = None,
+               eta_ate: Optional[datetime] = None, limite: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Lista navios por ETA, filtrando por status, berço e ETA máxima"""
+        condicoes, parametros = [], []
+        if status is not None:
+            status = [status] if isinstance(status, str) else list(status)
+            condicoes.append(f"status IN ({', '.join('?' * len(status))})")
+            parametros.extend(status)
+        if berco is not None:
+            condicoes.append("berco = ?")
+            parametros.append(berco)
+        if eta_ate is not None:
+            condicoes.append("eta <= ?")
+            parametros.append(eta_ate.isoformat())
+        
+        sql = "SELECT * FROM navios"
+        if condicoes:
+            sql += " WHERE " + " AND ".join(condicoes)
+        sql += " ORDER BY eta"
+        if limite is not None:
+            sql += " LIMIT ?"
+            parametros.append(limite)
+        
+        with self._lock:
+            linhas = self._conn.execute(sql, parametros).fetchall()
+        return [_para_navio(linha) for linha in linhas]
+    
+    def contar_por_status(self) -> Dict[str, int]:
+        with self._lock:
+            linhas = self._conn.execute("SELECT status, COUNT(*) FROM navios GROUP BY status").fetchall()
+        return {status: total for status, total in linhas}
+    
+    def salvar(self, navio: Dict[str, Any]) -> None:
+        """Insere ou substitui o navio completo"""
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO navios ({', '.join(CAMPOS_NAVIO)}) "
+                f"VALUES ({', '.join('?' * len(CAMPOS_NAVIO))})",
+                _para_linha(navio)
+            )
+        bus.publicar(EVENTO_NAVIO_ATUALIZADO, navio["navio_id"])
+    
+    def inserir(self, navio: Dict[str, Any]) -> bool:
+        """Insere um novo navio; retorna False se o navio_id já existir"""
+        with self._lock:
+            try:
+                self._conn.execute(
+                    f"INSERT INTO navios ({', '.join(CAMPOS_NAVIO)}) "
+                    f"VALUES ({', '.join('?' * len(CAMPOS_NAVIO))})",
+                    _para_linha(navio)
+                )
+            except sqlite3.IntegrityError:
+                return False
+        bus.publicar(EVENTO_NAVIO_ATUALIZADO, navio["navio_id"])
+        return True
+    
+    def atualizar(self, navio_id: str, **campos: Any) -> None:
+        """Atualiza apenas os campos informados"""
+        campos = {c: v for c, v in campos.items() if c in CAMPOS_NAVIO and c != "navio_id"}
+        if not campos:
+            return
+        valores = [v.isoformat() if isinstance(v, datetime) else v for v in campos.values()]
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE navios SET {', '.join(f'{c} = ?' for c in campos)} WHERE navio_id = ?",
+                valores + [navio_id]
+            )
+        bus.publicar(EVENTO_NAVIO_ATUALIZADO, navio_id)
+    
+    def proximo_id(self, prefixo: str, digitos: int = 3) -> str:
+        """Gera IDs sequenciais (AUTH004, OP004...) de forma atômica entre sessões e processos"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                linha = self._conn.execute(
+                    "SELECT valor FROM sequencias WHERE prefixo = ?", (prefixo,)
+                ).fetchone()
+                if linha is None:
+                    # Primeira geração: continua a partir do total de navios já cadastrados
+                    (valor,) = self._conn.execute("SELECT COUNT(*) FROM navios").fetchone()
+                else:
+                    valor = linha[0]
+                valor += 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sequencias (prefixo, valor) VALUES (?, ?)", (prefixo, valor)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return f"{prefixo}{valor:0{digitos}d}"
+    
+    def obter_metadado(self, chave: str, padrao: Optional[str] = None) -> Optional[str]:
+        with self._lock:
+            linha = self._conn.execute("SELECT valor FROM metadados WHERE chave = ?", (chave,)).fetchone()
+        return linha[0] if linha else padrao
+    
+    def definir_metadado(self, chave: str, valor: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO metadados (chave, valor) VALUES (?, ?)", (chave, valor))